@@ -0,0 +1,226 @@
+"""normalize team names
+
+Revision ID: 0a7d3c9e5f62
+Revises: 6c2f8e4a9b13
+Create Date: 2026-10-17 22:31:07.204518
+
+"""
+import unicodedata
+from collections import defaultdict
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0a7d3c9e5f62'
+down_revision: Union[str, Sequence[str], None] = '6c2f8e4a9b13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+puzzles = sa.table(
+    'puzzles',
+    sa.column('team_name', sa.String),
+    sa.column('team_key', sa.String),
+    sa.column('created_at', sa.DateTime),
+)
+attempts = sa.table('attempts', sa.column('team_name', sa.String))
+teams = sa.table(
+    'teams',
+    sa.column('key', sa.String),
+    sa.column('name', sa.String),
+    sa.column('puzzles', sa.Integer),
+)
+team_stats = sa.table(
+    'team_stats',
+    sa.column('team_name', sa.String),
+    sa.column('attempts', sa.Integer),
+    sa.column('correct_attempts', sa.Integer),
+    sa.column('users', sa.Integer),
+    sa.column('solves', sa.Integer),
+)
+team_user_stats = sa.table(
+    'team_user_stats',
+    sa.column('team_name', sa.String),
+    sa.column('user_id', sa.Uuid),
+    sa.column('attempts', sa.Integer),
+    sa.column('puzzles_solved', sa.Integer),
+)
+
+
+def normalize_team_name(name: str) -> str:
+    # app.core.teams.normalize_team_name as of this revision
+    return "".join(ch for ch in unicodedata.normalize("NFKD", name.casefold()) if ch.isalnum())
+
+
+def create_search_triggers() -> None:
+    """Recreate the puzzles_fts triggers from 6c2f8e4a9b13 after a SQLite table rebuild."""
+    op.execute(
+        "CREATE TRIGGER puzzles_fts_insert AFTER INSERT ON puzzles BEGIN "
+        "INSERT INTO puzzles_fts (puzzle_id, title, description, hint) "
+        "VALUES (new.id, new.title, new.description, new.hint); "
+        "END"
+    )
+    op.execute(
+        "CREATE TRIGGER puzzles_fts_delete AFTER DELETE ON puzzles BEGIN "
+        "DELETE FROM puzzles_fts WHERE rowid IN ("
+        "SELECT rowid FROM puzzles_fts WHERE puzzles_fts MATCH 'puzzle_id:\"' || old.id || '\"'); "
+        "END"
+    )
+    op.execute(
+        "CREATE TRIGGER puzzles_fts_update AFTER UPDATE OF title, description, hint ON puzzles BEGIN "
+        "UPDATE puzzles_fts SET title = new.title, description = new.description, hint = new.hint "
+        "WHERE rowid IN ("
+        "SELECT rowid FROM puzzles_fts WHERE puzzles_fts MATCH 'puzzle_id:\"' || old.id || '\"'); "
+        "END"
+    )
+
+
+def merge_team_stats(connection, renamed: dict[str, str]) -> None:
+    """Fold the team_stats and team_user_stats rows of renamed spellings into their new names."""
+    names = set(renamed) | set(renamed.values())
+
+    entries: dict[tuple, list[int]] = defaultdict(lambda: [0, 0])
+    for team_name, user_id, attempt_count, solved in connection.execute(
+        sa.select(
+            team_user_stats.c.team_name,
+            team_user_stats.c.user_id,
+            team_user_stats.c.attempts,
+            team_user_stats.c.puzzles_solved,
+        ).where(team_user_stats.c.team_name.in_(names))
+    ):
+        entry = entries[(renamed.get(team_name, team_name), user_id)]
+        entry[0] += attempt_count
+        entry[1] += solved
+
+    totals: dict[str, list[int]] = defaultdict(lambda: [0, 0, 0, 0])
+    for team_name, attempt_count, correct, solves in connection.execute(
+        sa.select(
+            team_stats.c.team_name,
+            team_stats.c.attempts,
+            team_stats.c.correct_attempts,
+            team_stats.c.solves,
+        ).where(team_stats.c.team_name.in_(names))
+    ):
+        total = totals[renamed.get(team_name, team_name)]
+        total[0] += attempt_count
+        total[1] += correct
+        total[3] += solves
+    # A user who tried several spellings is one user of the merged team
+    for team_name, _ in entries:
+        totals[team_name][2] += 1
+
+    connection.execute(team_user_stats.delete().where(team_user_stats.c.team_name.in_(names)))
+    connection.execute(team_stats.delete().where(team_stats.c.team_name.in_(names)))
+    if entries:
+        op.bulk_insert(team_user_stats, [
+            {"team_name": team_name, "user_id": user_id, "attempts": attempt_count, "puzzles_solved": solved}
+            for (team_name, user_id), (attempt_count, solved) in entries.items()
+        ])
+    if totals:
+        op.bulk_insert(team_stats, [
+            {"team_name": team_name, "attempts": attempt_count, "correct_attempts": correct, "users": users, "solves": solves}
+            for team_name, (attempt_count, correct, users, solves) in totals.items()
+        ])
+
+
+def upgrade() -> None:
+    """Add puzzles.team_key and the teams table, merging spellings of the same team.
+
+    Spellings whose keys match become one library named after the spelling
+    with the most puzzles; ties go to the one used first. Puzzles, attempts
+    and the team stats tables are renamed to it. The merge isn't undone
+    on downgrade.
+    """
+    op.create_table(
+        'teams',
+        sa.Column('key', sa.String(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('puzzles', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('key')
+    )
+    op.add_column('puzzles', sa.Column('team_key', sa.String(), nullable=True))
+
+    connection = op.get_bind()
+    spellings: dict[str, list[tuple[str, int, object]]] = defaultdict(list)
+    for team_name, count, first_used in connection.execute(
+        sa.select(puzzles.c.team_name, sa.func.count(), sa.func.min(puzzles.c.created_at))
+        .group_by(puzzles.c.team_name)
+    ):
+        spellings[normalize_team_name(team_name)].append((team_name, count, first_used))
+
+    renamed = {}
+    updates = []
+    team_rows = []
+    for key, names in spellings.items():
+        team_name, _, _ = min(names, key=lambda name: (-name[1], name[2] or datetime.max, name[0]))
+        name = " ".join(team_name.split())
+        team_rows.append({"key": key, "name": name, "puzzles": sum(count for _, count, _ in names)})
+        for spelling, _, _ in names:
+            updates.append({"old_name": spelling, "new_name": name, "new_key": key})
+            if spelling != name:
+                renamed[spelling] = name
+
+    if team_rows:
+        op.bulk_insert(teams, team_rows)
+    if updates:
+        connection.execute(
+            puzzles.update()
+            .where(puzzles.c.team_name == sa.bindparam('old_name'))
+            .values(team_name=sa.bindparam('new_name'), team_key=sa.bindparam('new_key')),
+            updates
+        )
+    if renamed:
+        connection.execute(
+            attempts.update()
+            .where(attempts.c.team_name == sa.bindparam('old_name'))
+            .values(team_name=sa.bindparam('new_name')),
+            [{"old_name": old, "new_name": new} for old, new in renamed.items()]
+        )
+        merge_team_stats(connection, renamed)
+
+    op.drop_index('ix_puzzles_team_name_fingerprint', table_name='puzzles')
+    op.drop_index('ix_puzzles_team_name_created_at_id', table_name='puzzles')
+    with op.batch_alter_table('puzzles') as batch_op:
+        batch_op.alter_column('team_key', existing_type=sa.String(), nullable=False)
+    if connection.dialect.name == 'sqlite':
+        # Rebuilding the table dropped its triggers
+        create_search_triggers()
+    op.create_index(
+        'ix_puzzles_team_key_created_at_id',
+        'puzzles',
+        ['team_key', sa.text('created_at DESC'), sa.text('id DESC')],
+        unique=False
+    )
+    op.create_index(
+        'ix_puzzles_team_key_fingerprint',
+        'puzzles',
+        ['team_key', 'fingerprint'],
+        unique=False
+    )
+
+
+def downgrade() -> None:
+    """Drop puzzles.team_key and the teams table; merged team names stay merged."""
+    op.drop_index('ix_puzzles_team_key_fingerprint', table_name='puzzles')
+    op.drop_index('ix_puzzles_team_key_created_at_id', table_name='puzzles')
+    with op.batch_alter_table('puzzles') as batch_op:
+        batch_op.drop_column('team_key')
+    if op.get_bind().dialect.name == 'sqlite':
+        create_search_triggers()
+    op.create_index(
+        'ix_puzzles_team_name_created_at_id',
+        'puzzles',
+        ['team_name', sa.text('created_at DESC'), sa.text('id DESC')],
+        unique=False
+    )
+    op.create_index(
+        'ix_puzzles_team_name_fingerprint',
+        'puzzles',
+        ['team_name', 'fingerprint'],
+        unique=False
+    )
+    op.drop_table('teams')
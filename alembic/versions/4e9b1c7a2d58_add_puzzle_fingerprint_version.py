@@ -0,0 +1,64 @@
+"""add puzzle fingerprint version
+
+Revision ID: 4e9b1c7a2d58
+Revises: 0a7d3c9e5f62
+Create Date: 2026-10-18 10:14:52.603127
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4e9b1c7a2d58'
+down_revision: Union[str, Sequence[str], None] = '0a7d3c9e5f62'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Add puzzles.fingerprint_version.
+
+    Existing fingerprints are version 1, which mirrored puzzles wrongly;
+    recompute them with `python -m app.cli fingerprint-puzzles`.
+    """
+    op.add_column('puzzles', sa.Column('fingerprint_version', sa.SmallInteger(), nullable=True))
+    puzzles = sa.table(
+        'puzzles',
+        sa.column('fingerprint', sa.String),
+        sa.column('fingerprint_version', sa.SmallInteger),
+    )
+    op.execute(
+        puzzles.update()
+        .where(puzzles.c.fingerprint.is_not(None))
+        .values(fingerprint_version=1)
+    )
+
+
+def downgrade() -> None:
+    """Drop puzzles.fingerprint_version."""
+    with op.batch_alter_table('puzzles') as batch_op:
+        batch_op.drop_column('fingerprint_version')
+    if op.get_bind().dialect.name == 'sqlite':
+        # Rebuilding the table dropped its full-text search triggers
+        op.execute(
+            "CREATE TRIGGER puzzles_fts_insert AFTER INSERT ON puzzles BEGIN "
+            "INSERT INTO puzzles_fts (puzzle_id, title, description, hint) "
+            "VALUES (new.id, new.title, new.description, new.hint); "
+            "END"
+        )
+        op.execute(
+            "CREATE TRIGGER puzzles_fts_delete AFTER DELETE ON puzzles BEGIN "
+            "DELETE FROM puzzles_fts WHERE rowid IN ("
+            "SELECT rowid FROM puzzles_fts WHERE puzzles_fts MATCH 'puzzle_id:\"' || old.id || '\"'); "
+            "END"
+        )
+        op.execute(
+            "CREATE TRIGGER puzzles_fts_update AFTER UPDATE OF title, description, hint ON puzzles BEGIN "
+            "UPDATE puzzles_fts SET title = new.title, description = new.description, hint = new.hint "
+            "WHERE rowid IN ("
+            "SELECT rowid FROM puzzles_fts WHERE puzzles_fts MATCH 'puzzle_id:\"' || old.id || '\"'); "
+            "END"
+        )
@@ -0,0 +1,32 @@
+"""add puzzle scoring
+
+Revision ID: 5b9e3c1d7f20
+Revises: e7a2d94c5b18
+Create Date: 2026-10-17 18:47:12.306518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b9e3c1d7f20'
+down_revision: Union[str, Sequence[str], None] = 'e7a2d94c5b18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Add puzzles.scoring; existing puzzles keep exact per-label scoring."""
+    op.add_column(
+        'puzzles',
+        sa.Column('scoring', sa.String(), nullable=False, server_default='exact')
+    )
+
+
+def downgrade() -> None:
+    """Drop puzzles.scoring."""
+    with op.batch_alter_table('puzzles') as batch_op:
+        batch_op.drop_column('scoring')
@@ -0,0 +1,84 @@
+"""add puzzle search
+
+Revision ID: 6c2f8e4a9b13
+Revises: b3e81f5a0d47
+Create Date: 2026-10-17 21:12:40.518306
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6c2f8e4a9b13'
+down_revision: Union[str, Sequence[str], None] = 'b3e81f5a0d47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Add the full-text index over puzzle titles, descriptions and hints.
+
+    PostgreSQL gets a stored generated tsvector column with a GIN index,
+    computed for existing rows as the column is added. SQLite gets an FTS5
+    table kept in sync by triggers, filled from the existing puzzles.
+    Mirrors the DDL in app.db.search.
+    """
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute(
+            "ALTER TABLE puzzles ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+            "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(description, '')), 'B') || "
+            "setweight(to_tsvector('english', coalesce(hint, '')), 'C')"
+            ") STORED"
+        )
+        op.create_index(
+            'ix_puzzles_search_vector',
+            'puzzles',
+            [sa.text('search_vector')],
+            postgresql_using='gin'
+        )
+        return
+
+    op.execute(
+        "CREATE VIRTUAL TABLE puzzles_fts USING fts5("
+        "puzzle_id, title, description, hint, tokenize = 'porter unicode61')"
+    )
+    op.execute(
+        "INSERT INTO puzzles_fts (puzzle_id, title, description, hint) "
+        "SELECT id, title, description, hint FROM puzzles"
+    )
+    op.execute(
+        "CREATE TRIGGER puzzles_fts_insert AFTER INSERT ON puzzles BEGIN "
+        "INSERT INTO puzzles_fts (puzzle_id, title, description, hint) "
+        "VALUES (new.id, new.title, new.description, new.hint); "
+        "END"
+    )
+    op.execute(
+        "CREATE TRIGGER puzzles_fts_delete AFTER DELETE ON puzzles BEGIN "
+        "DELETE FROM puzzles_fts WHERE rowid IN ("
+        "SELECT rowid FROM puzzles_fts WHERE puzzles_fts MATCH 'puzzle_id:\"' || old.id || '\"'); "
+        "END"
+    )
+    op.execute(
+        "CREATE TRIGGER puzzles_fts_update AFTER UPDATE OF title, description, hint ON puzzles BEGIN "
+        "UPDATE puzzles_fts SET title = new.title, description = new.description, hint = new.hint "
+        "WHERE rowid IN ("
+        "SELECT rowid FROM puzzles_fts WHERE puzzles_fts MATCH 'puzzle_id:\"' || old.id || '\"'); "
+        "END"
+    )
+
+
+def downgrade() -> None:
+    """Drop the full-text index."""
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_index('ix_puzzles_search_vector', table_name='puzzles')
+        op.drop_column('puzzles', 'search_vector')
+        return
+
+    op.execute("DROP TRIGGER IF EXISTS puzzles_fts_update")
+    op.execute("DROP TRIGGER IF EXISTS puzzles_fts_delete")
+    op.execute("DROP TRIGGER IF EXISTS puzzles_fts_insert")
+    op.execute("DROP TABLE IF EXISTS puzzles_fts")
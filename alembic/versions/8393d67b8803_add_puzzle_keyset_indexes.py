@@ -0,0 +1,43 @@
+"""add puzzle keyset indexes
+
+Revision ID: 8393d67b8803
+Revises: b34e783d034b
+Create Date: 2026-10-17 09:12:40.318265
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8393d67b8803'
+down_revision: Union[str, Sequence[str], None] = 'b34e783d034b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Add composite indexes for keyset pagination of puzzles."""
+    op.create_index(
+        'ix_puzzles_team_name_created_at_id',
+        'puzzles',
+        ['team_name', sa.text('created_at DESC'), sa.text('id DESC')],
+        unique=False
+    )
+    op.create_index(
+        'ix_puzzles_created_at_id',
+        'puzzles',
+        [sa.text('created_at DESC'), sa.text('id DESC')],
+        unique=False
+    )
+    # The composite index leads with team_name, so the single-column one is redundant
+    op.drop_index(op.f('ix_puzzles_team_name'), table_name='puzzles')
+
+
+def downgrade() -> None:
+    """Drop keyset pagination indexes."""
+    op.create_index(op.f('ix_puzzles_team_name'), 'puzzles', ['team_name'], unique=False)
+    op.drop_index('ix_puzzles_created_at_id', table_name='puzzles')
+    op.drop_index('ix_puzzles_team_name_created_at_id', table_name='puzzles')
@@ -0,0 +1,43 @@
+"""add attempts
+
+Revision ID: 9d4f6a2e8c31
+Revises: 5b9e3c1d7f20
+Create Date: 2026-10-17 19:12:40.218734
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d4f6a2e8c31'
+down_revision: Union[str, Sequence[str], None] = '5b9e3c1d7f20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create the attempts log."""
+    op.create_table(
+        'attempts',
+        sa.Column('id', sa.Uuid(), nullable=False),
+        sa.Column('puzzle_id', sa.Uuid(), nullable=False),
+        sa.Column('user_id', sa.Uuid(), nullable=True),
+        sa.Column('format', sa.String(), nullable=False),
+        sa.Column('squares_packed', sa.LargeBinary(), nullable=False),
+        sa.Column('distances_packed', sa.LargeBinary(), nullable=False),
+        sa.Column('correct', sa.Boolean(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_attempts_puzzle_id_created_at', 'attempts', ['puzzle_id', 'created_at'], unique=False)
+    op.create_index('ix_attempts_user_id_created_at', 'attempts', ['user_id', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Drop the attempts log."""
+    op.drop_index('ix_attempts_user_id_created_at', table_name='attempts')
+    op.drop_index('ix_attempts_puzzle_id_created_at', table_name='attempts')
+    op.drop_table('attempts')
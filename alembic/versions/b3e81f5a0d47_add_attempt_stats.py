@@ -0,0 +1,85 @@
+"""add attempt stats
+
+Revision ID: b3e81f5a0d47
+Revises: 9d4f6a2e8c31
+Create Date: 2026-10-17 19:58:03.441790
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3e81f5a0d47'
+down_revision: Union[str, Sequence[str], None] = '9d4f6a2e8c31'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Add attempts.team_name and the stats summary tables.
+
+    team_name is filled in from the puzzles that still exist. The summary
+    tables start empty; fill them from the attempts log with
+    `python -m app.cli rebuild-stats`.
+    """
+    op.add_column('attempts', sa.Column('team_name', sa.String(), nullable=True))
+    op.execute(
+        'UPDATE attempts SET team_name = '
+        '(SELECT puzzles.team_name FROM puzzles WHERE puzzles.id = attempts.puzzle_id)'
+    )
+
+    op.create_table(
+        'user_puzzle_progress',
+        sa.Column('puzzle_id', sa.Uuid(), nullable=False),
+        sa.Column('user_id', sa.Uuid(), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('attempts_to_solve', sa.Integer(), nullable=True),
+        sa.PrimaryKeyConstraint('puzzle_id', 'user_id')
+    )
+    op.create_table(
+        'puzzle_stats',
+        sa.Column('puzzle_id', sa.Uuid(), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('correct_attempts', sa.Integer(), nullable=False),
+        sa.Column('users', sa.Integer(), nullable=False),
+        sa.Column('solvers', sa.Integer(), nullable=False),
+        sa.Column('attempts_to_solve_total', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('puzzle_id')
+    )
+    op.create_table(
+        'team_stats',
+        sa.Column('team_name', sa.String(), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('correct_attempts', sa.Integer(), nullable=False),
+        sa.Column('users', sa.Integer(), nullable=False),
+        sa.Column('solves', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('team_name')
+    )
+    op.create_table(
+        'team_user_stats',
+        sa.Column('team_name', sa.String(), nullable=False),
+        sa.Column('user_id', sa.Uuid(), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('puzzles_solved', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('team_name', 'user_id')
+    )
+    op.create_index(
+        'ix_team_user_stats_leaderboard',
+        'team_user_stats',
+        ['team_name', sa.text('puzzles_solved DESC'), 'attempts', 'user_id'],
+        unique=False
+    )
+
+
+def downgrade() -> None:
+    """Drop the stats summary tables and attempts.team_name."""
+    op.drop_index('ix_team_user_stats_leaderboard', table_name='team_user_stats')
+    op.drop_table('team_user_stats')
+    op.drop_table('team_stats')
+    op.drop_table('puzzle_stats')
+    op.drop_table('user_puzzle_progress')
+    with op.batch_alter_table('attempts') as batch_op:
+        batch_op.drop_column('team_name')
@@ -0,0 +1,140 @@
+"""pack puzzle positions
+
+Revision ID: c41f0a7e92d5
+Revises: 8393d67b8803
+Create Date: 2026-10-17 14:03:27.511902
+
+"""
+import struct
+import uuid
+from collections import defaultdict
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41f0a7e92d5'
+down_revision: Union[str, Sequence[str], None] = '8393d67b8803'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Frozen copy of app.core.packing as of this revision: a (phase, slot)
+# array of little-endian uint16 square ids, slots ordered A1..An, B1..Bn,
+# 0xFFFF where a player has no position in that phase.
+PHASES = ('start', 'solution', 'locked')
+PLAYERS_PER_TEAM = {'4v4': 4, '7v7': 7, '9v9': 9, '11v11': 11}
+EMPTY = 0xFFFF
+BATCH_SIZE = 1000
+
+puzzles = sa.table(
+    'puzzles',
+    sa.column('id', sa.Uuid),
+    sa.column('format', sa.String),
+    sa.column('positions_packed', sa.LargeBinary),
+)
+players = sa.table(
+    'players',
+    sa.column('id', sa.Uuid),
+    sa.column('puzzle_id', sa.Uuid),
+    sa.column('label', sa.String),
+)
+positions = sa.table(
+    'positions',
+    sa.column('id', sa.Uuid),
+    sa.column('puzzle_id', sa.Uuid),
+    sa.column('player_id', sa.Uuid),
+    sa.column('square_id', sa.Integer),
+    sa.column('position_type', sa.String),
+)
+
+
+def slot_labels(format: str) -> list[str]:
+    return [f'{team}{i}' for team in ('A', 'B') for i in range(1, PLAYERS_PER_TEAM[format] + 1)]
+
+
+def pack(format: str, squares: dict) -> bytes:
+    labels = slot_labels(format)
+    values = [squares.get((phase, label), EMPTY) for phase in PHASES for label in labels]
+    return struct.pack(f'<{len(values)}H', *values)
+
+
+def unpack(format: str, data: bytes) -> dict:
+    labels = slot_labels(format)
+    values = struct.unpack(f'<{len(data) // 2}H', data)
+    return {
+        (phase, label): values[p * len(labels) + s]
+        for p, phase in enumerate(PHASES)
+        for s, label in enumerate(labels)
+        if values[p * len(labels) + s] != EMPTY
+    }
+
+
+def upgrade() -> None:
+    """Pack each puzzle's positions into puzzles.positions_packed and index the player and position foreign keys."""
+    op.add_column('puzzles', sa.Column('positions_packed', sa.LargeBinary(), nullable=True))
+
+    conn = op.get_bind()
+    puzzle_rows = conn.execute(sa.select(puzzles.c.id, puzzles.c.format).order_by(puzzles.c.id)).all()
+    for start in range(0, len(puzzle_rows), BATCH_SIZE):
+        batch = dict(puzzle_rows[start:start + BATCH_SIZE])
+        squares = defaultdict(dict)
+        rows = conn.execute(
+            sa.select(positions.c.puzzle_id, positions.c.position_type, positions.c.square_id, players.c.label)
+            .join(players, players.c.id == positions.c.player_id)
+            .where(positions.c.puzzle_id.in_(batch))
+        )
+        for puzzle_id, position_type, square_id, label in rows:
+            squares[puzzle_id][(position_type, label)] = square_id
+        conn.execute(
+            puzzles.update().where(puzzles.c.id == sa.bindparam('puzzle_id')),
+            [
+                {'puzzle_id': puzzle_id, 'positions_packed': pack(format, squares[puzzle_id])}
+                for puzzle_id, format in batch.items()
+            ]
+        )
+
+    with op.batch_alter_table('puzzles') as batch_op:
+        batch_op.alter_column('positions_packed', existing_type=sa.LargeBinary(), nullable=False)
+
+    op.create_index(op.f('ix_players_puzzle_id'), 'players', ['puzzle_id'], unique=False)
+    op.create_index(op.f('ix_positions_puzzle_id'), 'positions', ['puzzle_id'], unique=False)
+    op.create_index(op.f('ix_positions_player_id'), 'positions', ['player_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Expand packed positions back into the positions table and drop puzzles.positions_packed."""
+    conn = op.get_bind()
+    has_rows = sa.exists().where(positions.c.puzzle_id == puzzles.c.id)
+    puzzle_rows = conn.execute(
+        sa.select(puzzles.c.id, puzzles.c.format, puzzles.c.positions_packed).where(~has_rows)
+    ).all()
+    for start in range(0, len(puzzle_rows), BATCH_SIZE):
+        batch = puzzle_rows[start:start + BATCH_SIZE]
+        player_ids = {
+            (puzzle_id, label): player_id
+            for player_id, puzzle_id, label in conn.execute(
+                sa.select(players.c.id, players.c.puzzle_id, players.c.label)
+                .where(players.c.puzzle_id.in_([row.id for row in batch]))
+            )
+        }
+        new_rows = [
+            {
+                'id': uuid.uuid4(),
+                'puzzle_id': row.id,
+                'player_id': player_ids[(row.id, label)],
+                'square_id': square_id,
+                'position_type': phase,
+            }
+            for row in batch
+            for (phase, label), square_id in unpack(row.format, row.positions_packed).items()
+        ]
+        if new_rows:
+            conn.execute(positions.insert(), new_rows)
+
+    op.drop_index(op.f('ix_positions_player_id'), table_name='positions')
+    op.drop_index(op.f('ix_positions_puzzle_id'), table_name='positions')
+    op.drop_index(op.f('ix_players_puzzle_id'), table_name='players')
+    with op.batch_alter_table('puzzles') as batch_op:
+        batch_op.drop_column('positions_packed')
@@ -0,0 +1,40 @@
+"""add puzzle fingerprint
+
+Revision ID: e7a2d94c5b18
+Revises: c41f0a7e92d5
+Create Date: 2026-10-17 15:21:08.774310
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7a2d94c5b18'
+down_revision: Union[str, Sequence[str], None] = 'c41f0a7e92d5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Add puzzles.fingerprint for duplicate detection.
+
+    Existing rows are left NULL; fill them in with
+    `python -m app.cli fingerprint-puzzles`.
+    """
+    op.add_column('puzzles', sa.Column('fingerprint', sa.String(length=64), nullable=True))
+    op.create_index(
+        'ix_puzzles_team_name_fingerprint',
+        'puzzles',
+        ['team_name', 'fingerprint'],
+        unique=False
+    )
+
+
+def downgrade() -> None:
+    """Drop puzzles.fingerprint."""
+    op.drop_index('ix_puzzles_team_name_fingerprint', table_name='puzzles')
+    with op.batch_alter_table('puzzles') as batch_op:
+        batch_op.drop_column('fingerprint')
@@ -0,0 +1,195 @@
+"""Async twins of the puzzle endpoints in app.api.routes.
+
+Mounted instead of routes.puzzle_router when DB_ASYNC is set. Both routers
+call the handlers in app.api.handlers, these through AsyncSession.run_sync,
+so both modes issue the same SQL and return the same payloads.
+"""
+import uuid
+from fastapi import APIRouter, Depends, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.session import get_async_db
+from app.db import stats
+from app.schemas.puzzle import (
+    PuzzleCreate,
+    PuzzleOut,
+    PuzzleDetailOut,
+    PuzzleSearchResultOut,
+    PuzzleValidationRequest,
+    PuzzleValidationResponse,
+    BatchValidationRequest,
+    BatchValidationResult,
+    LayoutQuery,
+    SimilarPuzzleOut,
+    PuzzleStatsOut,
+    TeamStatsOut,
+    TeamSuggestionOut,
+)
+from app.core.solutions import solution_cache
+from app.api import handlers
+from app.api.similarity import refresh_formation_index
+from app.api.teams import suggest_teams
+from app.api.validation import (
+    get_solutions,
+    record_attempt,
+    record_batch_attempts,
+    load_solution,
+    validate_batch,
+)
+from app.core.config import settings
+
+router = APIRouter()
+
+
+@router.post("/puzzles", response_model=PuzzleOut)
+async def create_puzzle(
+    data: PuzzleCreate,
+    db: AsyncSession = Depends(get_async_db),
+):
+    return await db.run_sync(handlers.create_puzzle, data)
+
+@router.get("/puzzles", response_model=list[PuzzleOut])
+async def list_puzzles(
+    request: Request,
+    response: Response,
+    team_name: str | None = None,
+    cursor: str | None = None,
+    limit: int = Query(
+        settings.PUZZLE_PAGE_SIZE,
+        ge=1,
+        le=settings.PUZZLE_PAGE_SIZE_MAX
+    ),
+    db: AsyncSession = Depends(get_async_db),
+):
+    return await db.run_sync(handlers.list_puzzles, request, response, team_name, cursor, limit)
+
+@router.get("/puzzles/search", response_model=list[PuzzleSearchResultOut])
+async def search_puzzles(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200),
+    team_name: str | None = None,
+    cursor: str | None = None,
+    limit: int = Query(
+        settings.PUZZLE_PAGE_SIZE,
+        ge=1,
+        le=settings.PUZZLE_PAGE_SIZE_MAX
+    ),
+    db: AsyncSession = Depends(get_async_db),
+):
+    return await db.run_sync(handlers.search_puzzles, response, q, team_name, cursor, limit)
+
+@router.get("/teams", response_model=list[TeamSuggestionOut])
+async def list_teams(
+    prefix: str = "",
+    limit: int = Query(
+        settings.TEAM_SUGGESTIONS_LIMIT,
+        ge=1,
+        le=settings.TEAM_SUGGESTIONS_LIMIT_MAX
+    ),
+):
+    # A rebuild reads every team through the sync engine, off the event loop
+    return await run_in_threadpool(suggest_teams, prefix, limit)
+
+@router.get("/teams/{team_name}/stats", response_model=TeamStatsOut)
+async def get_team_stats(
+    team_name: str,
+    limit: int = Query(
+        settings.LEADERBOARD_LIMIT,
+        ge=1,
+        le=settings.LEADERBOARD_LIMIT_MAX
+    ),
+    db: AsyncSession = Depends(get_async_db),
+):
+    return await db.run_sync(stats.team_stats, team_name, limit)
+
+@router.get("/puzzles/{puzzle_id}", response_model=PuzzleDetailOut)
+async def get_puzzle(
+    puzzle_id: uuid.UUID,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+):
+    return await db.run_sync(handlers.get_puzzle, puzzle_id, request, response)
+
+@router.get("/puzzles/{puzzle_id}/solution")
+async def get_puzzle_solution(
+    puzzle_id: uuid.UUID,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+):
+    return await db.run_sync(handlers.get_puzzle_solution, puzzle_id, request, response)
+
+@router.get("/puzzles/{puzzle_id}/stats", response_model=PuzzleStatsOut)
+async def get_puzzle_stats(
+    puzzle_id: uuid.UUID,
+    db: AsyncSession = Depends(get_async_db),
+):
+    return await db.run_sync(handlers.get_puzzle_stats, puzzle_id)
+
+@router.get("/puzzles/{puzzle_id}/similar", response_model=list[SimilarPuzzleOut])
+async def similar_puzzles(
+    puzzle_id: uuid.UUID,
+    k: int = Query(
+        settings.SIMILAR_PUZZLES_LIMIT,
+        ge=1,
+        le=settings.SIMILAR_PUZZLES_LIMIT_MAX
+    ),
+    max_distance: int | None = Query(None, ge=0),
+    team_name: str | None = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    # The first build reads every puzzle through the sync engine, off the event loop
+    await run_in_threadpool(refresh_formation_index)
+    return await db.run_sync(handlers.similar_puzzles, puzzle_id, k, max_distance, team_name)
+
+@router.post("/puzzles/similar", response_model=list[SimilarPuzzleOut])
+async def similar_to_layout(
+    query: LayoutQuery,
+    db: AsyncSession = Depends(get_async_db),
+):
+    await run_in_threadpool(refresh_formation_index)
+    return await db.run_sync(handlers.similar_to_layout, query)
+
+@router.post(
+    "/puzzles/{puzzle_id}/validate",
+    response_model=PuzzleValidationResponse
+)
+async def validate_puzzle(
+    puzzle_id: uuid.UUID,
+    submission: PuzzleValidationRequest,
+    db: AsyncSession = Depends(get_async_db),
+):
+    solution = solution_cache.get(puzzle_id)
+    if solution is None:
+        solution = await db.run_sync(load_solution, puzzle_id)
+
+    result = handlers.validate_submission(solution, submission)
+    # record() waits for room when the attempt log is full and not lossy;
+    # that wait must not hold up the event loop
+    await run_in_threadpool(record_attempt, solution, submission, result)
+    return result
+
+@router.post(
+    "/puzzles/validate",
+    response_model=list[BatchValidationResult]
+)
+async def validate_puzzles(
+    submissions: list[BatchValidationRequest],
+    db: AsyncSession = Depends(get_async_db),
+):
+    solutions = await db.run_sync(
+        get_solutions,
+        {item.puzzle_id for item in submissions}
+    )
+    results = validate_batch(solutions, submissions)
+    await run_in_threadpool(record_batch_attempts, solutions, submissions, results)
+    return results
+
+@router.delete("/puzzles/{puzzle_id}")
+async def delete_puzzle(
+    puzzle_id: uuid.UUID,
+    db: AsyncSession = Depends(get_async_db),
+):
+    return await db.run_sync(handlers.delete_puzzle, puzzle_id)
@@ -0,0 +1,77 @@
+import hashlib
+import uuid
+from datetime import datetime
+
+from fastapi import HTTPException, Request, Response
+
+from app.core.config import settings
+
+# Bump when a cached response body changes shape, so clients don't keep
+# revalidating old representations as current
+REPRESENTATION_VERSION = "2"
+
+
+def _etag(*parts) -> str:
+    digest = hashlib.sha256("|".join(str(part) for part in (REPRESENTATION_VERSION, *parts)).encode())
+    return f'"{digest.hexdigest()[:32]}"'
+
+
+def puzzle_etag(puzzle_id: uuid.UUID, created_at: datetime, view: str) -> str:
+    """Strong ETag for one view ("detail", "solution") of a puzzle.
+
+    Puzzles never change after creation, so id and created_at identify
+    the content.
+    """
+    return _etag(view, puzzle_id, created_at.isoformat())
+
+
+def list_etag(puzzles, next_cursor: str | None) -> str:
+    """Strong ETag for one page of GET /puzzles, from the (created_at, id) keys it contains.
+
+    Any create or delete that changes what the page would return changes
+    the ETag.
+    """
+    return _etag("list", next_cursor, *(f"{p.created_at.isoformat()}/{p.id}" for p in puzzles))
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Whether If-None-Match lists etag (weak comparison, as RFC 9110 requires)."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return any(
+        candidate.strip().removeprefix("W/") == etag
+        for candidate in header.split(",")
+    )
+
+
+def revalidate_puzzle(request: Request, puzzle_id: uuid.UUID, created_at: datetime | None, view: str) -> Response | None:
+    """A 304 if the client's copy of this puzzle view is current, else None.
+
+    Takes the puzzle's created_at from a lookup that skips loading players
+    and positions; None means the puzzle doesn't exist.
+    """
+    if created_at is None:
+        raise HTTPException(status_code=404, detail="Puzzle not found")
+
+    etag = puzzle_etag(puzzle_id, created_at, view)
+    if etag_matches(request, etag):
+        return not_modified(etag, puzzle_cache_control())
+    return None
+
+
+def puzzle_cache_control() -> str:
+    return f"public, max-age={settings.PUZZLE_CACHE_MAX_AGE}"
+
+
+def set_cache_headers(response: Response, etag: str, cache_control: str) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = cache_control
+
+
+def not_modified(etag: str, cache_control: str, headers: dict | None = None) -> Response:
+    response = Response(status_code=304, headers=headers)
+    set_cache_headers(response, etag, cache_control)
+    return response
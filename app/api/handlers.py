@@ -0,0 +1,212 @@
+"""Request handling shared by the sync and async puzzle routers.
+
+Each handler takes a sync Session first: app.api.routes calls them
+directly and app.api.async_routes through AsyncSession.run_sync, so the
+two routers only differ in how they get a session. Nothing here may block
+on anything but that session; index rebuilds and the attempt log are left
+to the routers.
+"""
+import uuid
+
+from fastapi import HTTPException, Request, Response
+from sqlalchemy.orm import Session
+
+from app.api.caching import (
+    etag_matches,
+    list_etag,
+    not_modified,
+    puzzle_cache_control,
+    puzzle_etag,
+    revalidate_puzzle,
+    set_cache_headers,
+)
+from app.api.pagination import (
+    decode_cursor,
+    decode_search_cursor,
+    encode_cursor,
+    encode_search_cursor,
+)
+from app.api.responses import PREBUILT_RESPONSES, prebuilt_json
+from app.api.serializers import puzzle_detail, puzzle_summary, solution_positions
+from app.api.similarity import find_similar
+from app.api.validation import score_submission, submission_error
+from app.core.config import settings
+from app.core.grid import get_grid
+from app.core.similarity import formation_index, layout_formation, packed_formation
+from app.core.solutions import CompiledSolution, solution_cache
+from app.core.teams import team_index
+from app.db import queries, search, stats
+from app.db.bulk import PuzzleRows, build_puzzle_rows, insert_puzzle_rows
+from app.db.models import Puzzle
+from app.schemas.puzzle import LayoutQuery, PuzzleCreate, PuzzleValidationRequest
+
+
+def not_found() -> HTTPException:
+    return HTTPException(status_code=404, detail="Puzzle not found")
+
+
+def create_puzzle(db: Session, data: PuzzleCreate) -> Puzzle:
+    try:
+        rows = build_puzzle_rows(data)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    if settings.REJECT_DUPLICATE_PUZZLES:
+        duplicate_id = queries.find_duplicate(db, data.team_name, rows.puzzle["fingerprint"])
+        if duplicate_id is not None:
+            raise HTTPException(status_code=409, detail=f"Duplicate of puzzle {duplicate_id}")
+
+    insert_puzzle_rows(db, [rows])
+    db.commit()
+    index_puzzles([rows])
+
+    return db.get(Puzzle, rows.puzzle["id"])
+
+
+def index_puzzles(batch: list[PuzzleRows]) -> None:
+    """Add newly committed puzzles to this process's formation and team indexes."""
+    for rows in batch:
+        puzzle = rows.puzzle
+        formation_index.add(puzzle["id"], puzzle["format"], puzzle["team_key"], puzzle["positions_packed"])
+        team_index.add(puzzle["team_key"], puzzle["team_name"])
+
+
+def list_puzzles(
+    db: Session,
+    request: Request,
+    response: Response,
+    team_name: str | None,
+    cursor: str | None,
+    limit: int,
+):
+    after = decode_cursor(cursor) if cursor else None
+    puzzles = queries.list_puzzles_page(db, team_name, after, limit + 1, summary=PREBUILT_RESPONSES)
+
+    headers = {}
+    if len(puzzles) > limit:
+        puzzles = puzzles[:limit]
+        last = puzzles[-1]
+        headers["X-Next-Cursor"] = encode_cursor(last.created_at, last.id)
+
+    etag = list_etag(puzzles, headers.get("X-Next-Cursor"))
+    if etag_matches(request, etag):
+        return not_modified(etag, "no-cache", headers)
+
+    response.headers.update(headers)
+    set_cache_headers(response, etag, "no-cache")
+    if PREBUILT_RESPONSES:
+        return prebuilt_json([puzzle_summary(puzzle) for puzzle in puzzles], response)
+    return puzzles
+
+
+def search_puzzles(
+    db: Session,
+    response: Response,
+    q: str,
+    team_name: str | None,
+    cursor: str | None,
+    limit: int,
+):
+    after = decode_search_cursor(cursor) if cursor else None
+    matches = search.search_puzzles_page(db, q, team_name, after, limit + 1)
+
+    if len(matches) > limit:
+        matches = matches[:limit]
+        last = matches[-1]
+        response.headers["X-Next-Cursor"] = encode_search_cursor(last.rank, last.id)
+
+    return matches
+
+
+def get_puzzle(db: Session, puzzle_id: uuid.UUID, request: Request, response: Response):
+    # Answer revalidation from created_at alone, before loading the puzzle
+    if request.headers.get("if-none-match"):
+        created_at = queries.puzzle_created_at(db, puzzle_id)
+        cached = revalidate_puzzle(request, puzzle_id, created_at, "detail")
+        if cached is not None:
+            return cached
+
+    puzzle = queries.load_puzzle(db, puzzle_id)
+
+    if not puzzle:
+        raise not_found()
+
+    set_cache_headers(response, puzzle_etag(puzzle.id, puzzle.created_at, "detail"), puzzle_cache_control())
+    payload = puzzle_detail(puzzle)
+    if PREBUILT_RESPONSES:
+        return prebuilt_json(payload, response)
+    return payload
+
+
+def get_puzzle_solution(db: Session, puzzle_id: uuid.UUID, request: Request, response: Response):
+    # Answer revalidation from created_at alone, before loading the puzzle
+    if request.headers.get("if-none-match"):
+        created_at = queries.puzzle_created_at(db, puzzle_id)
+        cached = revalidate_puzzle(request, puzzle_id, created_at, "solution")
+        if cached is not None:
+            return cached
+
+    puzzle = db.get(Puzzle, puzzle_id)
+
+    if not puzzle:
+        raise not_found()
+
+    set_cache_headers(response, puzzle_etag(puzzle.id, puzzle.created_at, "solution"), puzzle_cache_control())
+    return solution_positions(puzzle)
+
+
+def get_puzzle_stats(db: Session, puzzle_id: uuid.UUID) -> dict:
+    if queries.puzzle_created_at(db, puzzle_id) is None:
+        raise not_found()
+    return stats.puzzle_stats(db, puzzle_id)
+
+
+def similar_puzzles(
+    db: Session,
+    puzzle_id: uuid.UUID,
+    k: int,
+    max_distance: int | None,
+    team_name: str | None,
+) -> list[dict]:
+    """Call refresh_formation_index first."""
+    puzzle = db.get(Puzzle, puzzle_id)
+
+    if not puzzle:
+        raise not_found()
+
+    formation = packed_formation(get_grid(puzzle.format), puzzle.positions_packed)
+    return find_similar(db, puzzle.format, formation, k, max_distance, team_name, exclude=puzzle.id)
+
+
+def similar_to_layout(db: Session, query: LayoutQuery) -> list[dict]:
+    """Call refresh_formation_index first."""
+    try:
+        formation = layout_formation(
+            get_grid(query.format),
+            {pos.player_label: pos.square_id for pos in query.starting_positions}
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    return find_similar(db, query.format, formation, query.k, query.max_distance, query.team_name)
+
+
+def validate_submission(solution: CompiledSolution, submission: PuzzleValidationRequest) -> dict:
+    """score_submission, or a 400 for a submission that doesn't fit the puzzle."""
+    error = submission_error(solution, submission)
+    if error is not None:
+        raise HTTPException(status_code=400, detail=error)
+    return score_submission(solution, submission)
+
+
+def delete_puzzle(db: Session, puzzle_id: uuid.UUID) -> dict:
+    team_key = queries.delete_puzzle(db, puzzle_id)
+    if team_key is None:
+        raise not_found()
+
+    db.commit()
+    solution_cache.invalidate(puzzle_id)
+    formation_index.remove(puzzle_id)
+    team_index.remove(team_key)
+
+    return {"message": "Puzzle deleted successfully"}
@@ -0,0 +1,75 @@
+import time
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.core.metrics import QueryStats, current_query_stats, render_pool_metrics, request_metrics
+from app.core.profiling import summarize
+from app.db.session import pool_stats
+
+router = APIRouter()
+
+
+class MetricsMiddleware:
+    """Record latency, status and SQL time for every HTTP request.
+
+    Requests are labelled with the matched route template (for example
+    ``/puzzles/{puzzle_id}/validate``) rather than the raw path, so the
+    number of series stays bounded. Plain ASGI middleware, so streaming
+    responses are timed until their last chunk is sent.
+
+    With profile=True every statement is also recorded with its call site,
+    and the response carries X-Query-Count and an X-Query-Profile summary
+    of the statements run before the response started.
+    """
+
+    def __init__(self, app, profile: bool = False):
+        self.app = app
+        self.profile = profile
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        queries = QueryStats(statements=[] if self.profile else None)
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if self.profile:
+                    message["headers"] = [
+                        *message.get("headers", []),
+                        (b"x-query-count", str(queries.count).encode()),
+                        (b"x-query-profile", summarize(queries).encode("latin-1")),
+                    ]
+            await send(message)
+
+        token = current_query_stats.set(queries)
+        request_metrics.in_progress += 1
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            request_metrics.in_progress -= 1
+            current_query_stats.reset(token)
+            route = scope.get("route")
+            request_metrics.observe(
+                scope["method"],
+                route.path if route is not None else "<unmatched>",
+                status,
+                elapsed,
+                queries,
+            )
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    lines = request_metrics.render() + render_pool_metrics(pool_stats())
+    return PlainTextResponse(
+        "\n".join(lines) + "\n",
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
@@ -0,0 +1,42 @@
+import base64
+import uuid
+from datetime import datetime
+
+from fastapi import HTTPException
+
+
+def _encode(raw: str) -> str:
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode(cursor: str) -> tuple[str, str]:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    key, puzzle_id = base64.urlsafe_b64decode(padded).decode().split("|")
+    return key, puzzle_id
+
+
+def encode_cursor(created_at: datetime, puzzle_id: uuid.UUID) -> str:
+    """Opaque keyset cursor pointing just after (created_at, id)."""
+    return _encode(f"{created_at.isoformat()}|{puzzle_id}")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    try:
+        created_at, puzzle_id = _decode(cursor)
+        return datetime.fromisoformat(created_at), uuid.UUID(puzzle_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def encode_search_cursor(rank: float, puzzle_id: uuid.UUID) -> str:
+    """Opaque keyset cursor pointing just after (rank, id) in search results."""
+    # repr round-trips the float exactly
+    return _encode(f"{rank!r}|{puzzle_id}")
+
+
+def decode_search_cursor(cursor: str) -> tuple[float, uuid.UUID]:
+    try:
+        rank, puzzle_id = _decode(cursor)
+        return float(rank), uuid.UUID(puzzle_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
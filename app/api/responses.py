@@ -0,0 +1,33 @@
+import logging
+
+from fastapi import Response
+from fastapi.responses import ORJSONResponse
+
+from app.core.config import settings
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# Serve prebuilt payloads through orjson; without it, handlers return their
+# payloads for FastAPI to validate and serialize as usual
+PREBUILT_RESPONSES = settings.FAST_JSON_RESPONSES and orjson is not None
+
+if settings.FAST_JSON_RESPONSES and orjson is None:
+    logger.warning("FAST_JSON_RESPONSES is set but orjson isn't installed; serving responses through FastAPI's encoder")
+
+
+def prebuilt_json(payload, response: Response) -> Response:
+    """Send a payload built in its response model's shape, skipping revalidation.
+
+    Returning a Response bypasses FastAPI's response_model validation and
+    serialization, so payload must already hold exactly what the model
+    would produce, in field order. orjson then writes the same bytes as
+    the default JSONResponse: compact separators, UTF-8 without ASCII
+    escapes, UUIDs as strings. Headers set on the handler's injected
+    response (ETag, Cache-Control, ...) are carried over.
+    """
+    return ORJSONResponse(payload, headers=dict(response.headers))
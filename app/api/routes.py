@@ -1,221 +1,201 @@
 import uuid
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
-from app.db.models import Puzzle, Player, Position
-from app.db.session import get_db
+from app.db.session import SessionLocal, get_db
+from app.db import stats
+from app.db.attempts import attempt_log
+from app.db.bulk import PuzzleImporter, iter_export
 from app.schemas.puzzle import (
     PuzzleCreate,
     PuzzleOut,
     PuzzleDetailOut,
+    PuzzleSearchResultOut,
     PuzzleValidationRequest,
     PuzzleValidationResponse,
-    PlayerFeedback,
+    BatchValidationRequest,
+    BatchValidationResult,
+    LayoutQuery,
+    SimilarPuzzleOut,
+    PuzzleStatsOut,
+    TeamStatsOut,
+    TeamSuggestionOut,
+    ImportReportOut,
 )
-from app.core.grid import GRID_4V4
-from app.api import users
+from app.core.similarity import formation_index
+from app.core.solutions import solution_cache
+from app.core.teams import team_index
+from app.api import handlers, users
+from app.api.similarity import refresh_formation_index
+from app.api.teams import suggest_teams
+from app.api.streaming import iter_lines
+from app.api.validation import (
+    get_solution,
+    get_solutions,
+    record_attempt,
+    record_batch_attempts,
+    validate_batch,
+)
+from app.core.config import settings
 
 router = APIRouter()
 router.include_router(users.router)
 
+# Puzzle CRUD and validation, on app.api.handlers. app.api.async_routes
+# mirrors these routes on an AsyncSession; main.py mounts one or the other
+# depending on DB_ASYNC.
+puzzle_router = APIRouter()
+
 
-@router.post("/puzzles", response_model=PuzzleOut)
+@puzzle_router.post("/puzzles", response_model=PuzzleOut)
 def create_puzzle(
     data: PuzzleCreate,
     db: Session = Depends(get_db),
 ):
-    puzzle = Puzzle(
-        title=data.title,
-        description=data.description,
-        team_name=data.team_name,
-        hint=data.hint,
-        solution_answer=data.solution_answer,
-        format=data.format,
-        mode=data.mode,
-        team_a_color=data.team_a_color,
-        team_b_color=data.team_b_color,
-        created_by=None,
-    )
-
-    db.add(puzzle)
-    db.flush()
-
-    # Auto-create players
-    players = []
-    for team in ["A", "B"]:
-        for i in range(1, 5):
-            player = Player(
-                puzzle_id=puzzle.id,
-                team=team,
-                label=f"{team}{i}"
-            )
-            db.add(player)
-            players.append(player)
-
-    db.flush()
-
-    player_lookup = {p.label: p for p in players}
+    return handlers.create_puzzle(db, data)
 
-    # Validate ball carrier
-    if data.ball_carrier_label not in player_lookup:
-        raise HTTPException(
-            status_code=400,
-            detail="Invalid ball carrier"
-        )
-
-    puzzle.ball_carrier_id = player_lookup[
-        data.ball_carrier_label
-    ].id
-
-    # Save positions
-    def save_positions(items, position_type):
-        for pos in items:
-            if pos.player_label not in player_lookup:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Invalid player {pos.player_label}"
-                )
-            # Update player indicator if provided in starting positions
-            if position_type == "start" and hasattr(pos, 'indicator') and pos.indicator:
-                player_lookup[pos.player_label].indicator = pos.indicator
-            
-            db.add(Position(
-                puzzle_id=puzzle.id,
-                player_id=player_lookup[pos.player_label].id,
-                square_id=pos.square_id,
-                position_type=position_type
-            ))
-
-    save_positions(data.starting_positions, "start")
-    save_positions(data.solution_positions, "solution")
-    if hasattr(data, 'locked_positions') and data.locked_positions:
-        save_positions(data.locked_positions, "locked")
-
-    db.commit()
-    db.refresh(puzzle)
-
-    return puzzle
-
-@router.get("/puzzles", response_model=list[PuzzleOut])
+@router.post("/puzzles/import", response_model=ImportReportOut)
+async def import_puzzles(
+    request: Request,
+    db: Session = Depends(get_db),
+):
+    importer = PuzzleImporter(db, batch_size=settings.IMPORT_BATCH_SIZE, on_insert=handlers.index_puzzles)
+
+    # Parsing and validating a line is CPU-bound, so lines are handed to the
+    # threadpool a batch at a time rather than fed on the event loop
+    lines = []
+    line_no = 0
+    async for line in iter_lines(request.stream()):
+        line_no += 1
+        lines.append((line_no, line))
+        if len(lines) >= importer.batch_size:
+            await run_in_threadpool(importer.feed_lines, lines)
+            lines = []
+    await run_in_threadpool(importer.feed_lines, lines)
+    await run_in_threadpool(importer.flush)
+
+    return importer.report
+
+@puzzle_router.get("/puzzles", response_model=list[PuzzleOut])
 def list_puzzles(
+    request: Request,
+    response: Response,
     team_name: str | None = None,
+    cursor: str | None = None,
+    limit: int = Query(
+        settings.PUZZLE_PAGE_SIZE,
+        ge=1,
+        le=settings.PUZZLE_PAGE_SIZE_MAX
+    ),
+    db: Session = Depends(get_db),
+):
+    return handlers.list_puzzles(db, request, response, team_name, cursor, limit)
+
+@puzzle_router.get("/puzzles/search", response_model=list[PuzzleSearchResultOut])
+def search_puzzles(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200),
+    team_name: str | None = None,
+    cursor: str | None = None,
+    limit: int = Query(
+        settings.PUZZLE_PAGE_SIZE,
+        ge=1,
+        le=settings.PUZZLE_PAGE_SIZE_MAX
+    ),
+    db: Session = Depends(get_db),
+):
+    return handlers.search_puzzles(db, response, q, team_name, cursor, limit)
+
+@puzzle_router.get("/teams", response_model=list[TeamSuggestionOut])
+def list_teams(
+    prefix: str = "",
+    limit: int = Query(
+        settings.TEAM_SUGGESTIONS_LIMIT,
+        ge=1,
+        le=settings.TEAM_SUGGESTIONS_LIMIT_MAX
+    ),
+):
+    return suggest_teams(prefix, limit)
+
+@puzzle_router.get("/teams/{team_name}/stats", response_model=TeamStatsOut)
+def get_team_stats(
+    team_name: str,
+    limit: int = Query(
+        settings.LEADERBOARD_LIMIT,
+        ge=1,
+        le=settings.LEADERBOARD_LIMIT_MAX
+    ),
     db: Session = Depends(get_db),
 ):
-    query = db.query(Puzzle)
-    
-    if team_name:
-        query = query.filter(Puzzle.team_name == team_name)
-    
-    puzzles = query.order_by(Puzzle.created_at.desc()).all()
-    return puzzles
+    return stats.team_stats(db, team_name, limit)
+
+@router.get("/teams/{team_name}/export")
+def export_team_puzzles(team_name: str):
+    def stream():
+        # The response outlives request dependencies, so the stream owns its session
+        db = SessionLocal()
+        try:
+            yield from iter_export(db, team_name, batch_size=settings.EXPORT_BATCH_SIZE)
+        finally:
+            db.close()
+
+    return StreamingResponse(
+        stream(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="puzzles.ndjson"'}
+    )
 
-@router.get("/puzzles/{puzzle_id}", response_model=PuzzleDetailOut)
+@puzzle_router.get("/puzzles/{puzzle_id}", response_model=PuzzleDetailOut)
 def get_puzzle(
     puzzle_id: uuid.UUID,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
 ):
-    puzzle = db.query(Puzzle).filter(
-        Puzzle.id == puzzle_id
-    ).first()
-
-    if not puzzle:
-        raise HTTPException(status_code=404, detail="Puzzle not found")
-
-    # Fetch players
-    players = db.query(Player).filter(
-        Player.puzzle_id == puzzle.id
-    ).all()
-
-    # Fetch starting positions
-    start_positions = db.query(Position).filter(
-        Position.puzzle_id == puzzle.id,
-        Position.position_type == "start"
-    ).all()
-
-    start_lookup = {
-        pos.player_id: pos.square_id
-        for pos in start_positions
-    }
-
-    # Fetch locked positions
-    locked_positions = db.query(Position).filter(
-        Position.puzzle_id == puzzle.id,
-        Position.position_type == "locked"
-    ).all()
+    return handlers.get_puzzle(db, puzzle_id, request, response)
 
-    locked_player_ids = {pos.player_id for pos in locked_positions}
-
-    teams = {
-        "A": {
-            "color": puzzle.team_a_color,
-            "players": []
-        },
-        "B": {
-            "color": puzzle.team_b_color,
-            "players": []
-        }
-    }
-
-    for player in players:
-        teams[player.team]["players"].append({
-            "id": player.id,
-            "label": player.label,
-            "start_square": start_lookup.get(player.id),
-            "has_ball": player.id == puzzle.ball_carrier_id,
-            "locked": player.id in locked_player_ids,
-            "indicator": player.indicator
-        })
-
-    return {
-        "id": puzzle.id,
-        "title": puzzle.title,
-        "description": puzzle.description,
-        "team_name": puzzle.team_name,
-        "hint": puzzle.hint,
-        "format": puzzle.format,
-        "mode": puzzle.mode,
-        "grid": {
-            "rows": 9,
-            "cols": 7,
-            "total_squares": 63
-        },
-        "teams": teams
-    }
-
-@router.get("/puzzles/{puzzle_id}/solution")
+@puzzle_router.get("/puzzles/{puzzle_id}/solution")
 def get_puzzle_solution(
     puzzle_id: uuid.UUID,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
 ):
-    puzzle = db.query(Puzzle).filter(
-        Puzzle.id == puzzle_id
-    ).first()
+    return handlers.get_puzzle_solution(db, puzzle_id, request, response)
 
-    if not puzzle:
-        raise HTTPException(status_code=404, detail="Puzzle not found")
-
-    # Fetch players
-    players = db.query(Player).filter(
-        Player.puzzle_id == puzzle.id
-    ).all()
-
-    player_lookup = {p.id: p.label for p in players}
+@puzzle_router.get("/puzzles/{puzzle_id}/stats", response_model=PuzzleStatsOut)
+def get_puzzle_stats(
+    puzzle_id: uuid.UUID,
+    db: Session = Depends(get_db),
+):
+    return handlers.get_puzzle_stats(db, puzzle_id)
 
-    # Fetch solution positions
-    solutions = db.query(Position).filter(
-        Position.puzzle_id == puzzle.id,
-        Position.position_type == "solution"
-    ).all()
+@puzzle_router.get("/puzzles/{puzzle_id}/similar", response_model=list[SimilarPuzzleOut])
+def similar_puzzles(
+    puzzle_id: uuid.UUID,
+    k: int = Query(
+        settings.SIMILAR_PUZZLES_LIMIT,
+        ge=1,
+        le=settings.SIMILAR_PUZZLES_LIMIT_MAX
+    ),
+    max_distance: int | None = Query(None, ge=0),
+    team_name: str | None = None,
+    db: Session = Depends(get_db),
+):
+    refresh_formation_index()
+    return handlers.similar_puzzles(db, puzzle_id, k, max_distance, team_name)
 
-    return [
-        {
-            "player_label": player_lookup[pos.player_id],
-            "square_id": pos.square_id
-        }
-        for pos in solutions
-    ]
+@puzzle_router.post("/puzzles/similar", response_model=list[SimilarPuzzleOut])
+def similar_to_layout(
+    query: LayoutQuery,
+    db: Session = Depends(get_db),
+):
+    refresh_formation_index()
+    return handlers.similar_to_layout(db, query)
 
-@router.post(
+@puzzle_router.post(
     "/puzzles/{puzzle_id}/validate",
     response_model=PuzzleValidationResponse
 )
@@ -224,135 +204,43 @@ def validate_puzzle(
     submission: PuzzleValidationRequest,
     db: Session = Depends(get_db),
 ):
-    puzzle = db.query(Puzzle).filter(
-        Puzzle.id == puzzle_id
-    ).first()
-
-    if not puzzle:
-        raise HTTPException(status_code=404, detail="Puzzle not found")
-
-    # Fetch players
-    players = db.query(Player).filter(
-        Player.puzzle_id == puzzle.id
-    ).all()
-
-    player_lookup = {p.label: p for p in players}
-
-    # Fetch solution positions
-    solutions = db.query(Position).filter(
-        Position.puzzle_id == puzzle.id,
-        Position.position_type == "solution"
-    ).all()
-
-    solution_lookup = {
-        pos.player_id: pos.square_id
-        for pos in solutions
-    }
-
-    # Validate submission players
-    for pos in submission.positions:
-        if pos.player_label not in player_lookup:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Invalid player {pos.player_label}"
-            )
-
-    # Build submission lookup
-    submitted_lookup = {
-        player_lookup[pos.player_label].id: pos.square_id
-        for pos in submission.positions
-    }
-
-    # Check all solution players are present
-    for player_id in solution_lookup:
-        if player_id not in submitted_lookup:
-            return {"correct": False, "feedback": "Not all players have been positioned."}
-
-    # Calculate distances for each player
-    player_feedback_list = []
-    all_correct = True
-    
-    for player_id, correct_square in solution_lookup.items():
-        submitted_square = submitted_lookup[player_id]
-        distance = GRID_4V4.manhattan_distance(submitted_square, correct_square)
-        is_correct = distance == 0
-        
-        if not is_correct:
-            all_correct = False
-        
-        # Find player label for feedback
-        player = next(p for p in players if p.id == player_id)
-        
-        player_feedback_list.append(PlayerFeedback(
-            player_label=player.label,
-            distance=distance,
-            is_correct=is_correct
-        ))
-    
-    # Generate feedback message
-    if all_correct:
-        return {
-            "correct": True,
-            "solution_answer": puzzle.solution_answer,
-            "feedback": "Perfect! All players are in the correct positions.",
-            "player_feedback": player_feedback_list
-        }
-    
-    # Build detailed feedback message
-    incorrect_players = [pf for pf in player_feedback_list if not pf.is_correct]
-    correct_players = [pf for pf in player_feedback_list if pf.is_correct]
-    
-    feedback_parts = []
-    
-    if len(incorrect_players) == 1:
-        pf = incorrect_players[0]
-        team_color = "Red" if pf.player_label.startswith("A") else "Blue"
-        player_num = pf.player_label.replace("A", "").replace("B", "")
-        square_word = "square" if pf.distance == 1 else "squares"
-        feedback_parts.append(f"{team_color} Player {player_num} is {pf.distance} {square_word} from the ideal solution")
-    else:
-        for pf in incorrect_players:
-            team_color = "Red" if pf.player_label.startswith("A") else "Blue"
-            player_num = pf.player_label.replace("A", "").replace("B", "")
-            square_word = "square" if pf.distance == 1 else "squares"
-            feedback_parts.append(f"{team_color} Player {player_num} is {pf.distance} {square_word}")
-    
-    if correct_players and incorrect_players:
-        correct_labels = []
-        for pf in correct_players:
-            team_color = "Red" if pf.player_label.startswith("A") else "Blue"
-            player_num = pf.player_label.replace("A", "").replace("B", "")
-            correct_labels.append(f"{team_color} Player {player_num}")
-        
-        if len(correct_labels) == 1:
-            correct_text = f"{correct_labels[0]} is correct"
-        else:
-            correct_text = f"{', '.join(correct_labels[:-1])} and {correct_labels[-1]} are correct"
-        
-        feedback = f"{correct_text}, but {', and '.join(feedback_parts)} from the ideal solution."
-    else:
-        feedback = f"{', and '.join(feedback_parts)} from the ideal solution."
-    
-    return {
-        "correct": False,
-        "solution_answer": None,
-        "feedback": feedback,
-        "player_feedback": player_feedback_list
-    }
+    solution = get_solution(db, puzzle_id)
+    result = handlers.validate_submission(solution, submission)
+    record_attempt(solution, submission, result)
+    return result
+
+@puzzle_router.post(
+    "/puzzles/validate",
+    response_model=list[BatchValidationResult]
+)
+def validate_puzzles(
+    submissions: list[BatchValidationRequest],
+    db: Session = Depends(get_db),
+):
+    solutions = get_solutions(db, {item.puzzle_id for item in submissions})
+    results = validate_batch(solutions, submissions)
+    record_batch_attempts(solutions, submissions, results)
+    return results
 
-@router.delete("/puzzles/{puzzle_id}")
+@puzzle_router.delete("/puzzles/{puzzle_id}")
 def delete_puzzle(
     puzzle_id: uuid.UUID,
     db: Session = Depends(get_db),
 ):
-    puzzle = db.query(Puzzle).filter(
-        Puzzle.id == puzzle_id
-    ).first()
+    return handlers.delete_puzzle(db, puzzle_id)
+
+@router.get("/cache/solutions")
+def solution_cache_stats():
+    return solution_cache.stats()
 
-    if not puzzle:
-        raise HTTPException(status_code=404, detail="Puzzle not found")
+@router.get("/cache/formations")
+def formation_index_stats():
+    return formation_index.stats()
 
-    db.delete(puzzle)
-    db.commit()
+@router.get("/cache/teams")
+def team_index_stats():
+    return team_index.stats()
 
-    return {"message": "Puzzle deleted successfully"}
+@router.get("/attempts/buffer")
+def attempt_log_stats():
+    return attempt_log.stats()
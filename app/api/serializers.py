@@ -0,0 +1,80 @@
+from app.core.grid import get_grid
+from app.db.models import Puzzle
+from app.db.queries import squares_by_label
+
+
+def puzzle_detail(puzzle: Puzzle) -> dict:
+    """Build the PuzzleDetailOut payload for a puzzle loaded with load_puzzle.
+
+    Keys are in field order and values already have the model's types, so
+    the payload can be sent with prebuilt_json.
+    """
+    grid = get_grid(puzzle.format)
+    # Keyed by label rather than player id, which saves hashing UUIDs
+    start_lookup = squares_by_label(puzzle, "start")
+    locked_labels = squares_by_label(puzzle, "locked")
+    ball_carrier_id = puzzle.ball_carrier_id
+
+    teams = {
+        "A": {
+            "color": puzzle.team_a_color,
+            "players": []
+        },
+        "B": {
+            "color": puzzle.team_b_color,
+            "players": []
+        }
+    }
+
+    for player in puzzle.players:
+        player_id = player.id
+        label = player.label
+        teams[player.team]["players"].append({
+            "id": player_id,
+            "label": label,
+            "start_square": start_lookup.get(label),
+            "has_ball": player_id == ball_carrier_id,
+            "locked": label in locked_labels,
+            "indicator": player.indicator
+        })
+
+    return {
+        "id": puzzle.id,
+        "title": puzzle.title,
+        "description": puzzle.description,
+        "team_name": puzzle.team_name,
+        "hint": puzzle.hint,
+        "format": puzzle.format,
+        "mode": puzzle.mode,
+        "scoring": puzzle.scoring,
+        "grid": {
+            "rows": grid.rows,
+            "cols": grid.cols,
+            "total_squares": grid.total
+        },
+        "teams": teams
+    }
+
+
+def puzzle_summary(puzzle) -> dict:
+    """The PuzzleOut payload for a Puzzle, or a row of queries.SUMMARY_COLUMNS, in field order."""
+    return {
+        "id": puzzle.id,
+        "title": puzzle.title,
+        "description": puzzle.description,
+        "team_name": puzzle.team_name,
+        "hint": puzzle.hint,
+        "format": puzzle.format,
+        "mode": puzzle.mode,
+    }
+
+
+def solution_positions(puzzle: Puzzle) -> list[dict]:
+    """Solution squares for a puzzle; only the puzzle row is needed."""
+    return [
+        {
+            "player_label": label,
+            "square_id": square_id
+        }
+        for label, square_id in squares_by_label(puzzle, "solution").items()
+    ]
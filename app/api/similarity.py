@@ -0,0 +1,58 @@
+import uuid
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.core.similarity import formation_index
+from app.core.teams import normalize_team_name
+from app.db.queries import iter_formations, load_puzzles_by_id
+from app.db.session import SessionLocal
+
+
+def load_formations():
+    """iter_formations on a session of its own, so the index can rebuild off the request."""
+    with SessionLocal() as db:
+        yield from iter_formations(db)
+
+
+def refresh_formation_index() -> None:
+    """Build the formation index if it has never been built, or start a background rebuild if it has expired.
+
+    The first build reads every puzzle on this thread, so async handlers
+    call this through run_in_threadpool.
+    """
+    formation_index.refresh(load_formations)
+
+
+def find_similar(
+    db: Session,
+    format: str,
+    formation: np.ndarray,
+    k: int,
+    max_distance: int | None = None,
+    team_name: str | None = None,
+    exclude: uuid.UUID | None = None,
+) -> list[dict]:
+    """SimilarPuzzleOut payloads for the k puzzles whose start formations are nearest to formation.
+
+    Call refresh_formation_index first.
+    """
+    team_key = normalize_team_name(team_name) if team_name is not None else None
+    matches = formation_index.nearest(format, formation, k, max_distance, team_key, exclude)
+    puzzles = load_puzzles_by_id(db, [puzzle_id for puzzle_id, _ in matches])
+
+    # A puzzle deleted by another process since the last rebuild is skipped
+    return [
+        {
+            "id": puzzle.id,
+            "title": puzzle.title,
+            "description": puzzle.description,
+            "team_name": puzzle.team_name,
+            "hint": puzzle.hint,
+            "format": puzzle.format,
+            "mode": puzzle.mode,
+            "distance": distance,
+        }
+        for puzzle_id, distance in matches
+        if (puzzle := puzzles.get(puzzle_id)) is not None
+    ]
@@ -0,0 +1,23 @@
+from app.core.teams import normalize_team_name, team_index
+from app.db.queries import iter_teams
+from app.db.session import SessionLocal
+
+
+def load_teams():
+    """iter_teams on a session of its own, so the index can rebuild off the request."""
+    with SessionLocal() as db:
+        yield from iter_teams(db)
+
+
+def suggest_teams(prefix: str, limit: int) -> list[dict]:
+    """TeamSuggestionOut payloads for up to limit teams whose normalized name starts with prefix's.
+
+    Rebuilds the team index first if it has expired; otherwise no query is
+    run. A rebuild reads every team on this thread, so async handlers call
+    this through run_in_threadpool.
+    """
+    team_index.refresh(load_teams)
+    return [
+        {"name": name, "puzzles": puzzles}
+        for name, puzzles in team_index.complete(normalize_team_name(prefix), limit)
+    ]
@@ -0,0 +1,298 @@
+import uuid
+from datetime import datetime
+
+import numpy as np
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from app.core.assignment import assigned_distances
+from app.core.board import EMPTY, Board, iter_bits
+from app.core.config import settings
+from app.core.grid import get_grid
+from app.core.packing import pack_slots
+from app.core.solutions import CompiledSolution, compile_solution, solution_cache
+from app.db.attempts import attempt_log
+from app.db.queries import load_scoring_puzzles
+from app.schemas.puzzle import (
+    BatchValidationRequest,
+    PlayerFeedback,
+    PuzzleValidationRequest,
+)
+
+
+def load_solution(db: Session, puzzle_id: uuid.UUID) -> CompiledSolution:
+    """Load and compile a puzzle's solution, and cache it."""
+    puzzles = load_scoring_puzzles(db, [puzzle_id])
+
+    if not puzzles:
+        raise HTTPException(status_code=404, detail="Puzzle not found")
+
+    puzzle = puzzles[0]
+
+    solution = compile_solution(puzzle)
+    solution_cache.put(puzzle_id, solution)
+    return solution
+
+
+def get_solution(db: Session, puzzle_id: uuid.UUID) -> CompiledSolution:
+    """Return the compiled solution for a puzzle, loading it on a cache miss."""
+    return solution_cache.get(puzzle_id) or load_solution(db, puzzle_id)
+
+
+def get_solutions(
+    db: Session,
+    puzzle_ids: set[uuid.UUID],
+) -> dict[uuid.UUID, CompiledSolution]:
+    """Compiled solutions for many puzzles; misses are loaded in one query.
+
+    Puzzles that don't exist are left out of the result.
+    """
+    solutions = {}
+    missing = []
+    for puzzle_id in puzzle_ids:
+        solution = solution_cache.get(puzzle_id)
+        if solution is None:
+            missing.append(puzzle_id)
+        else:
+            solutions[puzzle_id] = solution
+
+    if missing:
+        for puzzle in load_scoring_puzzles(db, missing):
+            solution = compile_solution(puzzle)
+            solution_cache.put(puzzle.id, solution)
+            solutions[puzzle.id] = solution
+
+    return solutions
+
+
+def submission_error(solution: CompiledSolution, submission: PuzzleValidationRequest) -> str | None:
+    """Describe the first submitted position that doesn't fit the puzzle, if any."""
+    grid = get_grid(solution.format)
+    for pos in submission.positions:
+        if pos.player_label not in solution.labels:
+            return f"Invalid player {pos.player_label}"
+        if not grid.is_valid_square(pos.square_id):
+            return f"Invalid square {pos.square_id}"
+        locked_square = solution.locked.square_of(pos.player_label)
+        if locked_square != EMPTY and pos.square_id != locked_square:
+            return f"Player {pos.player_label} is locked"
+    return None
+
+
+def score_submission(solution: CompiledSolution, submission: PuzzleValidationRequest) -> dict:
+    """Score one submission by comparing it with the solution board.
+
+    Same result as score_submissions for "exact" puzzles (checked by
+    tests/test_scoring.py); distances are only looked up for the players
+    that are off their solution square.
+    "assignment" puzzles score each player by the distance to the solution
+    square it is assigned to, so teammates may fill each other's squares.
+    """
+    expected = solution.board
+    submitted = Board.from_squares(
+        expected.grid,
+        {pos.player_label: pos.square_id for pos in submission.positions}
+    )
+
+    # Check all solution players are present
+    if expected.placed & ~submitted.placed:
+        return {"correct": False, "feedback": "Not all players have been positioned."}
+
+    wrong = expected.mismatched(submitted)
+    if solution.scoring == "assignment":
+        # Players already on their own square stay there in some cheapest
+        # assignment (grid distance obeys the triangle inequality), so only
+        # the others need assigning
+        distances = assigned_distances(expected, submitted, wrong)
+    else:
+        distances = {slot: expected.distance(submitted, slot) for slot in iter_bits(wrong)}
+    player_feedback_list = []
+    for slot in iter_bits(expected.placed):
+        distance = distances.get(slot, 0)
+        player_feedback_list.append(PlayerFeedback(
+            player_label=expected.label(slot),
+            distance=distance,
+            is_correct=distance == 0
+        ))
+    return build_validation_response(solution, player_feedback_list)
+
+
+def score_submissions(
+    solution: CompiledSolution,
+    submissions: list[PuzzleValidationRequest],
+) -> list[dict]:
+    """Score many submissions against one solution in a single array pass."""
+    labels = list(solution.squares)
+    correct_squares = np.array([solution.squares[label] for label in labels], dtype=np.int64)
+
+    # One row per submission, one column per solution player; -1 marks a
+    # player that wasn't positioned.
+    submitted = np.full((len(submissions), len(labels)), -1, dtype=np.int64)
+    for row, submission in enumerate(submissions):
+        submitted_lookup = {
+            pos.player_label: pos.square_id
+            for pos in submission.positions
+        }
+        for col, label in enumerate(labels):
+            submitted[row, col] = submitted_lookup.get(label, -1)
+
+    missing = (submitted < 0).any(axis=1)
+    grid = get_grid(solution.format)
+    distances = grid.manhattan_distances(submitted, correct_squares).tolist()
+
+    results = []
+    for row, row_distances in enumerate(distances):
+        # Check all solution players are present
+        if missing[row]:
+            results.append({"correct": False, "feedback": "Not all players have been positioned."})
+            continue
+
+        player_feedback_list = [
+            PlayerFeedback(
+                player_label=label,
+                distance=distance,
+                is_correct=distance == 0
+            )
+            for label, distance in zip(labels, row_distances)
+        ]
+        results.append(build_validation_response(solution, player_feedback_list))
+
+    return results
+
+
+def build_validation_response(
+    solution: CompiledSolution,
+    player_feedback_list: list[PlayerFeedback],
+) -> dict:
+    all_correct = all(pf.is_correct for pf in player_feedback_list)
+
+    # Generate feedback message
+    if all_correct:
+        return {
+            "correct": True,
+            "solution_answer": solution.solution_answer,
+            "feedback": "Perfect! All players are in the correct positions.",
+            "player_feedback": player_feedback_list
+        }
+    
+    # Build detailed feedback message
+    incorrect_players = [pf for pf in player_feedback_list if not pf.is_correct]
+    correct_players = [pf for pf in player_feedback_list if pf.is_correct]
+    
+    feedback_parts = []
+    
+    if len(incorrect_players) == 1:
+        pf = incorrect_players[0]
+        team_color = "Red" if pf.player_label.startswith("A") else "Blue"
+        player_num = pf.player_label.replace("A", "").replace("B", "")
+        square_word = "square" if pf.distance == 1 else "squares"
+        feedback_parts.append(f"{team_color} Player {player_num} is {pf.distance} {square_word} from the ideal solution")
+    else:
+        for pf in incorrect_players:
+            team_color = "Red" if pf.player_label.startswith("A") else "Blue"
+            player_num = pf.player_label.replace("A", "").replace("B", "")
+            square_word = "square" if pf.distance == 1 else "squares"
+            feedback_parts.append(f"{team_color} Player {player_num} is {pf.distance} {square_word}")
+    
+    if correct_players and incorrect_players:
+        correct_labels = []
+        for pf in correct_players:
+            team_color = "Red" if pf.player_label.startswith("A") else "Blue"
+            player_num = pf.player_label.replace("A", "").replace("B", "")
+            correct_labels.append(f"{team_color} Player {player_num}")
+        
+        if len(correct_labels) == 1:
+            correct_text = f"{correct_labels[0]} is correct"
+        else:
+            correct_text = f"{', '.join(correct_labels[:-1])} and {correct_labels[-1]} are correct"
+        
+        feedback = f"{correct_text}, but {', and '.join(feedback_parts)} from the ideal solution."
+    else:
+        feedback = f"{', and '.join(feedback_parts)} from the ideal solution."
+    
+    return {
+        "correct": False,
+        "solution_answer": None,
+        "feedback": feedback,
+        "player_feedback": player_feedback_list
+    }
+
+
+def validate_batch(
+    solutions: dict[uuid.UUID, CompiledSolution],
+    submissions: list[BatchValidationRequest],
+) -> list[dict]:
+    """Score a mixed batch of submissions, grouping them by puzzle.
+
+    Submissions for unknown puzzles or with invalid positions get an error
+    result instead of failing the whole batch.
+    """
+    results: list[dict | None] = [None] * len(submissions)
+    by_puzzle: dict[uuid.UUID, list[int]] = {}
+
+    for index, item in enumerate(submissions):
+        solution = solutions.get(item.puzzle_id)
+        if solution is None:
+            results[index] = {
+                "puzzle_id": item.puzzle_id,
+                "status_code": 404,
+                "detail": "Puzzle not found",
+            }
+            continue
+        error = submission_error(solution, item)
+        if error is not None:
+            results[index] = {
+                "puzzle_id": item.puzzle_id,
+                "status_code": 400,
+                "detail": error,
+            }
+            continue
+        by_puzzle.setdefault(item.puzzle_id, []).append(index)
+
+    for puzzle_id, indexes in by_puzzle.items():
+        solution = solutions[puzzle_id]
+        if solution.scoring == "assignment":
+            scored = [score_submission(solution, submissions[index]) for index in indexes]
+        else:
+            scored = score_submissions(solution, [submissions[index] for index in indexes])
+        for index, result in zip(indexes, scored):
+            results[index] = {
+                "puzzle_id": puzzle_id,
+                "status_code": 200,
+                "result": result,
+            }
+
+    return results
+
+
+def record_attempt(
+    solution: CompiledSolution,
+    submission: PuzzleValidationRequest,
+    result: dict,
+) -> None:
+    """Queue a scored submission for the attempts log."""
+    if not settings.ATTEMPT_LOG_ENABLED:
+        return
+    grid = get_grid(solution.format)
+    attempt_log.record({
+        "id": uuid.uuid4(),
+        "puzzle_id": solution.puzzle_id,
+        "user_id": submission.user_id,
+        "team_name": solution.team_name,
+        "format": solution.format,
+        "squares_packed": pack_slots(grid, {pos.player_label: pos.square_id for pos in submission.positions}),
+        "distances_packed": pack_slots(grid, {pf.player_label: pf.distance for pf in result.get("player_feedback", [])}),
+        "correct": result["correct"],
+        "created_at": datetime.utcnow(),
+    })
+
+
+def record_batch_attempts(
+    solutions: dict[uuid.UUID, CompiledSolution],
+    submissions: list[BatchValidationRequest],
+    results: list[dict],
+) -> None:
+    """record_attempt for every submission in a batch that was scored."""
+    for item, result in zip(submissions, results):
+        if result["status_code"] == 200:
+            record_attempt(solutions[item.puzzle_id], item, result["result"])
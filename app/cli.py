@@ -0,0 +1,200 @@
+"""Command-line tools for managing the puzzle library.
+
+Usage:
+    python -m app.cli import-puzzles puzzles.ndjson
+    python -m app.cli export-puzzles --team "Eagles U12" -o puzzles.ndjson
+    python -m app.cli fingerprint-puzzles
+    python -m app.cli generate-puzzles --team "Academy" --count 100000 --workers 8
+    python -m app.cli rebuild-stats
+    python -m app.cli migrate
+"""
+import argparse
+import json
+import os
+import sys
+
+from app.core.config import settings
+from app.db import queries
+from app.db.bulk import PuzzleImporter, backfill_fingerprints, insert_puzzle_rows, iter_export
+from app.db.generate import GenerationReport, generate_library
+from app.db.session import SessionLocal
+from app.db.stats import rebuild_stats
+
+
+def import_puzzles(args: argparse.Namespace) -> int:
+    source = sys.stdin if args.path == "-" else open(args.path, encoding="utf-8")
+    db = SessionLocal()
+    try:
+        importer = PuzzleImporter(db, batch_size=args.batch_size)
+        for line_no, line in enumerate(source, start=1):
+            if importer.feed(line_no, line):
+                importer.flush()
+                print(f"imported {importer.report.imported} puzzles", file=sys.stderr)
+        importer.flush()
+    finally:
+        db.close()
+        if source is not sys.stdin:
+            source.close()
+
+    report = importer.report
+    print(json.dumps({
+        "imported": report.imported,
+        "failed": report.failed,
+        "errors": report.errors,
+    }, indent=2))
+    return 1 if report.failed else 0
+
+
+def export_puzzles(args: argparse.Namespace) -> int:
+    target = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    db = SessionLocal()
+    try:
+        for line in iter_export(db, args.team, batch_size=args.batch_size):
+            target.write(line)
+    finally:
+        db.close()
+        if target is not sys.stdout:
+            target.close()
+    return 0
+
+
+def fingerprint_puzzles(args: argparse.Namespace) -> int:
+    db = SessionLocal()
+    total = 0
+    try:
+        for count in backfill_fingerprints(db, batch_size=args.batch_size):
+            total += count
+            print(f"fingerprinted {total} puzzles", file=sys.stderr)
+    finally:
+        db.close()
+    print(json.dumps({"fingerprinted": total}))
+    return 0
+
+
+def rebuild_attempt_stats(args: argparse.Namespace) -> int:
+    db = SessionLocal()
+    total = 0
+    try:
+        for count in rebuild_stats(db, batch_size=args.batch_size):
+            total += count
+            print(f"applied {total} attempts", file=sys.stderr)
+    finally:
+        db.close()
+    print(json.dumps({"attempts": total}))
+    return 0
+
+
+def migrate_database(args: argparse.Namespace) -> int:
+    from app.db import session
+    from app.db.engine import migrate
+
+    migrate(session.engine)
+    return 0
+
+
+def generate_puzzles(args: argparse.Namespace) -> int:
+    report = GenerationReport()
+    modes = tuple(args.modes.split(","))
+
+    def progress():
+        stats = report.as_dict()
+        print(f"generated {stats['generated']} puzzles ({stats['puzzles_per_second']}/s)", file=sys.stderr)
+
+    if args.output:
+        # Written as PuzzleImport documents, ready for import-puzzles
+        target = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+        try:
+            for n, puzzle in enumerate(generate_library(
+                args.count, args.team, args.seed, args.workers, args.chunk_size, modes, report=report
+            ), start=1):
+                target.write(json.dumps(puzzle.document) + "\n")
+                if n % args.batch_size == 0:
+                    progress()
+        finally:
+            if target is not sys.stdout:
+                target.close()
+    else:
+        db = SessionLocal()
+        try:
+            batch = []
+            for puzzle in generate_library(
+                args.count, args.team, args.seed, args.workers, args.chunk_size, modes,
+                known_fingerprints=queries.team_fingerprints(db, args.team),
+                report=report,
+            ):
+                batch.append(puzzle.rows)
+                if len(batch) == args.batch_size:
+                    insert_puzzle_rows(db, batch)
+                    db.commit()
+                    batch = []
+                    progress()
+            insert_puzzle_rows(db, batch)
+            db.commit()
+        finally:
+            db.close()
+
+    print(json.dumps(report.as_dict(), indent=2))
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    import_cmd = commands.add_parser(
+        "import-puzzles",
+        help="Bulk import newline-delimited PuzzleCreate documents"
+    )
+    import_cmd.add_argument("path", help="NDJSON file, or - for stdin")
+    import_cmd.add_argument("--batch-size", type=int, default=settings.IMPORT_BATCH_SIZE)
+    import_cmd.set_defaults(func=import_puzzles)
+
+    export_cmd = commands.add_parser(
+        "export-puzzles",
+        help="Stream puzzles as NDJSON in the import-puzzles format"
+    )
+    export_cmd.add_argument("--team", help="Only export this team's puzzles")
+    export_cmd.add_argument("-o", "--output", default="-", help="Output file, or - for stdout")
+    export_cmd.add_argument("--batch-size", type=int, default=settings.EXPORT_BATCH_SIZE)
+    export_cmd.set_defaults(func=export_puzzles)
+
+    fingerprint_cmd = commands.add_parser(
+        "fingerprint-puzzles",
+        help="Fill in duplicate-detection fingerprints for puzzles that have none or an outdated one"
+    )
+    fingerprint_cmd.add_argument("--batch-size", type=int, default=settings.EXPORT_BATCH_SIZE)
+    fingerprint_cmd.set_defaults(func=fingerprint_puzzles)
+
+    generate_cmd = commands.add_parser(
+        "generate-puzzles",
+        help="Generate distinct 4v4 puzzles from rule templates and insert them (or write NDJSON)"
+    )
+    generate_cmd.add_argument("--team", required=True, help="Team library to generate into")
+    generate_cmd.add_argument("--count", type=int, required=True)
+    generate_cmd.add_argument("--seed", type=int, default=0)
+    generate_cmd.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    generate_cmd.add_argument("--modes", default="attacking,defending", help="Comma-separated puzzle modes")
+    generate_cmd.add_argument("--chunk-size", type=int, default=500, help="Puzzles per worker task")
+    generate_cmd.add_argument("-o", "--output", help="Write NDJSON here (- for stdout) instead of inserting")
+    generate_cmd.add_argument("--batch-size", type=int, default=settings.IMPORT_BATCH_SIZE)
+    generate_cmd.set_defaults(func=generate_puzzles)
+
+    stats_cmd = commands.add_parser(
+        "rebuild-stats",
+        help="Recompute the puzzle and team stats tables from the attempts log"
+    )
+    stats_cmd.add_argument("--batch-size", type=int, default=5000)
+    stats_cmd.set_defaults(func=rebuild_attempt_stats)
+
+    migrate_cmd = commands.add_parser(
+        "migrate",
+        help="Upgrade the database to the latest revision; a new SQLite database is created from the models"
+    )
+    migrate_cmd.set_defaults(func=migrate_database)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
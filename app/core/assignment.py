@@ -0,0 +1,87 @@
+"""Minimum-cost assignment for label-agnostic scoring.
+
+Teams have at most 11 players, so the O(n^3) Hungarian method in plain
+Python finishes in well under a millisecond. Pulling in scipy for this
+isn't worth it.
+"""
+from typing import Sequence
+
+from app.core.board import Board, iter_bits
+
+
+def min_cost_assignment(costs: Sequence[Sequence[int]]) -> list[int]:
+    """Column assigned to each row of a square cost matrix, minimising the total.
+
+    Hungarian method with row and column potentials (the shortest
+    augmenting path form), O(n^3).
+    """
+    n = len(costs)
+    inf = float("inf")
+    # 1-indexed; column 0 is a virtual column used to start each augmenting path
+    u = [0] * (n + 1)
+    v = [0] * (n + 1)
+    row_of = [0] * (n + 1)
+    way = [0] * (n + 1)
+    for row in range(1, n + 1):
+        row_of[0] = row
+        col = 0
+        min_to = [inf] * (n + 1)
+        used = [False] * (n + 1)
+        while row_of[col]:
+            used[col] = True
+            r = row_of[col]
+            delta = inf
+            next_col = 0
+            for c in range(1, n + 1):
+                if used[c]:
+                    continue
+                reduced = costs[r - 1][c - 1] - u[r] - v[c]
+                if reduced < min_to[c]:
+                    min_to[c] = reduced
+                    way[c] = col
+                if min_to[c] < delta:
+                    delta = min_to[c]
+                    next_col = c
+            for c in range(n + 1):
+                if used[c]:
+                    u[row_of[c]] += delta
+                    v[c] -= delta
+                else:
+                    min_to[c] -= delta
+            col = next_col
+        # Flip the augmenting path back to the virtual column
+        while col:
+            prev = way[col]
+            row_of[col] = row_of[prev]
+            col = prev
+
+    assignment = [0] * n
+    for col in range(1, n + 1):
+        assignment[row_of[col] - 1] = col - 1
+    return assignment
+
+
+def assigned_distances(expected: Board, submitted: Board, slots: int) -> dict[int, int]:
+    """Distance from each slot's submitted square to the solution square it fills.
+
+    The solution squares of the slots in the slot mask are shared out among
+    the same slots' submitted squares, separately for each team, so that the
+    summed distance is as small as possible. Two players of a team swapping
+    squares therefore both score 0. Every slot in the mask must be placed
+    on both boards.
+    """
+    team_size = expected.grid.players_per_team
+    team_mask = (1 << team_size) - 1
+    table = expected.grid.distances
+    distances = {}
+    for team_slots in (slots & team_mask, slots & (team_mask << team_size)):
+        members = list(iter_bits(team_slots))
+        if not members:
+            continue
+        costs = [
+            [int(table[submitted.squares[player], expected.squares[target]]) for target in members]
+            for player in members
+        ]
+        for row, target in enumerate(min_cost_assignment(costs)):
+            distances[members[row]] = costs[row][target]
+    return distances
@@ -0,0 +1,139 @@
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Iterator, Mapping, Sequence
+
+from app.core.grid import GridConfig
+from app.core.packing import EMPTY as PACKED_EMPTY, PHASE_INDEX, slot_labels, unpack_positions
+
+# Square of a player slot with no position
+EMPTY = -1
+
+
+@lru_cache(maxsize=None)
+def slot_names(grid: GridConfig) -> tuple[str, ...]:
+    return tuple(slot_labels(grid))
+
+
+@lru_cache(maxsize=None)
+def slot_index(grid: GridConfig) -> dict[str, int]:
+    """Map player label -> slot, in slot_labels order."""
+    return {label: slot for slot, label in enumerate(slot_names(grid))}
+
+
+def iter_bits(mask: int) -> Iterator[int]:
+    """Indexes of the set bits in mask, lowest first."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+@dataclass(frozen=True)
+class Board:
+    """Where each player slot stands on a grid, as a few integers.
+
+    squares has one square id per slot (A1..An, then B1..Bn), EMPTY for a
+    player without a position. team_a and team_b are bitboards with bit s
+    set when one of the team's players stands on square s; placed has bit
+    i set when slot i has a square, and collisions has bit s set when more
+    than one player stands on square s. Python ints are unbounded, so the
+    larger grids work the same way as the 64-square 4v4 one.
+
+    Boards are immutable and hashable, so they can key dicts and sets.
+    """
+    grid: GridConfig
+    squares: tuple[int, ...]
+    team_a: int
+    team_b: int
+    placed: int
+    collisions: int
+
+    @classmethod
+    def from_slots(cls, grid: GridConfig, squares: Sequence[int]) -> "Board":
+        team_size = grid.players_per_team
+        team_a = team_b = placed = collisions = 0
+        for slot, square in enumerate(squares):
+            if square == EMPTY:
+                continue
+            bit = 1 << square
+            if (team_a | team_b) & bit:
+                collisions |= bit
+            if slot < team_size:
+                team_a |= bit
+            else:
+                team_b |= bit
+            placed |= 1 << slot
+        return cls(grid, tuple(squares), team_a, team_b, placed, collisions)
+
+    @classmethod
+    def from_squares(cls, grid: GridConfig, squares: Mapping[str, int]) -> "Board":
+        """Build a board from {player label: square id}.
+
+        Raises ValueError for a label that isn't in the grid's format.
+        """
+        slots = slot_index(grid)
+        values = [EMPTY] * len(slots)
+        for label, square in squares.items():
+            if label not in slots:
+                raise ValueError(f"Invalid player {label}")
+            values[slots[label]] = square
+        return cls.from_slots(grid, values)
+
+    @classmethod
+    def from_packed(cls, grid: GridConfig, data: bytes, phase: str) -> "Board":
+        """Build a board from one phase of a value from pack_positions."""
+        row = unpack_positions(grid, data)[PHASE_INDEX[phase]].tolist()
+        return cls.from_slots(grid, [EMPTY if square == PACKED_EMPTY else square for square in row])
+
+    @property
+    def occupied(self) -> int:
+        """Bitboard of squares with at least one player."""
+        return self.team_a | self.team_b
+
+    def is_occupied(self, square: int) -> bool:
+        return bool(self.occupied >> square & 1)
+
+    def square_of(self, label: str) -> int:
+        """The square of a player, or EMPTY."""
+        return self.squares[slot_index(self.grid)[label]]
+
+    def label(self, slot: int) -> str:
+        return slot_names(self.grid)[slot]
+
+    def labels(self, slots: int) -> list[str]:
+        """Labels of the slots set in a slot mask, in slot order."""
+        return [self.label(slot) for slot in iter_bits(slots)]
+
+    def to_dict(self, slots: int | None = None) -> dict[str, int]:
+        """{player label: square id} for the placed slots, or just those in a slot mask."""
+        mask = self.placed if slots is None else self.placed & slots
+        return {self.label(slot): self.squares[slot] for slot in iter_bits(mask)}
+
+    def moved(self, moves: "Board") -> "Board":
+        """This board with the players placed on moves moved to their squares there."""
+        return Board.from_slots(self.grid, [
+            square if move == EMPTY else move
+            for square, move in zip(self.squares, moves.squares)
+        ])
+
+    def mirrored(self) -> "Board":
+        """This board reflected left to right across the pitch."""
+        cols = self.grid.cols
+        # Square ids are 1-indexed: column (square - 1) % cols moves to
+        # cols - 1 - column, within the same row
+        return Board.from_slots(self.grid, [
+            square if square == EMPTY else square + cols - 1 - 2 * ((square - 1) % cols)
+            for square in self.squares
+        ])
+
+    def mismatched(self, other: "Board") -> int:
+        """Slot mask of players placed here who stand somewhere else, or nowhere, on other."""
+        mask = 0
+        for slot in iter_bits(self.placed):
+            if self.squares[slot] != other.squares[slot]:
+                mask |= 1 << slot
+        return mask
+
+    def distance(self, other: "Board", slot: int) -> int:
+        """Manhattan distance between a slot's squares on the two boards."""
+        return int(self.grid.distances[self.squares[slot], other.squares[slot]])
@@ -10,3 +10,83 @@ except ImportError:
 # Get environment variables - Railway/Render will inject these directly
 DATABASE_URL = os.environ.get("DATABASE_URL", "postgresql+psycopg://michaelhodge@localhost:5432/ssp")
 FRONTEND_URL = os.environ.get("FRONTEND_URL", "http://localhost:5173")
+
+# Compiled-solution cache used by validate_puzzle. Deletes only invalidate
+# the deleting process's cache, so other workers can keep scoring a deleted
+# puzzle for up to SOLUTION_CACHE_TTL seconds.
+SOLUTION_CACHE_SIZE = int(os.environ.get("SOLUTION_CACHE_SIZE", "1024"))
+SOLUTION_CACHE_TTL = float(os.environ.get("SOLUTION_CACHE_TTL", "60"))
+
+# Keyset pagination for GET /puzzles
+PUZZLE_PAGE_SIZE = int(os.environ.get("PUZZLE_PAGE_SIZE", "50"))
+PUZZLE_PAGE_SIZE_MAX = int(os.environ.get("PUZZLE_PAGE_SIZE_MAX", "200"))
+
+# Cache-Control max-age for GET /puzzles/{id} and /solution; puzzles are
+# immutable, so clients revalidate with If-None-Match once it expires
+PUZZLE_CACHE_MAX_AGE = int(os.environ.get("PUZZLE_CACHE_MAX_AGE", "3600"))
+
+# Send get_puzzle and list_puzzles payloads, which are built in their
+# response models' shape, through orjson without revalidating them
+FAST_JSON_RESPONSES = os.environ.get("FAST_JSON_RESPONSES", "true").lower() in ("1", "true", "yes")
+
+# Also write one positions row per square, alongside Puzzle.positions_packed,
+# for consumers that still read the legacy table
+WRITE_LEGACY_POSITIONS = os.environ.get("WRITE_LEGACY_POSITIONS", "false").lower() in ("1", "true", "yes")
+
+# Reject a new puzzle (409) when the team already has the same scenario,
+# or its left-right mirror image
+REJECT_DUPLICATE_PUZZLES = os.environ.get("REJECT_DUPLICATE_PUZZLES", "true").lower() in ("1", "true", "yes")
+
+# Similar-puzzle search: seconds before the in-memory formation index is
+# rebuilt from the database, and the default and maximum results per query
+SIMILARITY_INDEX_TTL = float(os.environ.get("SIMILARITY_INDEX_TTL", "300"))
+SIMILAR_PUZZLES_LIMIT = int(os.environ.get("SIMILAR_PUZZLES_LIMIT", "10"))
+SIMILAR_PUZZLES_LIMIT_MAX = int(os.environ.get("SIMILAR_PUZZLES_LIMIT_MAX", "100"))
+
+# Write-behind log of validation attempts: rows are inserted in batches of
+# ATTEMPT_LOG_BATCH_SIZE, or every ATTEMPT_LOG_FLUSH_INTERVAL seconds. Once
+# ATTEMPT_LOG_MAX_PENDING rows are waiting, new attempts are dropped in lossy
+# mode; otherwise the request waits for the next flush.
+ATTEMPT_LOG_ENABLED = os.environ.get("ATTEMPT_LOG_ENABLED", "true").lower() in ("1", "true", "yes")
+ATTEMPT_LOG_BATCH_SIZE = int(os.environ.get("ATTEMPT_LOG_BATCH_SIZE", "500"))
+ATTEMPT_LOG_FLUSH_INTERVAL = float(os.environ.get("ATTEMPT_LOG_FLUSH_INTERVAL", "1.0"))
+ATTEMPT_LOG_MAX_PENDING = int(os.environ.get("ATTEMPT_LOG_MAX_PENDING", "10000"))
+ATTEMPT_LOG_LOSSY = os.environ.get("ATTEMPT_LOG_LOSSY", "false").lower() in ("1", "true", "yes")
+
+# Leaderboard entries returned by GET /teams/{team_name}/stats, by default
+# and at most
+LEADERBOARD_LIMIT = int(os.environ.get("LEADERBOARD_LIMIT", "10"))
+LEADERBOARD_LIMIT_MAX = int(os.environ.get("LEADERBOARD_LIMIT_MAX", "100"))
+
+# Team-name autocomplete (GET /teams): seconds before the in-memory index is
+# rebuilt from the teams table, and the default and maximum suggestions
+TEAM_INDEX_TTL = float(os.environ.get("TEAM_INDEX_TTL", "300"))
+TEAM_SUGGESTIONS_LIMIT = int(os.environ.get("TEAM_SUGGESTIONS_LIMIT", "10"))
+TEAM_SUGGESTIONS_LIMIT_MAX = int(os.environ.get("TEAM_SUGGESTIONS_LIMIT_MAX", "50"))
+
+# Bulk NDJSON import and export
+IMPORT_BATCH_SIZE = int(os.environ.get("IMPORT_BATCH_SIZE", "500"))
+EXPORT_BATCH_SIZE = int(os.environ.get("EXPORT_BATCH_SIZE", "500"))
+
+# Serve the puzzle endpoints from AsyncSession handlers (app.api.async_routes)
+DB_ASYNC = os.environ.get("DB_ASYNC", "false").lower() in ("1", "true", "yes")
+
+# Database engine and connection pool
+DB_ECHO = os.environ.get("DB_ECHO", "false").lower() in ("1", "true", "yes")
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", "30"))
+DB_POOL_PRE_PING = os.environ.get("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+# Seconds before a pooled connection is replaced; -1 keeps connections forever
+DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", "1800"))
+# Postgres statement_timeout in milliseconds; 0 disables it
+DB_STATEMENT_TIMEOUT_MS = int(os.environ.get("DB_STATEMENT_TIMEOUT_MS", "0"))
+# Seconds a SQLite connection waits for another writer's lock
+DB_SQLITE_BUSY_TIMEOUT = float(os.environ.get("DB_SQLITE_BUSY_TIMEOUT", "5"))
+
+# Request metrics middleware and GET /metrics (Prometheus text format)
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Record every statement with its call site and summarise it in the
+# X-Query-Count / X-Query-Profile response headers. Debugging only.
+QUERY_PROFILING = os.environ.get("QUERY_PROFILING", "false").lower() in ("1", "true", "yes")
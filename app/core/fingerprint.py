@@ -0,0 +1,41 @@
+import hashlib
+
+from app.core.board import Board
+from app.core.grid import get_grid
+
+# Part of the hashed form, so changing what goes into a fingerprint can't
+# make old and new fingerprints collide. Stored next to each fingerprint;
+# `python -m app.cli fingerprint-puzzles` recomputes older versions.
+# Version 1 mirrored squares as if they were 0-indexed.
+FINGERPRINT_VERSION = 2
+
+
+def canonical_form(format: str, mode: str, ball_carrier_label: str | None, start: Board, solution: Board) -> bytes:
+    squares = ",".join(str(square) for square in (*start.squares, *solution.squares))
+    return f"{FINGERPRINT_VERSION}|{format}|{mode}|{ball_carrier_label}|{squares}".encode()
+
+
+def puzzle_fingerprint(format: str, mode: str, ball_carrier_label: str | None, start: Board, solution: Board) -> str:
+    """Hex SHA-256 identifying a puzzle's scenario up to a left-right mirror.
+
+    Covers the format, mode, ball carrier and start and solution squares.
+    A puzzle and its mirror image hash the smaller of their two canonical
+    forms, so they get the same fingerprint.
+    """
+    forms = (
+        canonical_form(format, mode, ball_carrier_label, start, solution),
+        canonical_form(format, mode, ball_carrier_label, start.mirrored(), solution.mirrored()),
+    )
+    return hashlib.sha256(min(forms)).hexdigest()
+
+
+def fingerprint_puzzle(puzzle) -> str:
+    """puzzle_fingerprint for a stored puzzle loaded with its ball carrier."""
+    grid = get_grid(puzzle.format)
+    return puzzle_fingerprint(
+        puzzle.format,
+        puzzle.mode,
+        puzzle.ball_carrier.label if puzzle.ball_carrier else None,
+        Board.from_packed(grid, puzzle.positions_packed, "start"),
+        Board.from_packed(grid, puzzle.positions_packed, "solution"),
+    )
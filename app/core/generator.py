@@ -0,0 +1,246 @@
+"""Rule-based procedural 4v4 puzzles.
+
+A start formation is a base team shape moved to a random spot in the
+team's half and jittered a square at a time. A template then applies one
+coaching rule to it to get the solution moves. Team A has the ball and
+attacks towards the last row. In attacking puzzles team A's players
+move; in defending puzzles team B's players move.
+
+Squares are 1-indexed, row by row, as the frontend sends them; x and y
+are 0-indexed columns and rows.
+"""
+import random
+from dataclasses import dataclass
+from typing import Callable
+
+from app.core.grid import GridConfig, get_grid
+from app.schemas.puzzle import PuzzleCreate
+
+FORMAT = "4v4"
+
+# Offsets from a team's centre, one per player
+BASE_SHAPES = {
+    "diamond": [(0, -1), (-2, 0), (2, 0), (0, 1)],
+    "box": [(-1, -1), (1, -1), (-1, 1), (1, 1)],
+    "line": [(-3, 0), (-1, 0), (1, 0), (3, 0)],
+    "y": [(-2, -1), (2, -1), (0, 0), (0, 1)],
+}
+
+# Chance that one player who doesn't move in the solution is locked
+LOCK_PROBABILITY = 0.25
+
+Squares = dict[str, int]
+
+
+def to_square(grid: GridConfig, x: int, y: int) -> int | None:
+    if 0 <= x < grid.cols and 0 <= y < grid.rows:
+        return y * grid.cols + x + 1
+    return None
+
+
+def to_xy(grid: GridConfig, square: int) -> tuple[int, int]:
+    y, x = divmod(square - 1, grid.cols)
+    return x, y
+
+
+def team_labels(grid: GridConfig, team: str) -> list[str]:
+    return [f"{team}{i}" for i in range(1, grid.players_per_team + 1)]
+
+
+def place_team(rng: random.Random, grid: GridConfig, team: str, rows: range, taken: set[int]) -> Squares | None:
+    """A jittered base shape whose centre row is in rows, avoiding taken squares."""
+    shape = BASE_SHAPES[rng.choice(sorted(BASE_SHAPES))]
+    xs = [dx for dx, _ in shape]
+    ys = [dy for _, dy in shape]
+    cx = rng.randrange(-min(xs), grid.cols - max(xs))
+    cy = rng.randrange(max(rows.start, -min(ys)), min(rows.stop, grid.rows - max(ys)))
+    squares = {}
+    for label, (dx, dy) in zip(team_labels(grid, team), shape):
+        jittered = to_square(grid, cx + dx + rng.choice((-1, 0, 0, 1)), cy + dy + rng.choice((-1, 0, 0, 1)))
+        # Fall back to the unjittered spot when the jitter leaves the pitch or lands on a player
+        for square in (jittered, to_square(grid, cx + dx, cy + dy)):
+            if square is not None and square not in taken:
+                break
+        else:
+            return None
+        taken.add(square)
+        squares[label] = square
+    return squares
+
+
+def random_formation(rng: random.Random, grid: GridConfig) -> Squares | None:
+    """Team A in the upper half and team B below it, or None if the shapes didn't fit."""
+    taken = set()
+    half = grid.rows // 2
+    team_a = place_team(rng, grid, "A", range(1, half), taken)
+    team_b = team_a and place_team(rng, grid, "B", range(half, grid.rows - 1), taken)
+    if not team_b:
+        return None
+    return {**team_a, **team_b}
+
+
+def nearest(grid: GridConfig, start: Squares, labels: list[str], square: int) -> list[str]:
+    """labels ordered by Manhattan distance from square, closest first."""
+    x, y = to_xy(grid, square)
+
+    def distance(label):
+        px, py = to_xy(grid, start[label])
+        return abs(px - x) + abs(py - y)
+
+    return sorted(labels, key=lambda label: (distance(label), label))
+
+
+def free(start: Squares, square: int | None) -> bool:
+    return square is not None and square not in start.values()
+
+
+@dataclass(frozen=True)
+class Template:
+    name: str
+    mode: str
+    title: str
+    hint: str
+    # (rng, grid, start squares, ball carrier) -> solution moves, or None
+    # when the rule doesn't apply to this formation
+    solve: Callable[[random.Random, GridConfig, Squares, str], Squares | None]
+
+
+def support(rng, grid, start, carrier):
+    cx, cy = to_xy(grid, start[carrier])
+    targets = [to_square(grid, cx + dx, cy + 1) for dx in (-1, 1)]
+    targets = [square for square in targets if free(start, square)]
+    if not targets:
+        return None
+    helpers = [label for label in team_labels(grid, "A") if label != carrier]
+    return {nearest(grid, start, helpers, start[carrier])[0]: rng.choice(targets)}
+
+
+def width(rng, grid, start, carrier):
+    cx, cy = to_xy(grid, start[carrier])
+    defenders_left = sum(to_xy(grid, start[label])[0] < grid.cols // 2 for label in team_labels(grid, "B"))
+    column = 0 if defenders_left <= grid.players_per_team // 2 else grid.cols - 1
+    targets = [to_square(grid, column, cy + dy) for dy in (0, 1)]
+    targets = [square for square in targets if free(start, square)]
+    if not targets:
+        return None
+    runners = [label for label in team_labels(grid, "A") if label != carrier]
+    return {nearest(grid, start, runners, targets[0])[0]: rng.choice(targets)}
+
+
+def run_in_behind(rng, grid, start, carrier):
+    deepest = max(to_xy(grid, start[label])[1] for label in team_labels(grid, "B"))
+    runners = [label for label in team_labels(grid, "A") if label != carrier]
+    runner = max(runners, key=lambda label: (to_xy(grid, start[label])[1], label))
+    rx, _ = to_xy(grid, start[runner])
+    targets = [to_square(grid, rx + dx, deepest + 1) for dx in (-1, 0, 1)]
+    targets = [square for square in targets if free(start, square)]
+    if not targets:
+        return None
+    return {runner: rng.choice(targets)}
+
+
+def press(rng, grid, start, carrier):
+    cx, cy = to_xy(grid, start[carrier])
+    targets = [to_square(grid, cx + dx, cy + 1) for dx in (0, -1, 1)]
+    targets = [square for square in targets if free(start, square)]
+    if not targets:
+        return None
+    presser = nearest(grid, start, team_labels(grid, "B"), start[carrier])[0]
+    return {presser: targets[0]}
+
+
+def cover(rng, grid, start, carrier):
+    moves = press(rng, grid, start, carrier)
+    if moves is None:
+        return None
+    cx, cy = to_xy(grid, start[carrier])
+    (presser, press_square), = moves.items()
+    targets = [to_square(grid, cx + dx, cy + 2) for dx in (0, -1, 1)]
+    targets = [square for square in targets if free(start, square) and square != press_square]
+    if not targets:
+        return None
+    defenders = [label for label in team_labels(grid, "B") if label != presser]
+    moves[nearest(grid, start, defenders, targets[0])[0]] = targets[0]
+    return moves
+
+
+def compact(rng, grid, start, carrier):
+    cx, _ = to_xy(grid, start[carrier])
+    defenders = team_labels(grid, "B")
+    widest = sorted(defenders, key=lambda label: (-abs(to_xy(grid, start[label])[0] - cx), label))[:2]
+    moves = {}
+    for label in widest:
+        x, y = to_xy(grid, start[label])
+        if x == cx:
+            continue
+        step = 1 if x < cx else -1
+        moves[label] = to_square(grid, x + step, y)
+    return moves or None
+
+
+TEMPLATES = [
+    Template("support", "attacking", "Support the ball carrier",
+             "Give the ball carrier a passing option diagonally ahead.", support),
+    Template("width", "attacking", "Stretch the defence",
+             "Use the full width of the pitch on the side with fewer defenders.", width),
+    Template("run-in-behind", "attacking", "Run in behind",
+             "Attack the space behind the last defender.", run_in_behind),
+    Template("press", "defending", "Press the ball",
+             "The nearest defender closes down the ball on the goal side.", press),
+    Template("cover", "defending", "Press and cover",
+             "One defender presses while a second covers behind.", cover),
+    Template("compact", "defending", "Stay compact",
+             "Squeeze the space around the ball from the outside in.", compact),
+]
+
+
+def generate_puzzle(
+    rng: random.Random,
+    team_name: str,
+    modes: tuple[str, ...] = ("attacking", "defending"),
+) -> PuzzleCreate | None:
+    """One puzzle drawn from rng, or None if this draw didn't produce one.
+
+    Placement rules (overlaps, locked players) are checked by
+    build_puzzle_rows, not here.
+    """
+    grid = get_grid(FORMAT)
+    template = rng.choice([template for template in TEMPLATES if template.mode in modes])
+    start = random_formation(rng, grid)
+    if start is None:
+        return None
+    carrier = rng.choice(team_labels(grid, "A"))
+    moves = template.solve(rng, grid, start, carrier)
+    if not moves:
+        return None
+    moves = {label: square for label, square in moves.items() if square is not None and square != start[label]}
+    if not moves:
+        return None
+
+    solving_team = "A" if template.mode == "attacking" else "B"
+    other_team = "B" if solving_team == "A" else "A"
+    locked = []
+    if rng.random() < LOCK_PROBABILITY:
+        label = rng.choice(team_labels(grid, other_team))
+        locked.append({"player_label": label, "square_id": start[label]})
+
+    return PuzzleCreate(
+        title=template.title,
+        description=f"Generated from the {template.name} template.",
+        team_name=team_name,
+        hint=template.hint,
+        format=FORMAT,
+        mode=template.mode,
+        team_a_color="#ff0000",
+        team_b_color="#0000ff",
+        ball_carrier_label=carrier,
+        starting_positions=[
+            {"player_label": label, "square_id": square}
+            for label, square in start.items()
+        ],
+        solution_positions=[
+            {"player_label": label, "square_id": square}
+            for label, square in moves.items()
+        ],
+        locked_positions=locked,
+    )
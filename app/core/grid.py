@@ -1,14 +1,38 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+
+import numpy as np
 
 @dataclass(frozen=True)
 class GridConfig:
     cols: int = 7
     rows: int = 9
+    players_per_team: int = 4
+
+    # Lookup tables indexed by square id, built once in __post_init__.
+    # Square ids are 1-indexed, so row 0 is unused.
+    coords: np.ndarray = field(init=False, repr=False, compare=False)
+    distances: np.ndarray = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        square_ids = np.arange(self.total + 1)
+        coords = np.stack(
+            [(square_ids - 1) % self.cols, (square_ids - 1) // self.cols],
+            axis=1,
+        ).astype(np.int32)
+        distances = np.abs(coords[:, None, :] - coords[None, :, :]).sum(axis=2, dtype=np.int32)
+        coords.flags.writeable = False
+        distances.flags.writeable = False
+        object.__setattr__(self, "coords", coords)
+        object.__setattr__(self, "distances", distances)
 
     @property
     def total(self) -> int:
         return self.cols * self.rows
-    
+
+    def is_valid_square(self, square_id: int) -> bool:
+        """Whether square_id (1..total) is a square on this grid."""
+        return 1 <= square_id <= self.total
+
     def square_to_coords(self, square_id: int) -> tuple[int, int]:
         """Convert square_id (1-63) to (x, y) coordinates."""
         # Square IDs are 1-indexed in the frontend, so subtract 1
@@ -16,11 +40,28 @@ class GridConfig:
         x = adjusted_id % self.cols
         y = adjusted_id // self.cols
         return (x, y)
-    
+
     def manhattan_distance(self, square1: int, square2: int) -> int:
         """Calculate Manhattan distance between two squares."""
-        x1, y1 = self.square_to_coords(square1)
-        x2, y2 = self.square_to_coords(square2)
-        return abs(x1 - x2) + abs(y1 - y2)
+        return int(self.distances[square1, square2])
+
+    def manhattan_distances(self, squares1: np.ndarray, squares2: np.ndarray) -> np.ndarray:
+        """Element-wise Manhattan distance between two broadcastable arrays of square ids."""
+        return self.distances[squares1, squares2]
 
 GRID_4V4 = GridConfig()
+
+# Grid formats keyed by Puzzle.format
+GRID_FORMATS: dict[str, GridConfig] = {
+    "4v4": GRID_4V4,
+    "7v7": GridConfig(cols=11, rows=15, players_per_team=7),
+    "9v9": GridConfig(cols=13, rows=19, players_per_team=9),
+    "11v11": GridConfig(cols=15, rows=21, players_per_team=11),
+}
+
+def get_grid(format: str) -> GridConfig:
+    """Look up the grid for a puzzle format."""
+    try:
+        return GRID_FORMATS[format]
+    except KeyError:
+        raise ValueError(f"Unknown grid format {format!r}") from None
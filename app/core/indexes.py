@@ -0,0 +1,121 @@
+import logging
+import threading
+import time
+from typing import Callable, Iterable
+
+logger = logging.getLogger(__name__)
+
+
+class RebuiltIndex:
+    """Base for in-memory indexes rebuilt from the database every ttl seconds.
+
+    A rebuild picks up rows written by other processes; this process's
+    changes are applied as they happen. Only the first build runs in the
+    caller that needs it. After that a stale index keeps answering while a
+    background thread rebuilds it, and changes recorded during the rebuild
+    are replayed onto the new state before it is swapped in.
+
+    Subclasses keep their state in attributes guarded by _lock and
+    implement _build, _apply, _install and _reset. Their add and remove
+    methods call _record under _lock, then apply the change if _ready.
+    """
+
+    # Used in the rebuild thread's name and log messages
+    name = "index"
+
+    def __init__(self, ttl: float = 300.0):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._rebuild_lock = threading.Lock()
+        # Whether there is an index to query, even a stale one
+        self._ready = False
+        self._rebuilding = False
+        # Changes made while a rebuild is loading rows
+        self._changes: list[tuple] | None = None
+        self.built_at: float | None = None
+
+    def stale(self) -> bool:
+        return self.built_at is None or time.monotonic() - self.built_at > self.ttl
+
+    def expire(self) -> None:
+        """Rebuild on the next query."""
+        self.built_at = None
+
+    def clear(self) -> None:
+        """Drop the index, so the next query builds it in the caller."""
+        with self._rebuild_lock, self._lock:
+            self._reset()
+            self._ready = False
+            self.built_at = None
+
+    def refresh(self, load: Callable[[], Iterable[tuple]]) -> None:
+        """Rebuild from load() if stale.
+
+        The first build runs in the caller, and concurrent callers wait for
+        it. Later rebuilds run on a background thread while queries use the
+        old index, so load must open its own database session.
+        """
+        if not self.stale():
+            return
+        if self._ready:
+            self._rebuild_in_background(load)
+            return
+        with self._rebuild_lock:
+            if self.stale():
+                self.rebuild(load())
+
+    def _rebuild_in_background(self, load) -> None:
+        with self._lock:
+            if self._rebuilding:
+                return
+            self._rebuilding = True
+
+        def run():
+            try:
+                with self._rebuild_lock:
+                    if self.stale():
+                        self.rebuild(load())
+            except Exception:
+                # Stays stale, so the next query tries again
+                logger.exception("Failed to rebuild the %s index", self.name)
+            finally:
+                with self._lock:
+                    self._rebuilding = False
+
+        threading.Thread(target=run, name=f"{self.name}-index", daemon=True).start()
+
+    def rebuild(self, rows: Iterable[tuple]) -> None:
+        """Replace the index with one built from rows."""
+        with self._lock:
+            self._changes = []
+        try:
+            state = self._build(rows)
+        except BaseException:
+            with self._lock:
+                self._changes = None
+            raise
+        with self._lock:
+            # rows may have been read before these changes were committed
+            for change in self._changes:
+                self._apply(state, change)
+            self._changes = None
+            self._install(state)
+            self._ready = True
+            self.built_at = time.monotonic()
+
+    def _record(self, change: tuple) -> None:
+        """Keep a change for the rebuild in progress, if any. Call under _lock."""
+        if self._changes is not None:
+            self._changes.append(change)
+
+    def _build(self, rows: Iterable[tuple]):
+        raise NotImplementedError
+
+    def _apply(self, state, change: tuple) -> None:
+        raise NotImplementedError
+
+    def _install(self, state) -> None:
+        raise NotImplementedError
+
+    def _reset(self) -> None:
+        raise NotImplementedError
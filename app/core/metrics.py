@@ -0,0 +1,233 @@
+import bisect
+import os
+import sys
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Request latency buckets in seconds (the Prometheus client defaults)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+# Frames under this directory count as application call sites, except for
+# the instrumentation itself
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+INSTRUMENTATION_FILES = (
+    __file__,
+    os.path.join(APP_ROOT, "core", "profiling.py"),
+    os.path.join(APP_ROOT, "api", "metrics.py"),
+)
+
+
+@dataclass(frozen=True)
+class QueryRecord:
+    statement: str
+    seconds: float
+    call_site: str
+
+
+@dataclass
+class QueryStats:
+    """SQL statements executed while handling one request.
+
+    Individual statements are only kept when ``statements`` is a list,
+    which the middleware does when QUERY_PROFILING is on.
+    """
+    count: int = 0
+    seconds: float = 0.0
+    statements: list[QueryRecord] | None = field(default=None, repr=False)
+
+
+def _describe(frame) -> str:
+    filename = frame.f_code.co_filename
+    if filename.startswith(APP_ROOT):
+        filename = os.path.relpath(filename, os.path.dirname(APP_ROOT))
+    return f"{filename}:{frame.f_lineno} {frame.f_code.co_name}"
+
+
+def call_site() -> str:
+    """Where a statement was issued from, as "path:line function".
+
+    This is the innermost application frame. Statements issued outside
+    application code, such as lazy loads during response serialization,
+    fall back to the innermost frame outside SQLAlchemy.
+    """
+    fallback = None
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename not in INSTRUMENTATION_FILES:
+            if filename.startswith(APP_ROOT):
+                return _describe(frame)
+            if fallback is None and f"{os.sep}sqlalchemy{os.sep}" not in filename:
+                fallback = frame
+        frame = frame.f_back
+    return _describe(fallback) if fallback is not None else "<unknown>"
+
+
+# Set by the metrics middleware for the duration of a request. Sync handlers
+# run in a copy of the request context, so they share the same QueryStats.
+current_query_stats: ContextVar[QueryStats | None] = ContextVar("current_query_stats", default=None)
+
+
+def track_query_time(engine: Engine) -> None:
+    """Add each statement's count and time to the current request's QueryStats."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._query_start = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        stats = current_query_stats.get()
+        if stats is not None:
+            seconds = time.perf_counter() - context._query_start
+            stats.count += 1
+            stats.seconds += seconds
+            if stats.statements is not None:
+                stats.statements.append(QueryRecord(statement, seconds, call_site()))
+
+
+class Histogram:
+    """Fixed-bucket histogram. Counts are per bucket and made cumulative on render."""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+@dataclass
+class RouteMetrics:
+    duration: Histogram
+    db_queries: int = 0
+    db_seconds: float = 0.0
+
+
+def _labels(**labels) -> str:
+    def escape(value: str) -> str:
+        return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+    return "{" + ",".join(f'{key}="{escape(str(value))}"' for key, value in labels.items()) + "}"
+
+
+class RequestMetrics:
+    """In-process request metrics keyed by method and route template."""
+
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._routes: dict[tuple[str, str], RouteMetrics] = {}
+        self._responses: dict[tuple[str, str, int], int] = {}
+        self.in_progress = 0
+
+    def observe(self, method: str, route: str, status: int, seconds: float, queries: QueryStats) -> None:
+        with self._lock:
+            metrics = self._routes.get((method, route))
+            if metrics is None:
+                metrics = self._routes[(method, route)] = RouteMetrics(Histogram(self.buckets))
+            metrics.duration.observe(seconds)
+            metrics.db_queries += queries.count
+            metrics.db_seconds += queries.seconds
+            key = (method, route, status)
+            self._responses[key] = self._responses.get(key, 0) + 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self._routes.clear()
+            self._responses.clear()
+
+    def render(self) -> list[str]:
+        """Prometheus text exposition lines for the request metrics."""
+        with self._lock:
+            routes = sorted(self._routes.items())
+            responses = sorted(self._responses.items())
+            in_progress = self.in_progress
+
+        lines = [
+            "# HELP http_requests_total Requests handled, by route template and status code.",
+            "# TYPE http_requests_total counter",
+        ]
+        for (method, route, status), count in responses:
+            lines.append(f"http_requests_total{_labels(method=method, route=route, status=status)} {count}")
+
+        lines += [
+            "# HELP http_requests_in_progress Requests currently being handled.",
+            "# TYPE http_requests_in_progress gauge",
+            f"http_requests_in_progress {in_progress}",
+            "# HELP http_request_duration_seconds Request latency, by route template.",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for (method, route), metrics in routes:
+            hist = metrics.duration
+            cumulative = 0
+            for bound, count in zip(hist.buckets, hist.counts):
+                cumulative += count
+                lines.append(
+                    f"http_request_duration_seconds_bucket{_labels(method=method, route=route, le=bound)} {cumulative}"
+                )
+            lines.append(
+                f"http_request_duration_seconds_bucket{_labels(method=method, route=route, le='+Inf')} {hist.count}"
+            )
+            lines.append(f"http_request_duration_seconds_sum{_labels(method=method, route=route)} {hist.sum}")
+            lines.append(f"http_request_duration_seconds_count{_labels(method=method, route=route)} {hist.count}")
+
+        lines += [
+            "# HELP db_queries_total SQL statements executed, by route template.",
+            "# TYPE db_queries_total counter",
+        ]
+        for (method, route), metrics in routes:
+            lines.append(f"db_queries_total{_labels(method=method, route=route)} {metrics.db_queries}")
+
+        lines += [
+            "# HELP db_query_seconds_total Time spent executing SQL statements, by route template.",
+            "# TYPE db_query_seconds_total counter",
+        ]
+        for (method, route), metrics in routes:
+            lines.append(f"db_query_seconds_total{_labels(method=method, route=route)} {metrics.db_seconds}")
+
+        return lines
+
+
+def render_pool_metrics(pools: dict[str, dict]) -> list[str]:
+    """Prometheus text exposition lines for app.db.session.pool_stats()."""
+    counters = {
+        "connects": "Connections opened by the pool.",
+        "invalidations": "Pooled connections invalidated.",
+        "checkouts": "Connections checked out of the pool.",
+        "wait_seconds_total": "Time spent waiting to check out a connection.",
+    }
+    gauges = {
+        "checked_out": "Connections currently checked out.",
+        "checked_in": "Idle connections in the pool.",
+        "overflow": "Connections open beyond pool_size.",
+    }
+
+    lines = []
+    for name, help_text in counters.items():
+        metric = f"db_pool_{name}" if name.endswith("_total") else f"db_pool_{name}_total"
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} counter"]
+        for engine, stats in pools.items():
+            lines.append(f"{metric}{_labels(engine=engine)} {stats[name]}")
+    for name, help_text in gauges.items():
+        metric = f"db_pool_{name}"
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} gauge"]
+        for engine, stats in pools.items():
+            if name in stats:
+                lines.append(f"{metric}{_labels(engine=engine)} {stats[name]}")
+    return lines
+
+
+request_metrics = RequestMetrics()
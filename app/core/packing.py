@@ -0,0 +1,70 @@
+from typing import Mapping
+
+import numpy as np
+
+from app.core.grid import GridConfig
+
+# Phases in the order they are packed
+PHASES = ("start", "solution", "locked")
+PHASE_INDEX = {phase: i for i, phase in enumerate(PHASES)}
+
+# Square ids go up to 315 (11v11), so each slot is a little-endian uint16.
+# EMPTY marks a player without a position in that phase.
+SQUARE_DTYPE = np.dtype("<u2")
+EMPTY = 0xFFFF
+
+
+def slot_labels(grid: GridConfig) -> list[str]:
+    """Player labels in slot order: A1..An, then B1..Bn."""
+    return [
+        f"{team}{i}"
+        for team in ("A", "B")
+        for i in range(1, grid.players_per_team + 1)
+    ]
+
+
+def pack_positions(grid: GridConfig, squares: Mapping[str, Mapping[str, int]]) -> bytes:
+    """Pack {phase: {player label: square id}} into one bytes value.
+
+    The layout is a (phase, slot) array of uint16 square ids, so a 4v4
+    puzzle takes 48 bytes.
+    """
+    slots = {label: i for i, label in enumerate(slot_labels(grid))}
+    packed = np.full((len(PHASES), len(slots)), EMPTY, dtype=SQUARE_DTYPE)
+    for phase, phase_squares in squares.items():
+        for label, square_id in phase_squares.items():
+            packed[PHASE_INDEX[phase], slots[label]] = square_id
+    return packed.tobytes()
+
+
+def unpack_positions(grid: GridConfig, data: bytes) -> np.ndarray:
+    """The read-only (phase, slot) square array for a value from pack_positions."""
+    return np.frombuffer(data, dtype=SQUARE_DTYPE).reshape(len(PHASES), 2 * grid.players_per_team)
+
+
+def phase_squares(grid: GridConfig, data: bytes, phase: str) -> dict[str, int]:
+    """{player label: square id} for the players positioned in one phase, in slot order."""
+    row = unpack_positions(grid, data)[PHASE_INDEX[phase]].tolist()
+    return {
+        label: square_id
+        for label, square_id in zip(slot_labels(grid), row)
+        if square_id != EMPTY
+    }
+
+
+def pack_slots(grid: GridConfig, values: Mapping[str, int]) -> bytes:
+    """Pack {player label: value} into one uint16 per slot, EMPTY for the rest."""
+    slots = {label: i for i, label in enumerate(slot_labels(grid))}
+    packed = np.full(len(slots), EMPTY, dtype=SQUARE_DTYPE)
+    for label, value in values.items():
+        packed[slots[label]] = value
+    return packed.tobytes()
+
+
+def unpack_slots(grid: GridConfig, data: bytes) -> dict[str, int]:
+    """{player label: value} for the slots set in a value from pack_slots, in slot order."""
+    return {
+        label: value
+        for label, value in zip(slot_labels(grid), np.frombuffer(data, dtype=SQUARE_DTYPE).tolist())
+        if value != EMPTY
+    }
@@ -0,0 +1,69 @@
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Iterator
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.metrics import QueryRecord, QueryStats, call_site
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def summarize(stats: QueryStats, limit: int = 5) -> str:
+    """One-line summary of a profile: the busiest call sites by statement count.
+
+    For example ``3 queries 1.2ms; 2x app/db/queries.py:18 load_puzzle 0.9ms``.
+    Safe to send as a header value.
+    """
+    parts = [f"{stats.count} queries {stats.seconds * 1000:.1f}ms"]
+    if stats.statements:
+        counts = Counter(record.call_site for record in stats.statements)
+        seconds = Counter()
+        for record in stats.statements:
+            seconds[record.call_site] += record.seconds
+        for site, count in counts.most_common(limit):
+            parts.append(f"{count}x {site} {seconds[site] * 1000:.1f}ms")
+    return "; ".join(parts).encode("latin-1", "replace").decode("latin-1")
+
+
+@contextmanager
+def record_queries(engine: Engine) -> Iterator[QueryStats]:
+    """Record every statement run on engine inside the block, from any thread.
+
+    Unlike the per-request QueryStats this doesn't depend on context
+    variables, so it sees queries made by a TestClient's app thread.
+    """
+    stats = QueryStats(statements=[])
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._profile_start = time.perf_counter()
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        seconds = time.perf_counter() - context._profile_start
+        stats.count += 1
+        stats.seconds += seconds
+        stats.statements.append(QueryRecord(statement, seconds, call_site()))
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", after_cursor_execute)
+    try:
+        yield stats
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+        event.remove(engine, "after_cursor_execute", after_cursor_execute)
+
+
+@contextmanager
+def query_budget(engine: Engine, max_queries: int) -> Iterator[QueryStats]:
+    """Fail with QueryBudgetExceeded if the block runs more than max_queries statements."""
+    with record_queries(engine) as stats:
+        yield stats
+
+    if stats.count > max_queries:
+        lines = [f"{stats.count} queries, budget is {max_queries}"]
+        lines += [f"  {record.call_site}: {' '.join(record.statement.split())}" for record in stats.statements]
+        raise QueryBudgetExceeded("\n".join(lines))
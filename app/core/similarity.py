@@ -0,0 +1,244 @@
+import time
+import uuid
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Iterable, Mapping, Sequence
+
+import numpy as np
+
+from app.core.board import slot_index
+from app.core.config import settings
+from app.core.grid import GridConfig, get_grid
+from app.core.indexes import RebuiltIndex
+from app.core.packing import EMPTY as PACKED_EMPTY, PHASE_INDEX, unpack_positions
+
+# Distance charged for a player placed in one formation but not the other.
+# It is larger than any on-grid distance, so formations that place
+# different players rank behind any that place the same ones.
+UNPLACED_DISTANCE = 1000
+
+
+@lru_cache(maxsize=None)
+def distance_table(grid: GridConfig) -> np.ndarray:
+    """GridConfig.distances extended with a last row and column for "unplaced".
+
+    Index unplaced_square(grid) stands for a player without a square: zero
+    from itself and UNPLACED_DISTANCE from every square.
+    """
+    unplaced = unplaced_square(grid)
+    table = np.full((unplaced + 1, unplaced + 1), UNPLACED_DISTANCE, dtype=np.int16)
+    table[:unplaced, :unplaced] = grid.distances
+    table[unplaced, unplaced] = 0
+    table.flags.writeable = False
+    return table
+
+
+def unplaced_square(grid: GridConfig) -> int:
+    return grid.total + 1
+
+
+def formation_squares(grid: GridConfig, squares: Sequence[int]) -> np.ndarray:
+    """One square id per slot, in slot order, as indexes into distance_table(grid).
+
+    squares uses PACKED_EMPTY for a player without a start square. The
+    summed table distances between two formations' slots are the summed
+    Manhattan distances between the same players' squares.
+    """
+    squares = np.array(squares, dtype=np.uint16)
+    squares[squares == PACKED_EMPTY] = unplaced_square(grid)
+    return squares
+
+
+def packed_formation(grid: GridConfig, data: bytes) -> np.ndarray:
+    """formation_squares of the start squares in a value from pack_positions."""
+    return formation_squares(grid, unpack_positions(grid, data)[PHASE_INDEX["start"]])
+
+
+def layout_formation(grid: GridConfig, squares: Mapping[str, int]) -> np.ndarray:
+    """formation_squares of a {player label: square id} layout.
+
+    Raises ValueError for a label that isn't in the grid's format.
+    """
+    slots = slot_index(grid)
+    values = [PACKED_EMPTY] * len(slots)
+    for label, square in squares.items():
+        if label not in slots:
+            raise ValueError(f"Invalid player {label}")
+        values[slots[label]] = square
+    return formation_squares(grid, values)
+
+
+@dataclass
+class _Formations:
+    """The formations of one puzzle format.
+
+    squares is slot-major, one row of square ids per player slot, so a
+    query reads each slot's squares as one contiguous array. New rows are
+    appended to pending lists and folded in on the next query; removed
+    rows are only masked out.
+    """
+    grid: GridConfig
+    ids: list[uuid.UUID] = field(default_factory=list)
+    rows: dict[uuid.UUID, int] = field(default_factory=dict)
+    squares: np.ndarray | None = None
+    teams: np.ndarray | None = None
+    alive: np.ndarray | None = None
+    pending_squares: list[np.ndarray] = field(default_factory=list)
+    pending_teams: list[int] = field(default_factory=list)
+
+    def __post_init__(self):
+        self.squares = np.empty((2 * self.grid.players_per_team, 0), dtype=np.uint16)
+        self.teams = np.empty(0, dtype=np.int32)
+        self.alive = np.empty(0, dtype=bool)
+
+    def add(self, puzzle_id: uuid.UUID, squares: np.ndarray, team: int) -> None:
+        if puzzle_id in self.rows:
+            return
+        self.rows[puzzle_id] = len(self.ids)
+        self.ids.append(puzzle_id)
+        self.pending_squares.append(squares)
+        self.pending_teams.append(team)
+
+    def remove(self, puzzle_id: uuid.UUID) -> bool:
+        row = self.rows.pop(puzzle_id, None)
+        if row is None:
+            return False
+        self.consolidate()
+        self.alive[row] = False
+        return True
+
+    def consolidate(self) -> None:
+        if not self.pending_squares:
+            return
+        self.squares = np.ascontiguousarray(
+            np.concatenate([self.squares, np.stack(self.pending_squares, axis=1)], axis=1)
+        )
+        self.teams = np.concatenate([self.teams, np.array(self.pending_teams, dtype=np.int32)])
+        self.alive = np.concatenate([self.alive, np.ones(len(self.pending_teams), dtype=bool)])
+        self.pending_squares.clear()
+        self.pending_teams.clear()
+
+    @property
+    def max_distance(self) -> int:
+        return 2 * self.grid.players_per_team * UNPLACED_DISTANCE
+
+    def distances(self, formation: np.ndarray) -> np.ndarray:
+        """Distance from formation to every row: one table lookup per slot.
+
+        At most max_distance, so int16 holds it for every format.
+        """
+        table = distance_table(self.grid)
+        distances = np.zeros(len(self.ids), dtype=np.int16)
+        for slot, square in enumerate(formation.tolist()):
+            distances += table[square].take(self.squares[slot])
+        return distances
+
+
+class FormationIndex(RebuiltIndex):
+    """In-memory nearest-formation index over puzzle start positions.
+
+    Formations are grouped by puzzle format as arrays of each player
+    slot's start square, so a top-k query is one vectorised table lookup
+    per slot. Rebuilt from the database as described in RebuiltIndex.
+    """
+
+    name = "formation"
+
+    def __init__(self, ttl: float = 300.0):
+        super().__init__(ttl)
+        self._formats: dict[str, _Formations] = {}
+        self._teams: dict[str, int] = {}
+
+    def add(self, puzzle_id: uuid.UUID, format: str, team_key: str, packed: bytes) -> None:
+        with self._lock:
+            change = ("add", puzzle_id, format, team_key, packed)
+            self._record(change)
+            if self._ready:
+                self._apply((self._formats, self._teams), change)
+
+    def remove(self, puzzle_id: uuid.UUID) -> bool:
+        with self._lock:
+            self._record(("remove", puzzle_id))
+            return any(formations.remove(puzzle_id) for formations in self._formats.values())
+
+    def _build(self, rows: Iterable[tuple[uuid.UUID, str, str, bytes]]):
+        """(formats, teams) from (id, format, team_key, positions_packed) rows."""
+        state = ({}, {})
+        for row in rows:
+            self._apply(state, ("add", *row))
+        return state
+
+    def _apply(self, state, change: tuple) -> None:
+        formats, teams = state
+        if change[0] == "remove":
+            for formations in formats.values():
+                formations.remove(change[1])
+            return
+        _, puzzle_id, format, team_key, packed = change
+        formations = formats.get(format)
+        if formations is None:
+            formations = formats[format] = _Formations(get_grid(format))
+        team = teams.setdefault(team_key, len(teams))
+        formations.add(puzzle_id, packed_formation(formations.grid, packed), team)
+
+    def _install(self, state) -> None:
+        formats, teams = state
+        for formations in formats.values():
+            formations.consolidate()
+        self._formats = formats
+        self._teams = teams
+
+    def _reset(self) -> None:
+        self._formats = {}
+        self._teams = {}
+
+    def nearest(
+        self,
+        format: str,
+        formation: np.ndarray,
+        k: int,
+        max_distance: int | None = None,
+        team_key: str | None = None,
+        exclude: uuid.UUID | None = None,
+    ) -> list[tuple[uuid.UUID, int]]:
+        """The k closest formations as (puzzle id, distance), closest first.
+
+        Ties are broken by insertion order, so results are stable.
+        """
+        with self._lock:
+            formations = self._formats.get(format)
+            if formations is None:
+                return []
+            formations.consolidate()
+            if team_key is not None and team_key not in self._teams:
+                return []
+
+            distances = formations.distances(formation)
+            # Rows that can't match get a distance past any real one
+            excluded = formations.max_distance + 1
+            distances[~formations.alive] = excluded
+            if team_key is not None:
+                distances[formations.teams != self._teams[team_key]] = excluded
+            if exclude is not None and exclude in formations.rows:
+                distances[formations.rows[exclude]] = excluded
+
+            # Distances are small integers, so the k-th smallest comes from a
+            # histogram instead of sorting or partitioning every row
+            cutoff = int(np.searchsorted(np.cumsum(np.bincount(distances)), k))
+            cutoff = min(cutoff, excluded - 1 if max_distance is None else max_distance)
+            candidates = np.flatnonzero(distances <= cutoff)
+            order = candidates[np.lexsort((candidates, distances[candidates]))][:k]
+            return [(formations.ids[row], int(distances[row])) for row in order]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "puzzles": sum(len(formations.rows) for formations in self._formats.values()),
+                "formats": {format: len(formations.rows) for format, formations in self._formats.items()},
+                "age_seconds": None if self.built_at is None else round(time.monotonic() - self.built_at, 1),
+                "ttl_seconds": self.ttl,
+                "rebuilding": self._rebuilding,
+            }
+
+
+formation_index = FormationIndex(ttl=settings.SIMILARITY_INDEX_TTL)
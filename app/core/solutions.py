@@ -0,0 +1,120 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Mapping
+
+from app.core.board import Board
+from app.core.config import settings
+from app.core.grid import get_grid
+from app.core.packing import slot_labels
+
+
+@dataclass(frozen=True)
+class CompiledSolution:
+    """Everything validate_puzzle needs, detached from the database."""
+    puzzle_id: uuid.UUID
+    format: str
+    team_name: str
+    labels: frozenset[str]
+    squares: Mapping[str, int]
+    ball_carrier_label: str | None
+    solution_answer: str | None
+    scoring: str
+    # The solution moves and the locked players, as boards
+    board: Board
+    locked: Board
+
+
+def compile_solution(puzzle) -> CompiledSolution:
+    """Build a CompiledSolution from a puzzle loaded with its ball carrier."""
+    grid = get_grid(puzzle.format)
+    board = Board.from_packed(grid, puzzle.positions_packed, "solution")
+    return CompiledSolution(
+        puzzle_id=puzzle.id,
+        format=puzzle.format,
+        team_name=puzzle.team_name,
+        labels=frozenset(slot_labels(grid)),
+        squares=board.to_dict(),
+        ball_carrier_label=puzzle.ball_carrier.label if puzzle.ball_carrier else None,
+        solution_answer=puzzle.solution_answer,
+        scoring=puzzle.scoring,
+        board=board,
+        locked=Board.from_packed(grid, puzzle.positions_packed, "locked"),
+    )
+
+
+class SolutionCache:
+    """Thread-safe LRU cache of compiled solutions with a per-entry TTL.
+
+    Puzzles are immutable once created, so entries only leave the cache
+    when they expire, fall off the LRU end, or are invalidated on delete.
+    Invalidation only reaches this process; the TTL bounds how long other
+    workers keep a deleted puzzle.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict[uuid.UUID, tuple[float, CompiledSolution]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, puzzle_id: uuid.UUID) -> CompiledSolution | None:
+        with self._lock:
+            entry = self._entries.get(puzzle_id)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, solution = entry
+            if expires_at < time.monotonic():
+                del self._entries[puzzle_id]
+                self.evictions += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(puzzle_id)
+            self.hits += 1
+            return solution
+
+    def put(self, puzzle_id: uuid.UUID, solution: CompiledSolution) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[puzzle_id] = (time.monotonic() + self.ttl, solution)
+            self._entries.move_to_end(puzzle_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, puzzle_id: uuid.UUID) -> bool:
+        with self._lock:
+            if self._entries.pop(puzzle_id, None) is None:
+                return False
+            self.invalidations += 1
+            return True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+solution_cache = SolutionCache(
+    maxsize=settings.SOLUTION_CACHE_SIZE,
+    ttl=settings.SOLUTION_CACHE_TTL,
+)
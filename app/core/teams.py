@@ -0,0 +1,110 @@
+import time
+import unicodedata
+from bisect import bisect_left
+from typing import Iterable
+
+from app.core.config import settings
+from app.core.indexes import RebuiltIndex
+
+
+def normalize_team_name(name: str) -> str:
+    """The lookup key for a team name: its letters and digits, casefolded, without accents.
+
+    "Eagles U12", "eagles u12 " and "Eagles-U12" all become "eaglesu12".
+    """
+    # NFKD splits accents off into combining marks, which aren't alphanumeric
+    return "".join(ch for ch in unicodedata.normalize("NFKD", name.casefold()) if ch.isalnum())
+
+
+def clean_team_name(name: str) -> str:
+    """A team name for display: trimmed, with runs of whitespace collapsed."""
+    return " ".join(name.split())
+
+
+class TeamIndex(RebuiltIndex):
+    """In-memory team-name autocomplete over normalized keys.
+
+    Keys are kept in one sorted list, so a prefix lookup is a binary search
+    followed by a scan of at most limit keys. Like FormationIndex, it is
+    rebuilt from the database as described in RebuiltIndex, so a fresh
+    index answers without taking the rebuild lock and an expired one
+    answers while it rebuilds. Teams without puzzles are left out.
+    """
+
+    name = "team"
+
+    def __init__(self, ttl: float = 300.0):
+        super().__init__(ttl)
+        self._keys: list[str] = []
+        # key -> [display name, puzzle count]
+        self._teams: dict[str, list] = {}
+
+    def add(self, key: str, name: str, puzzles: int = 1) -> None:
+        with self._lock:
+            change = ("add", key, name, puzzles)
+            self._record(change)
+            if self._ready:
+                self._apply((self._keys, self._teams), change)
+
+    def remove(self, key: str, puzzles: int = 1) -> None:
+        with self._lock:
+            change = ("remove", key, None, puzzles)
+            self._record(change)
+            self._apply((self._keys, self._teams), change)
+
+    def _build(self, rows: Iterable[tuple[str, str, int]]):
+        """(keys, teams) from (key, name, puzzles) rows."""
+        teams = {key: [name, puzzles] for key, name, puzzles in rows if puzzles > 0}
+        return sorted(teams), teams
+
+    def _apply(self, state, change: tuple) -> None:
+        keys, teams = state
+        kind, key, name, puzzles = change
+        team = teams.get(key)
+        if kind == "add":
+            if team is not None:
+                team[1] += puzzles
+                return
+            teams[key] = [name, puzzles]
+            keys.insert(bisect_left(keys, key), key)
+            return
+        if team is None:
+            return
+        team[1] -= puzzles
+        if team[1] <= 0:
+            del teams[key]
+            del keys[bisect_left(keys, key)]
+
+    def _install(self, state) -> None:
+        self._keys, self._teams = state
+
+    def _reset(self) -> None:
+        self._keys = []
+        self._teams = {}
+
+    def complete(self, prefix: str, limit: int) -> list[tuple[str, int]]:
+        """(name, puzzles) of up to limit teams whose key starts with prefix, in key order.
+
+        prefix is a key, as from normalize_team_name.
+        """
+        with self._lock:
+            keys = self._keys
+            start = bisect_left(keys, prefix)
+            matches = []
+            for key in keys[start:start + limit]:
+                if not key.startswith(prefix):
+                    break
+                matches.append(tuple(self._teams[key]))
+            return matches
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "teams": len(self._keys),
+                "age_seconds": None if self.built_at is None else round(time.monotonic() - self.built_at, 1),
+                "ttl_seconds": self.ttl,
+                "rebuilding": self._rebuilding,
+            }
+
+
+team_index = TeamIndex(ttl=settings.TEAM_INDEX_TTL)
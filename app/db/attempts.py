@@ -0,0 +1,168 @@
+import logging
+import os
+import threading
+from typing import Callable
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.models import Attempt
+from app.db.session import SessionLocal
+from app.db.stats import apply_attempts
+
+logger = logging.getLogger(__name__)
+
+
+class AttemptLog:
+    """Write-behind buffer for the attempts table.
+
+    record() appends a row to an in-process list and returns; a background
+    thread writes the list in multi-row INSERTs once batch_size rows are
+    waiting or every flush_interval seconds, one commit per batch. Each
+    batch updates the summary tables in app.db.stats in the same
+    transaction.
+
+    At most max_pending rows wait at once. When the buffer is full, record()
+    drops the row in lossy mode and otherwise waits for the flusher to make
+    room. close() stops the thread and writes whatever is left. A batch the
+    database rejects is logged and counted as failed, not retried.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        max_pending: int = 10000,
+        lossy: bool = False,
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max(max_pending, batch_size)
+        self.lossy = lossy
+        self._rows: list[dict] = []
+        self._lock = threading.Lock()
+        # Notified when the flusher takes the pending rows
+        self._room = threading.Condition(self._lock)
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._pid: int | None = None
+        self._closed = False
+        self.recorded = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.flushes = 0
+
+    def record(self, row: dict) -> bool:
+        """Queue one attempts row; False if it was dropped."""
+        with self._lock:
+            if self._closed:
+                self.dropped += 1
+                return False
+            if len(self._rows) >= self.max_pending:
+                if self.lossy:
+                    self.dropped += 1
+                    return False
+                self._wake.set()
+                while len(self._rows) >= self.max_pending and not self._closed:
+                    self._room.wait()
+                if self._closed:
+                    self.dropped += 1
+                    return False
+            self._rows.append(row)
+            self.recorded += 1
+            full = len(self._rows) >= self.batch_size
+        self._ensure_started()
+        if full:
+            self._wake.set()
+        return True
+
+    def _ensure_started(self) -> None:
+        # Started lazily, and again in a forked worker, which inherits the
+        # object but not the thread
+        if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._closed or (self._pid == os.getpid() and self._thread is not None and self._thread.is_alive()):
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="attempt-log", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self) -> int:
+        """Write every pending row now; returns the number written."""
+        with self._flush_lock:
+            with self._lock:
+                rows, self._rows = self._rows, []
+                self._room.notify_all()
+            return sum(
+                self._write(rows[start:start + self.batch_size])
+                for start in range(0, len(rows), self.batch_size)
+            )
+
+    def _write(self, rows: list[dict]) -> int:
+        try:
+            with self.session_factory() as db:
+                db.execute(insert(Attempt), rows)
+                apply_attempts(db, rows)
+                db.commit()
+        except Exception:
+            logger.exception("Failed to write %d attempts", len(rows))
+            with self._lock:
+                self.failed += len(rows)
+            return 0
+        with self._lock:
+            self.written += len(rows)
+            self.flushes += 1
+        return len(rows)
+
+    def start(self) -> None:
+        """Accept rows again after close()."""
+        with self._lock:
+            self._closed = False
+
+    def close(self, timeout: float | None = 10.0) -> None:
+        """Stop the flusher thread and write the rows still pending."""
+        with self._lock:
+            self._closed = True
+            self._room.notify_all()
+            thread = self._thread if self._pid == os.getpid() else None
+            self._thread = None
+        self._wake.set()
+        if thread is not None:
+            thread.join(timeout)
+        self.flush()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "pending": len(self._rows),
+                "recorded": self.recorded,
+                "written": self.written,
+                "dropped": self.dropped,
+                "failed": self.failed,
+                "flushes": self.flushes,
+                "batch_size": self.batch_size,
+                "flush_interval_seconds": self.flush_interval,
+                "max_pending": self.max_pending,
+                "lossy": self.lossy,
+            }
+
+
+attempt_log = AttemptLog(
+    SessionLocal,
+    batch_size=settings.ATTEMPT_LOG_BATCH_SIZE,
+    flush_interval=settings.ATTEMPT_LOG_FLUSH_INTERVAL,
+    max_pending=settings.ATTEMPT_LOG_MAX_PENDING,
+    lossy=settings.ATTEMPT_LOG_LOSSY,
+)
@@ -0,0 +1,400 @@
+import json
+import uuid
+from dataclasses import dataclass, field
+from typing import Callable, Iterator
+
+from pydantic import ValidationError
+from sqlalchemy import insert, or_, select, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session, joinedload, selectinload
+
+from app.core.board import Board, iter_bits
+from app.core.config import settings
+from app.core.fingerprint import FINGERPRINT_VERSION, fingerprint_puzzle, puzzle_fingerprint
+from app.core.grid import get_grid
+from app.core.packing import pack_positions
+from app.core.teams import clean_team_name, normalize_team_name
+from app.db.engine import dialect_insert
+from app.db.models import Puzzle, Player, Position, Team
+from app.db.queries import find_duplicates, squares_by_label
+from app.schemas.puzzle import PuzzleCreate, PuzzleImport
+
+
+@dataclass
+class PuzzleRows:
+    """Insert-ready rows for one puzzle, with client-generated ids."""
+    puzzle: dict
+    players: list[dict]
+    positions: list[dict]
+    ball_carrier_id: uuid.UUID
+
+
+def build_puzzle_rows(data: PuzzleCreate, puzzle_id: uuid.UUID | None = None) -> PuzzleRows:
+    """Turn a PuzzleCreate into rows for the puzzles and players tables.
+
+    Squares are packed into puzzles.positions_packed. Rows for the legacy
+    positions table are only built when WRITE_LEGACY_POSITIONS is set.
+
+    Raises ValueError if the team name has no letters or digits, if the
+    ball carrier or a positioned player doesn't exist in the puzzle's
+    format, if two players share a square before or after the solution
+    moves, or if the solution moves a locked player.
+    """
+    puzzle_id = puzzle_id or uuid.uuid4()
+
+    team_key = normalize_team_name(data.team_name)
+    if not team_key:
+        raise ValueError("Team name must contain a letter or digit")
+
+    # Auto-create players
+    grid = get_grid(data.format)
+    players = [
+        {
+            "id": uuid.uuid4(),
+            "puzzle_id": puzzle_id,
+            "team": team,
+            "label": f"{team}{i}",
+            "indicator": None,
+        }
+        for team in ["A", "B"]
+        for i in range(1, grid.players_per_team + 1)
+    ]
+    player_lookup = {p["label"]: p for p in players}
+
+    # Validate ball carrier
+    if data.ball_carrier_label not in player_lookup:
+        raise ValueError("Invalid ball carrier")
+
+    positions = []
+    squares = {"start": {}, "solution": {}, "locked": {}}
+
+    def add_positions(items, position_type):
+        for pos in items:
+            if pos.player_label not in player_lookup:
+                raise ValueError(f"Invalid player {pos.player_label}")
+            # Update player indicator if provided in starting positions
+            if position_type == "start" and pos.indicator:
+                player_lookup[pos.player_label]["indicator"] = pos.indicator
+
+            squares[position_type][pos.player_label] = pos.square_id
+            if settings.WRITE_LEGACY_POSITIONS:
+                positions.append({
+                    "id": uuid.uuid4(),
+                    "puzzle_id": puzzle_id,
+                    "player_id": player_lookup[pos.player_label]["id"],
+                    "square_id": pos.square_id,
+                    "position_type": position_type,
+                })
+
+    add_positions(data.starting_positions, "start")
+    add_positions(data.solution_positions, "solution")
+    add_positions(data.locked_positions, "locked")
+    start, solution = check_placement(grid, squares)
+
+    return PuzzleRows(
+        puzzle={
+            "id": puzzle_id,
+            "title": data.title,
+            "description": data.description,
+            # Replaced by the team's display name when inserted
+            "team_name": clean_team_name(data.team_name),
+            "team_key": team_key,
+            "hint": data.hint,
+            "solution_answer": data.solution_answer,
+            "format": data.format,
+            "mode": data.mode,
+            "scoring": data.scoring,
+            "team_a_color": data.team_a_color,
+            "team_b_color": data.team_b_color,
+            "created_by": None,
+            "positions_packed": pack_positions(grid, squares),
+            "fingerprint": puzzle_fingerprint(data.format, data.mode, data.ball_carrier_label, start, solution),
+            "fingerprint_version": FINGERPRINT_VERSION,
+        },
+        players=players,
+        positions=positions,
+        ball_carrier_id=player_lookup[data.ball_carrier_label]["id"],
+    )
+
+
+def check_placement(grid, squares: dict[str, dict[str, int]]) -> tuple[Board, Board]:
+    """Reject overlapping players and moved locked players, as ValueError.
+
+    Returns the start and solution boards.
+    """
+    start = Board.from_squares(grid, squares["start"])
+    if start.collisions:
+        square = next(iter_bits(start.collisions))
+        raise ValueError(f"More than one player starts on square {square}")
+
+    solution = Board.from_squares(grid, squares["solution"])
+    finish = start.moved(solution)
+    if finish.collisions:
+        square = next(iter_bits(finish.collisions))
+        raise ValueError(f"The solution puts more than one player on square {square}")
+
+    locked = Board.from_squares(grid, squares["locked"])
+    moved_locked = locked.mismatched(solution) & solution.placed
+    if moved_locked:
+        raise ValueError(f"Player {locked.labels(moved_locked)[0]} is locked")
+
+    return start, solution
+
+
+def insert_puzzle_rows(db: Session, batch: list[PuzzleRows]) -> None:
+    """Write a batch of puzzles with one multi-row INSERT per table.
+
+    puzzles.ball_carrier_id and players.puzzle_id reference each other, so
+    puzzles go in without a ball carrier and get it set once the players
+    exist. Each puzzle's team_name is set to its team's display name.
+    """
+    if not batch:
+        return
+
+    names = register_teams(db, [rows.puzzle for rows in batch])
+    for rows in batch:
+        rows.puzzle["team_name"] = names[rows.puzzle["team_key"]]
+
+    db.execute(insert(Puzzle), [rows.puzzle for rows in batch])
+    db.execute(insert(Player), [p for rows in batch for p in rows.players])
+    positions = [p for rows in batch for p in rows.positions]
+    if positions:
+        db.execute(insert(Position), positions)
+    db.execute(
+        update(Puzzle),
+        [
+            {"id": rows.puzzle["id"], "ball_carrier_id": rows.ball_carrier_id}
+            for rows in batch
+        ]
+    )
+
+
+def register_teams(db: Session, puzzles: list[dict]) -> dict[str, str]:
+    """Add puzzle rows to their teams' counts, creating new teams; returns key -> display name.
+
+    A new team is named after its first puzzle's team_name. One upsert,
+    in key order so concurrent batches lock teams in the same order, and
+    RETURNING gives back the names of teams that already existed.
+    """
+    teams: dict[str, dict] = {}
+    for puzzle in puzzles:
+        team = teams.setdefault(puzzle["team_key"], {
+            "key": puzzle["team_key"],
+            "name": puzzle["team_name"],
+            "puzzles": 0,
+        })
+        team["puzzles"] += 1
+
+    stmt = dialect_insert(db, Team)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["key"],
+        set_={"puzzles": Team.puzzles + stmt.excluded.puzzles},
+    )
+    result = db.execute(
+        stmt.returning(Team.key, Team.name),
+        sorted(teams.values(), key=lambda team: team["key"])
+    )
+    return dict(result.all())
+
+
+@dataclass
+class ImportReport:
+    imported: int = 0
+    failed: int = 0
+    errors: list[dict] = field(default_factory=list)
+
+
+class PuzzleImporter:
+    """Incrementally validate NDJSON PuzzleImport documents and write them in batches.
+
+    Each line is parsed and validated as it arrives; only the current batch
+    is held in memory. A bad line is recorded in the report and skipped.
+    With REJECT_DUPLICATE_PUZZLES, so is a puzzle whose fingerprint is
+    already in its team's library or earlier in the import, as with
+    POST /puzzles. If a batch is rejected by the database it is retried one
+    puzzle at a time so only the offending lines fail.
+    """
+
+    def __init__(
+        self,
+        db: Session,
+        batch_size: int = 500,
+        max_errors: int = 100,
+        on_insert: Callable[[list[PuzzleRows]], None] | None = None,
+    ):
+        self.db = db
+        self.batch_size = batch_size
+        self.max_errors = max_errors
+        # Called with the rows of each committed insert
+        self.on_insert = on_insert
+        self.report = ImportReport()
+        self._batch: list[tuple[int, PuzzleRows]] = []
+
+    def feed(self, line_no: int, line: str | bytes) -> bool:
+        """Validate one line and queue it. Returns True once a batch is ready to flush."""
+        if not line.strip():
+            return False
+
+        try:
+            data = PuzzleImport.model_validate_json(line)
+            rows = build_puzzle_rows(data, data.id)
+        except ValidationError as exc:
+            self._fail(line_no, exc.errors(include_url=False, include_input=False, include_context=False))
+        except ValueError as exc:
+            self._fail(line_no, str(exc))
+        else:
+            self._batch.append((line_no, rows))
+
+        return len(self._batch) >= self.batch_size
+
+    def feed_lines(self, lines: list[tuple[int, str | bytes]]) -> None:
+        """feed (line_no, line) pairs, flushing each batch as it fills."""
+        for line_no, line in lines:
+            if self.feed(line_no, line):
+                self.flush()
+
+    def flush(self) -> None:
+        batch, self._batch = self._batch, []
+        if batch and settings.REJECT_DUPLICATE_PUZZLES:
+            batch = self._drop_duplicates(batch)
+        if not batch:
+            return
+
+        try:
+            insert_puzzle_rows(self.db, [rows for _, rows in batch])
+            self.db.commit()
+            self.report.imported += len(batch)
+            self._inserted([rows for _, rows in batch])
+            return
+        except SQLAlchemyError:
+            self.db.rollback()
+
+        for line_no, rows in batch:
+            try:
+                insert_puzzle_rows(self.db, [rows])
+                self.db.commit()
+                self.report.imported += 1
+                self._inserted([rows])
+            except SQLAlchemyError as exc:
+                self.db.rollback()
+                self._fail(line_no, str(exc.orig if hasattr(exc, "orig") else exc))
+
+    def _inserted(self, batch: list[PuzzleRows]) -> None:
+        if self.on_insert is not None:
+            self.on_insert(batch)
+
+    def _drop_duplicates(self, batch: list[tuple[int, PuzzleRows]]) -> list[tuple[int, PuzzleRows]]:
+        """batch without duplicates of stored puzzles or of earlier lines, each failed."""
+        known = find_duplicates(self.db, [rows.puzzle for _, rows in batch])
+        kept = []
+        for line_no, rows in batch:
+            key = (rows.puzzle["team_key"], rows.puzzle["fingerprint"])
+            duplicate_id = known.get(key)
+            if duplicate_id is not None:
+                self._fail(line_no, f"Duplicate of puzzle {duplicate_id}")
+                continue
+            known[key] = rows.puzzle["id"]
+            kept.append((line_no, rows))
+        return kept
+
+    def _fail(self, line_no: int, detail) -> None:
+        self.report.failed += 1
+        if len(self.report.errors) < self.max_errors:
+            self.report.errors.append({"line": line_no, "detail": detail})
+
+
+def puzzle_to_document(puzzle: Puzzle) -> dict:
+    """Serialize a puzzle loaded with its players in the PuzzleImport shape accepted by the importer."""
+    indicators = {player.label: player.indicator for player in puzzle.players}
+    ball_carrier_label = next(
+        (player.label for player in puzzle.players if player.id == puzzle.ball_carrier_id),
+        None
+    )
+
+    positions = {}
+    for position_type in ("start", "solution", "locked"):
+        positions[position_type] = []
+        for label, square_id in squares_by_label(puzzle, position_type).items():
+            item = {"player_label": label, "square_id": square_id}
+            if position_type == "start":
+                item["indicator"] = indicators.get(label)
+            positions[position_type].append(item)
+
+    return {
+        "id": str(puzzle.id),
+        "title": puzzle.title,
+        "description": puzzle.description,
+        "team_name": puzzle.team_name,
+        "hint": puzzle.hint,
+        "solution_answer": puzzle.solution_answer,
+        "format": puzzle.format,
+        "mode": puzzle.mode,
+        "scoring": puzzle.scoring,
+        "team_a_color": puzzle.team_a_color,
+        "team_b_color": puzzle.team_b_color,
+        "ball_carrier_label": ball_carrier_label,
+        "starting_positions": positions["start"],
+        "solution_positions": positions["solution"],
+        "locked_positions": positions["locked"],
+    }
+
+
+def iter_export(db: Session, team_name: str | None = None, batch_size: int = 500) -> Iterator[str]:
+    """Yield puzzles as NDJSON lines, oldest first.
+
+    Puzzles are streamed from a server-side cursor batch_size rows at a
+    time, with players loaded per batch. Each batch is expunged once
+    written so memory use doesn't grow with the library.
+    """
+    stmt = (
+        select(Puzzle)
+        .options(
+            selectinload(Puzzle.players)
+        )
+        .order_by(Puzzle.created_at, Puzzle.id)
+        .execution_options(yield_per=batch_size)
+    )
+    if team_name is not None:
+        stmt = stmt.where(Puzzle.team_key == normalize_team_name(team_name))
+
+    for partition in db.scalars(stmt).partitions():
+        for puzzle in partition:
+            yield json.dumps(puzzle_to_document(puzzle)) + "\n"
+            for player in puzzle.players:
+                db.expunge(player)
+            db.expunge(puzzle)
+
+
+def backfill_fingerprints(db: Session, batch_size: int = 500) -> Iterator[int]:
+    """Fingerprint puzzles without a current fingerprint, batch_size at a time.
+
+    Covers puzzles stored before fingerprints existed and those fingerprinted
+    with an older FINGERPRINT_VERSION. Commits after each batch and yields
+    how many puzzles it updated, so an interrupted run picks up where it
+    stopped.
+    """
+    while True:
+        puzzles = (
+            db.query(Puzzle)
+            .options(joinedload(Puzzle.ball_carrier))
+            .filter(or_(
+                Puzzle.fingerprint.is_(None),
+                Puzzle.fingerprint_version.is_(None),
+                Puzzle.fingerprint_version < FINGERPRINT_VERSION
+            ))
+            .order_by(Puzzle.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not puzzles:
+            return
+        db.execute(
+            update(Puzzle),
+            [
+                {"id": puzzle.id, "fingerprint": fingerprint_puzzle(puzzle), "fingerprint_version": FINGERPRINT_VERSION}
+                for puzzle in puzzles
+            ]
+        )
+        db.commit()
+        db.expunge_all()
+        yield len(puzzles)
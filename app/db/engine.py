@@ -0,0 +1,178 @@
+import os
+
+from sqlalchemy import Connection, Engine, create_engine, event
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import QueuePool, StaticPool
+
+from app.core.config import settings
+from app.core.metrics import track_query_time
+from app.db.pool_metrics import InstrumentedAsyncQueuePool, InstrumentedQueuePool, instrument_engine
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Async driver for each backend, used when DB_ASYNC is enabled
+ASYNC_DRIVERS = {
+    "postgresql": "psycopg",
+    "sqlite": "aiosqlite",
+}
+
+
+def is_sqlite(url: str) -> bool:
+    return make_url(url).get_backend_name() == "sqlite"
+
+
+def is_memory_sqlite(url: str) -> bool:
+    url = make_url(url)
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+def async_database_url(url: str) -> str:
+    """Rewrite a database URL to use its backend's async driver."""
+    url = make_url(url)
+    backend = url.get_backend_name()
+    return url.set(
+        drivername=f"{backend}+{ASYNC_DRIVERS[backend]}"
+    ).render_as_string(hide_password=False)
+
+
+def dialect_insert(db: Session, model):
+    """insert() with the database's ON CONFLICT support."""
+    if db.get_bind().dialect.name == "postgresql":
+        return postgresql.insert(model)
+    return sqlite.insert(model)
+
+# engine_options keys that only apply to a QueuePool
+QUEUE_POOL_OPTIONS = ("pool_size", "max_overflow", "pool_timeout")
+
+
+def engine_options(url: str, poolclass: type) -> dict:
+    """create_engine keyword arguments from the DB_* settings."""
+    options = {"echo": settings.DB_ECHO}
+
+    if is_sqlite(url):
+        # Sessions are used from threadpool workers, not the thread that
+        # opened the connection. An in-memory database only lives as long as
+        # its connection, so every session shares one.
+        options["connect_args"] = {"check_same_thread": False}
+        if is_memory_sqlite(url):
+            options["poolclass"] = StaticPool
+        return options
+
+    options.update(
+        poolclass=poolclass,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+    )
+    if settings.DB_STATEMENT_TIMEOUT_MS > 0:
+        options["connect_args"] = {
+            "options": f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"
+        }
+    return options
+
+
+def configure_sqlite(engine: Engine, foreign_keys: bool = True) -> None:
+    """Set per-connection pragmas so SQLite behaves like the Postgres schema expects.
+
+    Foreign keys (and so ON DELETE CASCADE) are off by default in SQLite.
+    File databases use WAL so readers don't block the writer.
+    """
+    memory = is_memory_sqlite(str(engine.url))
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA foreign_keys={'ON' if foreign_keys else 'OFF'}")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.DB_SQLITE_BUSY_TIMEOUT * 1000)}")
+        if not memory:
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.close()
+
+
+def create_db_engine(url: str, name: str = "sync", foreign_keys: bool = True, **kwargs) -> Engine:
+    """Build an instrumented engine for a Postgres or SQLite URL.
+
+    name labels the engine's pool metrics. Extra keyword arguments
+    override the settings-derived options.
+    """
+    options = engine_options(url, kwargs.get("poolclass", InstrumentedQueuePool))
+    options.update(kwargs)
+    if not issubclass(options.get("poolclass", QueuePool), QueuePool):
+        for key in QUEUE_POOL_OPTIONS:
+            options.pop(key, None)
+    engine = create_engine(url, pool_logging_name=name, **options)
+    if is_sqlite(url):
+        configure_sqlite(engine, foreign_keys=foreign_keys)
+    instrument_engine(engine)
+    track_query_time(engine)
+    return engine
+
+
+def create_async_db_engine(url: str, name: str = "async", **kwargs) -> AsyncEngine:
+    """Like create_db_engine, on the backend's async driver."""
+    if is_memory_sqlite(url):
+        # The async driver would open a second, empty in-memory database
+        raise ValueError("DB_ASYNC needs a file-based SQLite database, not an in-memory one")
+    options = engine_options(url, InstrumentedAsyncQueuePool)
+    options.update(kwargs)
+    engine = create_async_engine(async_database_url(url), pool_logging_name=name, **options)
+    if is_sqlite(url):
+        configure_sqlite(engine.sync_engine)
+    instrument_engine(engine.sync_engine)
+    track_query_time(engine.sync_engine)
+    return engine
+
+
+def create_schema(engine: Engine | Connection) -> None:
+    """Create all tables straight from the models.
+
+    Much faster than migrate() for throwaway databases in tests; the
+    database isn't stamped with an Alembic revision.
+    """
+    from app.db.base import Base
+    from app.db import models  # noqa: F401  registers the tables
+    from app.db import search  # noqa: F401  registers the full-text index DDL
+
+    Base.metadata.create_all(engine)
+
+
+def migrate(engine: Engine, revision: str = "head") -> None:
+    """Bring engine's database up to revision, including in-memory SQLite databases.
+
+    The early revisions use ALTERs SQLite doesn't have, so a SQLite
+    database without a revision is created from the models with
+    create_schema() and stamped head instead. Once stamped, it is upgraded
+    through the newer revisions, which use batch mode.
+    """
+    from alembic import command
+    from alembic.config import Config
+    from alembic.runtime.migration import MigrationContext
+
+    config = Config(os.path.join(ROOT, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(ROOT, "alembic"))
+
+    with engine.connect() as connection:
+        sqlite = engine.dialect.name == "sqlite"
+        if sqlite:
+            # SQLite migrations rebuild tables; with foreign keys on, dropping
+            # the old copy of a parent table would cascade into its children.
+            connection.exec_driver_sql("PRAGMA foreign_keys=OFF")
+        config.attributes["connection"] = connection
+        try:
+            if sqlite and MigrationContext.configure(connection).get_current_revision() is None:
+                if revision != "head":
+                    raise ValueError("A new SQLite database can only be created at head")
+                create_schema(connection)
+                command.stamp(config, "head")
+            else:
+                command.upgrade(config, revision)
+            connection.commit()
+        finally:
+            if sqlite:
+                connection.exec_driver_sql("PRAGMA foreign_keys=ON")
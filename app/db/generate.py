@@ -0,0 +1,134 @@
+"""Generate puzzle libraries in parallel with app.core.generator.
+
+Work is split into fixed-size chunks, each drawn from its own seed
+derived from the run's seed, and results are consumed in chunk order. The
+output for a seed is the same whatever the number of workers.
+"""
+import random
+import time
+import uuid
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Iterator
+
+from app.core.generator import generate_puzzle
+from app.db.bulk import PuzzleRows, build_puzzle_rows
+
+# Draws per chunk before a chunk gives up, as a multiple of its size
+MAX_ATTEMPTS_PER_PUZZLE = 20
+
+
+@dataclass
+class GeneratedPuzzle:
+    # PuzzleImport document, with the id the rows are written under
+    document: dict
+    rows: PuzzleRows
+
+
+@dataclass
+class ChunkResult:
+    puzzles: list[GeneratedPuzzle]
+    rejected: int
+
+
+@dataclass
+class GenerationReport:
+    generated: int = 0
+    duplicates: int = 0
+    rejected: int = 0
+    started: float = field(default_factory=time.perf_counter)
+
+    def as_dict(self) -> dict:
+        seconds = time.perf_counter() - self.started
+        return {
+            "generated": self.generated,
+            "duplicates": self.duplicates,
+            "rejected": self.rejected,
+            "seconds": round(seconds, 3),
+            "puzzles_per_second": round(self.generated / seconds, 1) if seconds else None,
+        }
+
+
+def generate_chunk(seed: int, chunk: int, size: int, team_name: str, modes: tuple[str, ...]) -> ChunkResult:
+    """Up to size valid puzzles drawn from the chunk's own seed.
+
+    Runs in a worker process, so everything CPU-bound happens here: drawing,
+    placement checks, packing and fingerprinting.
+    """
+    rng = random.Random(f"{seed}:{chunk}")
+    puzzles = []
+    rejected = 0
+    for _ in range(size * MAX_ATTEMPTS_PER_PUZZLE):
+        if len(puzzles) == size:
+            break
+        data = generate_puzzle(rng, team_name, modes)
+        puzzle_id = uuid.UUID(int=rng.getrandbits(128), version=4)
+        if data is None:
+            rejected += 1
+            continue
+        try:
+            rows = build_puzzle_rows(data, puzzle_id=puzzle_id)
+        except ValueError:
+            rejected += 1
+            continue
+        document = {"id": str(puzzle_id), **data.model_dump(mode="json")}
+        puzzles.append(GeneratedPuzzle(document, rows))
+    return ChunkResult(puzzles, rejected)
+
+
+def generate_library(
+    count: int,
+    team_name: str,
+    seed: int = 0,
+    workers: int = 1,
+    chunk_size: int = 500,
+    modes: tuple[str, ...] = ("attacking", "defending"),
+    known_fingerprints: set[str] | None = None,
+    report: GenerationReport | None = None,
+) -> Iterator[GeneratedPuzzle]:
+    """Yield count distinct puzzles, in a deterministic order for the seed.
+
+    Puzzles whose fingerprint is in known_fingerprints, or matches one
+    already yielded, are skipped as duplicates. workers > 1 draws chunks
+    in a process pool.
+    """
+    chunk_size = max(1, min(chunk_size, count))
+    seen = set(known_fingerprints or ())
+    report = report if report is not None else GenerationReport()
+    executor: Executor | None = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    next_chunk = 0
+    try:
+        while report.generated < count:
+            # Enough chunks for what's left, at least one per worker
+            chunks = max(workers, -(-(count - report.generated) // chunk_size))
+            args = [
+                (seed, chunk, chunk_size, team_name, modes)
+                for chunk in range(next_chunk, next_chunk + chunks)
+            ]
+            next_chunk += chunks
+            if executor is None:
+                results = (generate_chunk(*arg) for arg in args)
+            else:
+                results = executor.map(generate_chunk, *zip(*args))
+
+            produced = 0
+            for result in results:
+                report.rejected += result.rejected
+                produced += len(result.puzzles)
+                for puzzle in result.puzzles:
+                    if report.generated == count:
+                        break
+                    fingerprint = puzzle.rows.puzzle["fingerprint"]
+                    if fingerprint in seen:
+                        report.duplicates += 1
+                        continue
+                    seen.add(fingerprint)
+                    report.generated += 1
+                    yield puzzle
+            # Later rounds draw new chunks, so duplicates alone can't stall
+            # this; only templates that produce nothing at all can
+            if not produced:
+                raise RuntimeError("The generator templates produced no valid puzzles")
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
@@ -1,5 +1,6 @@
 from app.db.base import Base
 from app.db.session import engine
 from app.db import models  # IMPORTANT: imports all models
+from app.db import search  # noqa: F401  registers the full-text index DDL
 
 Base.metadata.create_all(bind=engine)
\ No newline at end of file
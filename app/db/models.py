@@ -5,8 +5,13 @@ from sqlalchemy import (
     String,
     Text,
     Integer,
+    SmallInteger,
     ForeignKey,
-    DateTime
+    DateTime,
+    Index,
+    LargeBinary,
+    Boolean,
+    Uuid
 )
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -39,12 +44,19 @@ class Puzzle(Base):
 
     title: Mapped[str] = mapped_column(String)
     description: Mapped[str | None] = mapped_column(Text)
-    team_name: Mapped[str] = mapped_column(String, index=True)
+    # The library's display name, the same for every puzzle with this
+    # team_key; see Team
+    team_name: Mapped[str] = mapped_column(String)
+    # app.core.teams.normalize_team_name(team_name); team filters use this
+    team_key: Mapped[str] = mapped_column(String)
     hint: Mapped[str | None] = mapped_column(Text)
     solution_answer: Mapped[str | None] = mapped_column(Text)
 
     format: Mapped[str] = mapped_column(String)
     mode: Mapped[str] = mapped_column(String)
+    # How validate_puzzle matches submitted players to solution squares:
+    # "exact" by label, "assignment" by the cheapest assignment within a team
+    scoring: Mapped[str] = mapped_column(String, default="exact", server_default="exact")
 
     team_a_color: Mapped[str] = mapped_column(String)
     team_b_color: Mapped[str] = mapped_column(String)
@@ -63,17 +75,31 @@ class Puzzle(Base):
         default=datetime.utcnow
     )
 
+    # Start, solution and locked squares for every player slot, packed by
+    # app.core.packing. Read paths decode this instead of the positions table.
+    positions_packed: Mapped[bytes] = mapped_column(LargeBinary)
+
+    # app.core.fingerprint of the scenario, shared with its mirror image,
+    # and the FINGERPRINT_VERSION it was computed with. NULL, or an older
+    # version, until backfilled by `python -m app.cli fingerprint-puzzles`.
+    fingerprint: Mapped[str | None] = mapped_column(String(64))
+    fingerprint_version: Mapped[int | None] = mapped_column(SmallInteger)
+
     creator = relationship("User", back_populates="puzzles")
 
+    # Children are removed by the ON DELETE CASCADE foreign keys, so
+    # deleting a puzzle doesn't load them first (passive_deletes)
     players = relationship(
         "Player",
         back_populates="puzzle",
-        foreign_keys="Player.puzzle_id"
+        foreign_keys="Player.puzzle_id",
+        passive_deletes=True
     )
 
     positions = relationship(
         "Position",
-        back_populates="puzzle"
+        back_populates="puzzle",
+        passive_deletes=True
     )
 
     ball_carrier = relationship(
@@ -82,6 +108,38 @@ class Puzzle(Base):
         post_update=True
     )
 
+    __table_args__ = (
+        # Keyset pagination for list_puzzles, with and without a team filter
+        Index(
+            "ix_puzzles_team_key_created_at_id",
+            "team_key",
+            created_at.desc(),
+            id.desc()
+        ),
+        Index(
+            "ix_puzzles_created_at_id",
+            created_at.desc(),
+            id.desc()
+        ),
+        # Duplicate lookup in create_puzzle
+        Index(
+            "ix_puzzles_team_key_fingerprint",
+            "team_key",
+            "fingerprint"
+        ),
+    )
+
+# One row per team library. Every spelling of a team name that normalizes
+# to the same key shares the first spelling written, so "eagles u12" and
+# "Eagles-U12" land in the same library. Kept up to date by
+# app.db.bulk.insert_puzzle_rows and queries.delete_puzzle.
+class Team(Base):
+    __tablename__ = "teams"
+
+    key: Mapped[str] = mapped_column(String, primary_key=True)
+    name: Mapped[str] = mapped_column(String)
+    puzzles: Mapped[int] = mapped_column(Integer)
+
 class Player(Base):
     __tablename__ = "players"
 
@@ -91,7 +149,8 @@ class Player(Base):
     )
 
     puzzle_id: Mapped[uuid.UUID] = mapped_column(
-        ForeignKey("puzzles.id", ondelete="CASCADE")
+        ForeignKey("puzzles.id", ondelete="CASCADE"),
+        index=True
     )
 
     team: Mapped[str] = mapped_column(String)
@@ -106,11 +165,14 @@ class Player(Base):
 
     positions = relationship(
         "Position",
-        back_populates="player"
+        back_populates="player",
+        passive_deletes=True
     )
 
 
 
+# Legacy one-row-per-square storage, superseded by Puzzle.positions_packed.
+# Only written when WRITE_LEGACY_POSITIONS is set; nothing reads it.
 class Position(Base):
     __tablename__ = "positions"
 
@@ -119,10 +181,12 @@ class Position(Base):
         default=uuid.uuid4
     )
     puzzle_id: Mapped[uuid.UUID] = mapped_column(
-        ForeignKey("puzzles.id", ondelete="CASCADE")
+        ForeignKey("puzzles.id", ondelete="CASCADE"),
+        index=True
     )
     player_id: Mapped[uuid.UUID] = mapped_column(
-        ForeignKey("players.id", ondelete="CASCADE")
+        ForeignKey("players.id", ondelete="CASCADE"),
+        index=True
     )
 
     square_id: Mapped[int] = mapped_column(Integer)
@@ -134,3 +198,100 @@ class Position(Base):
         foreign_keys=[puzzle_id]
     )
     player = relationship("Player", back_populates="positions")
+
+
+# One row per validate_puzzle call, written behind the request by
+# app.db.attempts. There are no foreign keys, so a buffered batch never
+# fails because its puzzle was deleted or its user is unknown; attempts
+# outlive the puzzles they were made on.
+class Attempt(Base):
+    __tablename__ = "attempts"
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        primary_key=True,
+        default=uuid.uuid4
+    )
+    puzzle_id: Mapped[uuid.UUID] = mapped_column(Uuid)
+    user_id: Mapped[uuid.UUID | None] = mapped_column(Uuid, nullable=True)
+    # The puzzle's team, copied so team stats don't need the puzzle row
+    team_name: Mapped[str | None] = mapped_column(String, nullable=True)
+    format: Mapped[str] = mapped_column(String)
+
+    # Submitted square and distance from the solution per player slot,
+    # packed by app.core.packing.pack_slots. Distances are only set for
+    # the players the solution moves.
+    squares_packed: Mapped[bytes] = mapped_column(LargeBinary)
+    distances_packed: Mapped[bytes] = mapped_column(LargeBinary)
+
+    correct: Mapped[bool] = mapped_column(Boolean)
+
+    # When the attempt was validated, not when it was written
+    created_at: Mapped[datetime] = mapped_column(DateTime)
+
+    __table_args__ = (
+        Index("ix_attempts_puzzle_id_created_at", "puzzle_id", "created_at"),
+        Index("ix_attempts_user_id_created_at", "user_id", "created_at"),
+    )
+
+
+# Summary tables kept up to date by app.db.stats in the same transaction
+# as each batch of attempts, so the stats endpoints read one row (or one
+# short index range) however many attempts there are. Rebuild them from
+# the attempts table with `python -m app.cli rebuild-stats`.
+
+# Progress of one user on one puzzle
+class UserPuzzleProgress(Base):
+    __tablename__ = "user_puzzle_progress"
+
+    puzzle_id: Mapped[uuid.UUID] = mapped_column(Uuid, primary_key=True)
+    user_id: Mapped[uuid.UUID] = mapped_column(Uuid, primary_key=True)
+    attempts: Mapped[int] = mapped_column(Integer)
+    # Attempts up to and including the first correct one; NULL until solved
+    attempts_to_solve: Mapped[int | None] = mapped_column(Integer, nullable=True)
+
+
+class PuzzleStats(Base):
+    __tablename__ = "puzzle_stats"
+
+    puzzle_id: Mapped[uuid.UUID] = mapped_column(Uuid, primary_key=True)
+    attempts: Mapped[int] = mapped_column(Integer)
+    correct_attempts: Mapped[int] = mapped_column(Integer)
+    # Users with at least one attempt, and with at least one correct one.
+    # Attempts without a user_id only count towards the attempt totals.
+    users: Mapped[int] = mapped_column(Integer)
+    solvers: Mapped[int] = mapped_column(Integer)
+    # Sum of UserPuzzleProgress.attempts_to_solve over the solvers
+    attempts_to_solve_total: Mapped[int] = mapped_column(Integer)
+
+
+class TeamStats(Base):
+    __tablename__ = "team_stats"
+
+    team_name: Mapped[str] = mapped_column(String, primary_key=True)
+    attempts: Mapped[int] = mapped_column(Integer)
+    correct_attempts: Mapped[int] = mapped_column(Integer)
+    users: Mapped[int] = mapped_column(Integer)
+    # Distinct (user, puzzle) pairs solved
+    solves: Mapped[int] = mapped_column(Integer)
+
+
+# One leaderboard entry: a user's totals over a team's puzzles
+class TeamUserStats(Base):
+    __tablename__ = "team_user_stats"
+
+    team_name: Mapped[str] = mapped_column(String, primary_key=True)
+    user_id: Mapped[uuid.UUID] = mapped_column(Uuid, primary_key=True)
+    attempts: Mapped[int] = mapped_column(Integer)
+    puzzles_solved: Mapped[int] = mapped_column(Integer)
+
+    __table_args__ = (
+        # Leaderboard order for GET /teams/{team_name}/stats
+        Index(
+            "ix_team_user_stats_leaderboard",
+            "team_name",
+            puzzles_solved.desc(),
+            "attempts",
+            "user_id"
+        ),
+    )
+
@@ -0,0 +1,182 @@
+import uuid
+from datetime import datetime
+
+from sqlalchemy import select, tuple_, update
+from sqlalchemy.orm import Session, joinedload
+
+from app.core.grid import get_grid
+from app.core.packing import phase_squares
+from app.core.teams import normalize_team_name
+from app.db.models import Puzzle, Team
+
+
+def load_puzzle(db: Session, puzzle_id: uuid.UUID) -> Puzzle | None:
+    """Fetch a puzzle together with its players.
+
+    Players are joined onto the puzzle row so the whole puzzle arrives in
+    a single round trip. Squares come from Puzzle.positions_packed, so the
+    positions table isn't read.
+    """
+    return (
+        db.query(Puzzle)
+        .options(
+            joinedload(Puzzle.players)
+        )
+        .filter(Puzzle.id == puzzle_id)
+        .first()
+    )
+
+
+def puzzle_created_at(db: Session, puzzle_id: uuid.UUID) -> datetime | None:
+    """A puzzle's created_at without loading the puzzle, for ETag revalidation."""
+    return db.scalar(select(Puzzle.created_at).where(Puzzle.id == puzzle_id))
+
+
+def squares_by_label(puzzle: Puzzle, position_type: str) -> dict[str, int]:
+    """Map player label -> square id for one position type, decoded from positions_packed."""
+    return phase_squares(get_grid(puzzle.format), puzzle.positions_packed, position_type)
+
+
+def squares_by_player(puzzle: Puzzle, position_type: str) -> dict[uuid.UUID, int]:
+    """Map player id -> square id for one position type of a puzzle loaded with its players."""
+    squares = squares_by_label(puzzle, position_type)
+    return {
+        player.id: squares[player.label]
+        for player in puzzle.players
+        if player.label in squares
+    }
+
+
+def load_scoring_puzzles(db: Session, puzzle_ids: list[uuid.UUID]) -> list[Puzzle]:
+    """Puzzles with just what compile_solution needs, in one round trip.
+
+    That is the puzzle row and its ball carrier: one joined row per puzzle.
+    """
+    return (
+        db.query(Puzzle)
+        .options(
+            joinedload(Puzzle.ball_carrier)
+        )
+        .filter(Puzzle.id.in_(puzzle_ids))
+        .all()
+    )
+
+
+def find_duplicate(db: Session, team_name: str, fingerprint: str) -> uuid.UUID | None:
+    """Id of a puzzle in the team's library with this fingerprint, if any."""
+    return db.scalar(
+        select(Puzzle.id)
+        .where(Puzzle.team_key == normalize_team_name(team_name), Puzzle.fingerprint == fingerprint)
+        .limit(1)
+    )
+
+
+def find_duplicates(db: Session, puzzles: list[dict]) -> dict[tuple[str, str], uuid.UUID]:
+    """Ids of stored puzzles sharing a team and fingerprint with any of these puzzle rows.
+
+    Keyed by (team_key, fingerprint); one query for the whole batch.
+    """
+    if not puzzles:
+        return {}
+    rows = db.execute(
+        select(Puzzle.team_key, Puzzle.fingerprint, Puzzle.id)
+        .where(
+            Puzzle.team_key.in_({puzzle["team_key"] for puzzle in puzzles}),
+            Puzzle.fingerprint.in_({puzzle["fingerprint"] for puzzle in puzzles}),
+        )
+    )
+    return {(team_key, fingerprint): puzzle_id for team_key, fingerprint, puzzle_id in rows}
+
+
+def team_fingerprints(db: Session, team_name: str) -> set[str]:
+    """Fingerprints of every fingerprinted puzzle in a team's library."""
+    return set(db.scalars(
+        select(Puzzle.fingerprint)
+        .where(Puzzle.team_key == normalize_team_name(team_name), Puzzle.fingerprint.is_not(None))
+    ))
+
+
+def iter_formations(db: Session, batch_size: int = 5000):
+    """(id, format, team_key, positions_packed) for every puzzle, streamed in batches."""
+    return db.execute(
+        select(Puzzle.id, Puzzle.format, Puzzle.team_key, Puzzle.positions_packed)
+        .execution_options(yield_per=batch_size)
+    )
+
+
+def load_puzzles_by_id(db: Session, puzzle_ids: list[uuid.UUID]) -> dict[uuid.UUID, Puzzle]:
+    """Puzzle rows, without players, keyed by id; missing ids are left out."""
+    if not puzzle_ids:
+        return {}
+    return {
+        puzzle.id: puzzle
+        for puzzle in db.query(Puzzle).filter(Puzzle.id.in_(puzzle_ids))
+    }
+
+
+# The PuzzleOut fields, plus created_at for the page cursor and ETag
+SUMMARY_COLUMNS = (
+    Puzzle.id,
+    Puzzle.title,
+    Puzzle.description,
+    Puzzle.team_name,
+    Puzzle.hint,
+    Puzzle.format,
+    Puzzle.mode,
+    Puzzle.created_at,
+)
+
+
+def list_puzzles_page(
+    db: Session,
+    team_name: str | None,
+    after: tuple[datetime, uuid.UUID] | None,
+    limit: int,
+    summary: bool = False,
+) -> list:
+    """One page of puzzles, newest first, starting after the (created_at, id) key.
+
+    With summary, returns rows of SUMMARY_COLUMNS instead of Puzzle
+    objects, which skips loading and identity-mapping the rest of each row.
+    """
+    query = db.query(*SUMMARY_COLUMNS) if summary else db.query(Puzzle)
+
+    if team_name:
+        query = query.filter(Puzzle.team_key == normalize_team_name(team_name))
+
+    # Keyset pagination: resume strictly after the last row of the previous
+    # page, so deep pages cost the same index range scan as the first one.
+    if after:
+        query = query.filter(
+            tuple_(Puzzle.created_at, Puzzle.id) < tuple_(*after)
+        )
+
+    return query.order_by(
+        Puzzle.created_at.desc(),
+        Puzzle.id.desc()
+    ).limit(limit).all()
+
+
+def delete_puzzle(db: Session, puzzle_id: uuid.UUID) -> str | None:
+    """Delete a puzzle and take it off its team's count.
+
+    Returns the puzzle's team_key, or None if it didn't exist. The caller
+    commits.
+    """
+    puzzle = db.get(Puzzle, puzzle_id)
+    if not puzzle:
+        return None
+    team_key = puzzle.team_key
+    db.execute(update(Team).where(Team.key == team_key).values(puzzles=Team.puzzles - 1))
+    db.delete(puzzle)
+    return team_key
+
+
+def iter_teams(db: Session):
+    """(key, name, puzzles) for every team with puzzles."""
+    return db.execute(select(Team.key, Team.name, Team.puzzles).where(Team.puzzles > 0))
+
+
+def team_display_name(db: Session, team_name: str) -> str | None:
+    """The display name of the team whose key team_name normalizes to, if it exists."""
+    return db.scalar(select(Team.name).where(Team.key == normalize_team_name(team_name)))
@@ -0,0 +1,142 @@
+"""Full-text search over puzzle titles, descriptions and hints.
+
+The index lives in the database and the database maintains it, so every
+path that writes or removes puzzles (create_puzzle, the bulk importer,
+delete_puzzle) keeps it current without application code:
+
+- PostgreSQL: puzzles.search_vector, a stored generated tsvector column
+  weighting title over description over hint, behind a GIN index.
+- SQLite: the FTS5 table puzzles_fts, filled by triggers on puzzles.
+
+Neither is mapped on Puzzle, so ordinary puzzle queries never load it.
+create_schema creates these objects along with the puzzles table; the
+add_puzzle_search migration creates them in migrated databases.
+"""
+import re
+import uuid
+
+from sqlalchemy import DDL, Double, cast, event, func, literal_column, select, table, tuple_
+from sqlalchemy.orm import Session
+
+from app.core.teams import normalize_team_name
+from app.db.models import Puzzle
+from app.db.queries import SUMMARY_COLUMNS
+
+# Text search configuration for stemming and stop words (PostgreSQL)
+SEARCH_CONFIG = "english"
+
+POSTGRES_DDL = (
+    "ALTER TABLE puzzles ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(title, '')), 'A') || "
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(description, '')), 'B') || "
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(hint, '')), 'C')"
+    ") STORED",
+    "CREATE INDEX ix_puzzles_search_vector ON puzzles USING gin (search_vector)",
+)
+
+# puzzle_id is indexed as a token, so the delete and update triggers find a
+# puzzle's row through the full-text index instead of scanning the table.
+# Searches are limited to the text columns.
+SQLITE_DDL = (
+    "CREATE VIRTUAL TABLE puzzles_fts USING fts5("
+    "puzzle_id, title, description, hint, tokenize = 'porter unicode61')",
+    "CREATE TRIGGER puzzles_fts_insert AFTER INSERT ON puzzles BEGIN "
+    "INSERT INTO puzzles_fts (puzzle_id, title, description, hint) "
+    "VALUES (new.id, new.title, new.description, new.hint); "
+    "END",
+    "CREATE TRIGGER puzzles_fts_delete AFTER DELETE ON puzzles BEGIN "
+    "DELETE FROM puzzles_fts WHERE rowid IN ("
+    "SELECT rowid FROM puzzles_fts WHERE puzzles_fts MATCH 'puzzle_id:\"' || old.id || '\"'); "
+    "END",
+    "CREATE TRIGGER puzzles_fts_update AFTER UPDATE OF title, description, hint ON puzzles BEGIN "
+    "UPDATE puzzles_fts SET title = new.title, description = new.description, hint = new.hint "
+    "WHERE rowid IN ("
+    "SELECT rowid FROM puzzles_fts WHERE puzzles_fts MATCH 'puzzle_id:\"' || old.id || '\"'); "
+    "END",
+)
+
+for statement in POSTGRES_DDL:
+    event.listen(Puzzle.__table__, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+for statement in SQLITE_DDL:
+    event.listen(Puzzle.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+# The triggers go with the puzzles table; the FTS5 table doesn't
+event.listen(
+    Puzzle.__table__,
+    "after_drop",
+    DDL("DROP TABLE IF EXISTS puzzles_fts").execute_if(dialect="sqlite")
+)
+
+# bm25 weights for the puzzles_fts columns, in declaration order
+SQLITE_WEIGHTS = (0.0, 4.0, 2.0, 1.0)
+
+_TERM = re.compile(r'"([^"]*)"|([^\s"]+)')
+_WORD = re.compile(r"\w+")
+
+
+def search_terms(q: str) -> list[list[str]]:
+    """Split a query into terms: a quoted phrase or a single word, each as its words."""
+    terms = []
+    for phrase, word in _TERM.findall(q):
+        words = _WORD.findall(phrase or word)
+        if words:
+            terms.append(words)
+    return terms
+
+
+def fts5_query(terms: list[list[str]]) -> str:
+    """An FTS5 MATCH expression requiring every term in the text columns.
+
+    Terms are only ever words, so quoting them can't produce a syntax error.
+    """
+    return "{title description hint}: (%s)" % " ".join(
+        '"%s"' % " ".join(words) for words in terms
+    )
+
+
+def search_puzzles_page(
+    db: Session,
+    q: str,
+    team_name: str | None,
+    after: tuple[float, uuid.UUID] | None,
+    limit: int,
+) -> list:
+    """One page of puzzles matching q, best match first, starting after the (rank, id) key.
+
+    Returns rows of SUMMARY_COLUMNS plus rank. A puzzle matches when it
+    contains every word of q, with quoted phrases matched as phrases;
+    PostgreSQL also understands `or` and `-word` (websearch_to_tsquery).
+    Ranks depend on the whole index, so a page cursor can skip or repeat
+    a match if puzzles are added or removed between pages.
+    """
+    terms = search_terms(q)
+    if not terms:
+        return []
+
+    if db.get_bind().dialect.name == "postgresql":
+        vector = literal_column("puzzles.search_vector")
+        query = func.websearch_to_tsquery(literal_column(f"'{SEARCH_CONFIG}'::regconfig"), q)
+        # Normalisation 1 divides by 1 + log(document length). ts_rank is
+        # a real; as a double the cursor round-trips it exactly.
+        rank = cast(func.ts_rank(vector, query, 1), Double)
+        stmt = select(*SUMMARY_COLUMNS, rank.label("rank")).where(vector.op("@@")(query))
+    else:
+        fts = table("puzzles_fts")
+        rank = -func.bm25(literal_column("puzzles_fts"), *SQLITE_WEIGHTS)
+        stmt = (
+            select(*SUMMARY_COLUMNS, rank.label("rank"))
+            .select_from(fts)
+            .join(Puzzle, Puzzle.id == literal_column("puzzles_fts.puzzle_id"))
+            .where(literal_column("puzzles_fts").op("MATCH")(fts5_query(terms)))
+        )
+
+    if team_name:
+        stmt = stmt.where(Puzzle.team_key == normalize_team_name(team_name))
+
+    matches = stmt.subquery()
+    stmt = select(matches)
+    if after:
+        stmt = stmt.where(tuple_(matches.c.rank, matches.c.id) < tuple_(*after))
+
+    return db.execute(
+        stmt.order_by(matches.c.rank.desc(), matches.c.id.desc()).limit(limit)
+    ).all()
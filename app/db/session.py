@@ -1,11 +1,15 @@
-from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import sessionmaker, Session
 import os
 
-# Load DATABASE_URL directly from environment to avoid module caching issues
+from app.db.engine import create_async_db_engine, create_db_engine
+from app.db.pool_metrics import POOL_METRICS
+
+# Load DATABASE_URL directly from environment to avoid module caching issues.
+# Any Postgres or SQLite URL works, e.g. sqlite:///local.db or sqlite:// (in memory).
 DATABASE_URL = os.environ.get("DATABASE_URL", "postgresql+psycopg://michaelhodge@localhost:5432/ssp")
 
-engine = create_engine(DATABASE_URL, echo=True)
+engine = create_db_engine(DATABASE_URL)
 SessionLocal = sessionmaker(
     autocommit=False,
     autoflush=False,
@@ -17,4 +21,45 @@ def get_db() -> Session:
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+# Created on first use so sync-only deployments never load an async driver
+async_engine: AsyncEngine | None = None
+AsyncSessionLocal = async_sessionmaker(
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+def get_async_engine() -> AsyncEngine:
+    global async_engine
+    if async_engine is None:
+        async_engine = create_async_db_engine(DATABASE_URL)
+        AsyncSessionLocal.configure(bind=async_engine)
+    return async_engine
+
+async def get_async_db() -> AsyncSession:
+    get_async_engine()
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def configure_database(url: str) -> None:
+    """Point the application at another database, e.g. an in-memory SQLite one in tests.
+
+    SessionLocal is rebound in place, so modules that imported it pick up
+    the new engine. The async engine is recreated on next use.
+    """
+    global DATABASE_URL, engine, async_engine
+    engine.dispose()
+    DATABASE_URL = url
+    engine = create_db_engine(url)
+    SessionLocal.configure(bind=engine)
+    # Disposing an async engine needs an event loop; dropping the reference
+    # closes its pooled connections when they are garbage collected.
+    async_engine = None
+
+def pool_stats() -> dict:
+    """Live pool statistics for each engine that has been created."""
+    stats = {"sync": POOL_METRICS["sync"].snapshot(engine.pool)}
+    if async_engine is not None:
+        stats["async"] = POOL_METRICS["async"].snapshot(async_engine.pool)
+    return stats
@@ -0,0 +1,248 @@
+"""Attempt statistics kept incrementally in summary tables.
+
+apply_attempts folds a batch of attempts rows into the summary tables
+with one upsert per table, inside the transaction that writes the
+attempts. Counters are added in the database (INSERT ... ON CONFLICT DO
+UPDATE), so batches written by several processes at once add up. Whether
+an attempt is a user's first on a puzzle, or their first correct one, is
+read back from the upserted progress row rather than a separate SELECT.
+"""
+import uuid
+from typing import Iterator, Sequence
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+
+from app.db.engine import dialect_insert
+from app.db.models import (
+    Attempt,
+    PuzzleStats,
+    TeamStats,
+    TeamUserStats,
+    UserPuzzleProgress,
+)
+from app.db.queries import team_display_name
+
+SUMMARY_MODELS = (UserPuzzleProgress, PuzzleStats, TeamStats, TeamUserStats)
+
+
+def _add_counts(db: Session, model, keys: Sequence[str], rows: list[dict], returning=()):
+    """Insert rows, adding their other columns onto any existing row with the same keys.
+
+    Rows are written in key order, so concurrent batches lock rows in the
+    same order and can't deadlock.
+    """
+    rows = sorted(rows, key=lambda row: tuple(row[key] for key in keys))
+    table = model.__table__
+    stmt = dialect_insert(db, model)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=list(keys),
+        set_={
+            column: table.c[column] + stmt.excluded[column]
+            for column in rows[0]
+            if column not in keys
+        },
+    )
+    if returning:
+        result = db.execute(stmt.returning(*returning, sort_by_parameter_order=True), rows).all()
+        return rows, result
+    db.execute(stmt, rows)
+    return rows, None
+
+
+def _record_progress(db: Session, progress: list[dict]) -> list[tuple[dict, bool, int | None]]:
+    """Upsert user progress.
+
+    Returns (row, whether the batch has the user's first attempt, the
+    user's attempts_to_solve if the batch has their first correct one)
+    per row.
+    """
+    progress = sorted(progress, key=lambda row: (row["puzzle_id"], row["user_id"]))
+    table = UserPuzzleProgress.__table__
+    stmt = dialect_insert(db, UserPuzzleProgress)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["puzzle_id", "user_id"],
+        set_={
+            "attempts": table.c.attempts + stmt.excluded.attempts,
+            # The batch's first correct attempt only counts if there wasn't
+            # an earlier one
+            "attempts_to_solve": func.coalesce(
+                table.c.attempts_to_solve,
+                table.c.attempts + stmt.excluded.attempts_to_solve,
+            ),
+        },
+    )
+    result = db.execute(
+        stmt.returning(table.c.attempts, table.c.attempts_to_solve, sort_by_parameter_order=True),
+        progress
+    ).all()
+    return [
+        (
+            row,
+            attempts == row["attempts"],
+            # Solved, and not before this batch's attempts
+            attempts_to_solve
+            if attempts_to_solve is not None and attempts_to_solve > attempts - row["attempts"]
+            else None,
+        )
+        for row, (attempts, attempts_to_solve) in zip(progress, result)
+    ]
+
+
+def apply_attempts(db: Session, rows: list[dict]) -> None:
+    """Fold attempts rows, in the order they were made, into the summary tables.
+
+    Attempts without a user_id count towards the attempt totals only.
+    Doesn't commit.
+    """
+    if not rows:
+        return
+
+    progress: dict[tuple[uuid.UUID, uuid.UUID], dict] = {}
+    team_of: dict[uuid.UUID, str | None] = {}
+    puzzles: dict[uuid.UUID, dict] = {}
+    for row in rows:
+        puzzle_id = row["puzzle_id"]
+        team_of[puzzle_id] = row["team_name"]
+        stats = puzzles.setdefault(puzzle_id, {
+            "puzzle_id": puzzle_id,
+            "attempts": 0,
+            "correct_attempts": 0,
+            "users": 0,
+            "solvers": 0,
+            "attempts_to_solve_total": 0,
+        })
+        stats["attempts"] += 1
+        stats["correct_attempts"] += bool(row["correct"])
+
+        if row["user_id"] is None:
+            continue
+        entry = progress.setdefault((puzzle_id, row["user_id"]), {
+            "puzzle_id": puzzle_id,
+            "user_id": row["user_id"],
+            "attempts": 0,
+            "attempts_to_solve": None,
+        })
+        entry["attempts"] += 1
+        if row["correct"] and entry["attempts_to_solve"] is None:
+            entry["attempts_to_solve"] = entry["attempts"]
+
+    team_users: dict[tuple[str, uuid.UUID], dict] = {}
+    for entry, first_attempt, solved_in in (_record_progress(db, list(progress.values())) if progress else []):
+        stats = puzzles[entry["puzzle_id"]]
+        stats["users"] += first_attempt
+        if solved_in is not None:
+            stats["solvers"] += 1
+            stats["attempts_to_solve_total"] += solved_in
+        team_name = team_of[entry["puzzle_id"]]
+        if team_name is None:
+            continue
+        team_user = team_users.setdefault((team_name, entry["user_id"]), {
+            "team_name": team_name,
+            "user_id": entry["user_id"],
+            "attempts": 0,
+            "puzzles_solved": 0,
+        })
+        team_user["attempts"] += entry["attempts"]
+        team_user["puzzles_solved"] += solved_in is not None
+
+    teams: dict[str, dict] = {}
+    for puzzle_id, stats in puzzles.items():
+        team_name = team_of[puzzle_id]
+        if team_name is None:
+            continue
+        team = teams.setdefault(team_name, {
+            "team_name": team_name,
+            "attempts": 0,
+            "correct_attempts": 0,
+            "users": 0,
+            "solves": 0,
+        })
+        team["attempts"] += stats["attempts"]
+        team["correct_attempts"] += stats["correct_attempts"]
+        team["solves"] += stats["solvers"]
+
+    if team_users:
+        written, result = _add_counts(
+            db, TeamUserStats, ("team_name", "user_id"), list(team_users.values()),
+            returning=(TeamUserStats.attempts,)
+        )
+        for row, (attempts,) in zip(written, result):
+            if attempts == row["attempts"]:
+                teams[row["team_name"]]["users"] += 1
+
+    _add_counts(db, PuzzleStats, ("puzzle_id",), list(puzzles.values()))
+    if teams:
+        _add_counts(db, TeamStats, ("team_name",), list(teams.values()))
+
+
+def rebuild_stats(db: Session, batch_size: int = 5000) -> Iterator[int]:
+    """Recompute the summary tables from the attempts table.
+
+    Runs in one transaction, committed at the end, so readers see the old
+    stats until the new ones are complete. Yields the number of attempts
+    applied after each batch. Attempts written while it runs may be
+    miscounted, so run it while nothing is validating.
+    """
+    for model in SUMMARY_MODELS:
+        db.execute(delete(model))
+
+    columns = (Attempt.puzzle_id, Attempt.user_id, Attempt.team_name, Attempt.correct)
+    result = db.execute(
+        select(*columns)
+        .order_by(Attempt.created_at, Attempt.id)
+        .execution_options(yield_per=batch_size)
+    )
+    for batch in result.partitions():
+        apply_attempts(db, [row._asdict() for row in batch])
+        yield len(batch)
+    db.commit()
+
+
+def puzzle_stats(db: Session, puzzle_id: uuid.UUID) -> dict:
+    """The PuzzleStatsOut payload for a puzzle: one primary key lookup."""
+    stats = db.get(PuzzleStats, puzzle_id)
+    attempts = correct = users = solvers = attempts_to_solve = 0
+    if stats is not None:
+        attempts = stats.attempts
+        correct = stats.correct_attempts
+        users = stats.users
+        solvers = stats.solvers
+        attempts_to_solve = stats.attempts_to_solve_total
+    return {
+        "puzzle_id": puzzle_id,
+        "attempts": attempts,
+        "correct_attempts": correct,
+        "users": users,
+        "solvers": solvers,
+        "solve_rate": solvers / users if users else None,
+        "average_attempts_to_solve": attempts_to_solve / solvers if solvers else None,
+    }
+
+
+def team_stats(db: Session, team_name: str, limit: int) -> dict:
+    """The TeamStatsOut payload for a team: its totals and the top of its leaderboard.
+
+    team_name may be any spelling of the team's name. The leaderboard is
+    one range scan of ix_team_user_stats_leaderboard. Users are ranked by
+    puzzles solved, then by fewest attempts.
+    """
+    team_name = team_display_name(db, team_name) or team_name
+    stats = db.get(TeamStats, team_name)
+    leaderboard = db.execute(
+        select(TeamUserStats.user_id, TeamUserStats.puzzles_solved, TeamUserStats.attempts)
+        .where(TeamUserStats.team_name == team_name)
+        .order_by(TeamUserStats.puzzles_solved.desc(), TeamUserStats.attempts, TeamUserStats.user_id)
+        .limit(limit)
+    ).all()
+    return {
+        "team_name": team_name,
+        "attempts": stats.attempts if stats else 0,
+        "correct_attempts": stats.correct_attempts if stats else 0,
+        "users": stats.users if stats else 0,
+        "solves": stats.solves if stats else 0,
+        "leaderboard": [
+            {"user_id": user_id, "puzzles_solved": solved, "attempts": attempts}
+            for user_id, solved, attempts in leaderboard
+        ],
+    }
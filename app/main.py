@@ -1,9 +1,24 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.api.routes import router
+from app.api.routes import router, puzzle_router
+from app.api.async_routes import router as async_puzzle_router
+from app.api.metrics import MetricsMiddleware, router as metrics_router
 from app.core.config import settings
+from app.db.attempts import attempt_log
+from app.db.session import pool_stats
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    attempt_log.start()
+    yield
+    # Write buffered attempts before the process exits
+    attempt_log.close()
 
-app = FastAPI(title="Soccer Puzzle Coach")
+
+app = FastAPI(title="Soccer Puzzle Coach", lifespan=lifespan)
 
 # Configure CORS for production
 # Allow all origins for MVP - tighten in production
@@ -13,8 +28,12 @@ app.add_middleware(
     allow_credentials=False,  # Must be False when using wildcard origins
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor", "X-Query-Count", "X-Query-Profile"],
 )
 
+if settings.METRICS_ENABLED or settings.QUERY_PROFILING:
+    app.add_middleware(MetricsMiddleware, profile=settings.QUERY_PROFILING)
+
 @app.get("/health")
 def health_check():
     import os
@@ -34,4 +53,11 @@ def health_check():
         "timestamp": datetime.utcnow().isoformat()
     }
 
+@app.get("/health/db")
+def database_pool_health():
+    return pool_stats()
+
 app.include_router(router)
+if settings.METRICS_ENABLED:
+    app.include_router(metrics_router)
+app.include_router(async_puzzle_router if settings.DB_ASYNC else puzzle_router)
@@ -0,0 +1,28 @@
+"""pytest fixtures for guarding per-endpoint query counts.
+
+Enable with ``pytest -p app.pytest_plugin`` or ``pytest_plugins = ["app.pytest_plugin"]``
+in a conftest.py, then:
+
+    def test_get_puzzle_is_one_query(client, puzzle_id, query_budget):
+        with query_budget(1):
+            client.get(f"/puzzles/{puzzle_id}")
+"""
+import pytest
+
+from app.core.profiling import query_budget as _query_budget
+
+
+@pytest.fixture
+def query_budget():
+    """Context manager factory: query_budget(max_queries, engine=None).
+
+    Fails the test if the block runs more than max_queries statements on
+    engine (the application engine by default), listing each statement
+    and where it was issued from.
+    """
+    def budget(max_queries: int, engine=None):
+        if engine is None:
+            from app.db.session import engine
+        return _query_budget(engine, max_queries)
+
+    return budget
@@ -1,10 +1,13 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 from typing import Dict, List, Literal
 import uuid
 
+from app.core.config import settings
+from app.core.grid import GRID_FORMATS
+
 class PositionInput(BaseModel):
     player_label: str
-    square_id: int = Field(ge=0, le=62)
+    square_id: int = Field(ge=1)
     indicator: str | None = None
 
 class PuzzleCreate(BaseModel):
@@ -14,8 +17,9 @@ class PuzzleCreate(BaseModel):
     hint: str | None = None
     solution_answer: str | None = None
 
-    format: Literal["4v4"]
+    format: Literal["4v4", "7v7", "9v9", "11v11"]
     mode: Literal["attacking", "defending"]
+    scoring: Literal["exact", "assignment"] = "exact"
 
     team_a_color: str
     team_b_color: str
@@ -26,6 +30,29 @@ class PuzzleCreate(BaseModel):
     solution_positions: List[PositionInput]
     locked_positions: List[PositionInput] = []
 
+    @model_validator(mode="after")
+    def check_squares_on_grid(self):
+        grid = GRID_FORMATS[self.format]
+        for pos in [*self.starting_positions, *self.solution_positions, *self.locked_positions]:
+            if not grid.is_valid_square(pos.square_id):
+                raise ValueError(
+                    f"square_id {pos.square_id} is off the {self.format} grid"
+                )
+        return self
+
+class PuzzleImport(PuzzleCreate):
+    # Optional client-supplied id so exported libraries keep their ids
+    id: uuid.UUID | None = None
+
+class ImportErrorOut(BaseModel):
+    line: int
+    detail: str | list
+
+class ImportReportOut(BaseModel):
+    imported: int
+    failed: int
+    errors: List[ImportErrorOut]
+
 class PuzzleOut(BaseModel):
     id: uuid.UUID
     title: str
@@ -38,10 +65,41 @@ class PuzzleOut(BaseModel):
     class Config:
         from_attributes = True
 
+class PuzzleSearchResultOut(PuzzleOut):
+    # Relevance to the query; higher is better. Only comparable within one search.
+    rank: float
+
+class TeamSuggestionOut(BaseModel):
+    name: str
+    # Puzzles in the team's library
+    puzzles: int
+
+class SimilarPuzzleOut(PuzzleOut):
+    # Summed Manhattan distance between the two start formations
+    distance: int
+
+class LayoutQuery(BaseModel):
+    format: Literal["4v4", "7v7", "9v9", "11v11"]
+    starting_positions: List[PositionInput]
+    team_name: str | None = None
+    k: int = Field(settings.SIMILAR_PUZZLES_LIMIT, ge=1, le=settings.SIMILAR_PUZZLES_LIMIT_MAX)
+    max_distance: int | None = Field(None, ge=0)
+
+    @model_validator(mode="after")
+    def check_squares_on_grid(self):
+        grid = GRID_FORMATS[self.format]
+        for pos in self.starting_positions:
+            if not grid.is_valid_square(pos.square_id):
+                raise ValueError(
+                    f"square_id {pos.square_id} is off the {self.format} grid"
+                )
+        return self
+
 class PlayerOut(BaseModel):
     id: uuid.UUID
     label: str
-    start_square: int
+    # None for a player the puzzle doesn't place at the start
+    start_square: int | None = None
     has_ball: bool
     locked: bool = False
     indicator: str | None = None
@@ -63,6 +121,7 @@ class PuzzleDetailOut(BaseModel):
     hint: str | None
     format: str
     mode: str
+    scoring: str
 
     grid: GridOut
     teams: Dict[str, TeamOut]
@@ -73,6 +132,8 @@ class PositionSubmission(BaseModel):
 
 class PuzzleValidationRequest(BaseModel):
     positions: List[PositionSubmission]
+    # Who made the attempt, for the attempts log
+    user_id: uuid.UUID | None = None
 
 class PlayerFeedback(BaseModel):
     player_label: str
@@ -83,4 +144,36 @@ class PuzzleValidationResponse(BaseModel):
     correct: bool
     solution_answer: str | None = None
     feedback: str | None = None
-    player_feedback: List[PlayerFeedback] = []
\ No newline at end of file
+    player_feedback: List[PlayerFeedback] = []
+
+class PuzzleStatsOut(BaseModel):
+    puzzle_id: uuid.UUID
+    attempts: int
+    correct_attempts: int
+    users: int
+    solvers: int
+    # solvers / users, over users who sent a user_id
+    solve_rate: float | None
+    average_attempts_to_solve: float | None
+
+class LeaderboardEntryOut(BaseModel):
+    user_id: uuid.UUID
+    puzzles_solved: int
+    attempts: int
+
+class TeamStatsOut(BaseModel):
+    team_name: str
+    attempts: int
+    correct_attempts: int
+    users: int
+    solves: int
+    leaderboard: List[LeaderboardEntryOut]
+
+class BatchValidationRequest(PuzzleValidationRequest):
+    puzzle_id: uuid.UUID
+
+class BatchValidationResult(BaseModel):
+    puzzle_id: uuid.UUID
+    status_code: int
+    detail: str | None = None
+    result: PuzzleValidationResponse | None = None
@@ -0,0 +1,247 @@
+"""Benchmark the puzzle API end to end through an in-process ASGI client.
+
+Seeds a fresh database with synthetic puzzles, then drives create_puzzle,
+list_puzzles, get_puzzle, validate_puzzle and delete_puzzle at each
+concurrency level and prints latency percentiles and throughput as JSON.
+Everything is seeded from --seed, so two runs on different commits see the
+same puzzles and the same request sequence. Requires httpx.
+
+By default the database is a new SQLite file in a temporary directory, so
+no server or network is needed. Pass --database to benchmark against
+another DATABASE_URL (for example a local Postgres migrated to head); any
+puzzles left under --team are deleted first.
+
+    python bench/api.py --puzzles 10000 --requests 2000 --concurrency 1,10,50 -o before.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench.generator import FORMATS, make_puzzle, make_submission
+
+SCENARIOS = ("list_puzzles", "get_puzzle", "validate_puzzle", "create_puzzle", "delete_puzzle")
+
+
+def seed(count: int, team_name: str, formats: list[str], sample_size: int, rng: random.Random) -> list[dict]:
+    """Import count puzzles and return a uniform sample of sample_size of them."""
+    from sqlalchemy import delete
+
+    from app.db.bulk import PuzzleImporter
+    from app.db.models import Puzzle
+    from app.db.session import SessionLocal
+
+    sample = []
+    db = SessionLocal()
+    try:
+        db.execute(delete(Puzzle).where(Puzzle.team_name == team_name))
+        db.commit()
+
+        importer = PuzzleImporter(db, batch_size=1000)
+        for n in range(count):
+            puzzle = make_puzzle(rng, team_name, rng.choice(formats), with_id=True)
+            # Reservoir sampling keeps memory flat however many puzzles are seeded
+            if len(sample) < sample_size:
+                sample.append(puzzle)
+            else:
+                j = rng.randrange(n + 1)
+                if j < sample_size:
+                    sample[j] = puzzle
+            if importer.feed(n + 1, json.dumps(puzzle)):
+                importer.flush()
+                print(f"seeded {importer.report.imported}/{count}", file=sys.stderr)
+        importer.flush()
+    finally:
+        db.close()
+
+    if importer.report.failed:
+        raise SystemExit(f"Seeding failed: {importer.report.errors[:5]}")
+    return sample
+
+
+def percentiles(latencies: list[float], elapsed: float, errors: int) -> dict:
+    quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "requests_per_second": round(len(latencies) / elapsed, 1),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3),
+        "p50_ms": round(quantiles[49] * 1000, 3),
+        "p95_ms": round(quantiles[94] * 1000, 3),
+        "p99_ms": round(quantiles[98] * 1000, 3),
+    }
+
+
+async def run(client, requests: list[tuple], concurrency: int) -> tuple[dict, list]:
+    """Send (method, url, body) requests with at most concurrency in flight."""
+    latencies = []
+    responses = []
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(method, url, body):
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.request(method, url, json=body)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+            responses.append(response)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(*request) for request in requests))
+    return percentiles(latencies, time.perf_counter() - started, errors), responses
+
+
+async def list_cursors(client, team_name: str, limit: int, pages: int) -> list[str | None]:
+    """Cursors for the first pages of the team's library, so list_puzzles also pages deep."""
+    cursors = [None]
+    while len(cursors) < pages:
+        params = {"team_name": team_name, "limit": limit}
+        if cursors[-1]:
+            params["cursor"] = cursors[-1]
+        response = await client.get("/puzzles", params=params)
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+        cursors.append(cursor)
+    return cursors
+
+
+async def benchmark(args, sample: list[dict], rng: random.Random) -> dict:
+    import httpx
+    from app.main import app
+
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        cursors = await list_cursors(client, args.team, args.page_size, pages=20)
+
+        for concurrency in args.concurrency:
+            level = results[str(concurrency)] = {}
+            n = args.requests
+
+            def page_url():
+                cursor = rng.choice(cursors)
+                url = f"/puzzles?team_name={args.team}&limit={args.page_size}"
+                return url + f"&cursor={cursor}" if cursor else url
+
+            level["list_puzzles"], _ = await run(
+                client, [("GET", page_url(), None) for _ in range(n)], concurrency
+            )
+            level["get_puzzle"], _ = await run(
+                client, [("GET", f"/puzzles/{rng.choice(sample)['id']}", None) for _ in range(n)], concurrency
+            )
+            validations = []
+            for _ in range(n):
+                puzzle = rng.choice(sample)
+                validations.append(("POST", f"/puzzles/{puzzle['id']}/validate", make_submission(rng, puzzle)))
+            level["validate_puzzle"], _ = await run(client, validations, concurrency)
+
+            level["create_puzzle"], created = await run(
+                client,
+                [("POST", "/puzzles", make_puzzle(rng, args.team, rng.choice(args.formats))) for _ in range(n)],
+                concurrency,
+            )
+            # Delete exactly what this level created, so every level starts from the seeded library
+            created_ids = [r.json()["id"] for r in created if r.status_code == 200]
+            level["delete_puzzle"], _ = await run(
+                client, [("DELETE", f"/puzzles/{puzzle_id}", None) for puzzle_id in created_ids], concurrency
+            )
+
+    from app.db import session
+    if session.async_engine is not None:
+        await session.async_engine.dispose()
+    return results
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--puzzles", type=int, default=1000, help="Puzzles to seed")
+    parser.add_argument("--requests", type=int, default=1000, help="Requests per scenario and concurrency level")
+    parser.add_argument("--concurrency", default="1,10,50", help="Comma-separated concurrency levels")
+    parser.add_argument("--formats", default="4v4", help=f"Comma-separated formats to generate ({', '.join(FORMATS)})")
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--sample", type=int, default=1000, help="Seeded puzzles to draw get/validate targets from")
+    parser.add_argument("--database", help="DATABASE_URL to benchmark (default: a fresh SQLite file)")
+    parser.add_argument("--team", default="bench")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-cache", action="store_true", help="Disable the solution cache so every validation hits the database")
+    parser.add_argument("--async-db", action="store_true", help="Serve the puzzle endpoints from the DB_ASYNC handlers")
+    parser.add_argument("-o", "--output", help="Write the JSON report here as well as to stdout")
+    args = parser.parse_args()
+    args.concurrency = [int(c) for c in args.concurrency.split(",")]
+    args.formats = args.formats.split(",")
+
+    # Settings are read at import, so configure the environment before importing the app
+    tmpdir = None
+    if args.database is None:
+        tmpdir = tempfile.TemporaryDirectory(prefix="bench-")
+        args.database = f"sqlite:///{os.path.join(tmpdir.name, 'bench.db')}"
+    os.environ["DATABASE_URL"] = args.database
+    os.environ["DB_ASYNC"] = "true" if args.async_db else "false"
+    os.environ["DB_ECHO"] = "false"
+    os.environ["QUERY_PROFILING"] = "false"
+    if args.no_cache:
+        os.environ["SOLUTION_CACHE_SIZE"] = "0"
+
+    from app.db.engine import migrate
+    from app.db.session import engine
+
+    try:
+        migrate(engine)
+
+        rng = random.Random(args.seed)
+        started = time.perf_counter()
+        sample = seed(args.puzzles, args.team, args.formats, args.sample, rng)
+        seed_seconds = time.perf_counter() - started
+
+        results = asyncio.run(benchmark(args, sample, rng))
+    finally:
+        engine.dispose()
+        if tmpdir is not None:
+            tmpdir.cleanup()
+
+    report = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "database": engine.dialect.name,
+        "db_async": args.async_db,
+        "solution_cache": not args.no_cache,
+        "puzzles": args.puzzles,
+        "formats": args.formats,
+        "requests": args.requests,
+        "seed": args.seed,
+        "seed_seconds": round(seed_seconds, 3),
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
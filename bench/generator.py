@@ -0,0 +1,51 @@
+"""Deterministic synthetic puzzles for the benchmarks."""
+import random
+import uuid
+
+FORMATS = {
+    # format: (squares, players per team); square ids are 1..squares
+    "4v4": (63, 4),
+    "7v7": (165, 7),
+    "9v9": (247, 9),
+    "11v11": (315, 11),
+}
+
+
+def make_puzzle(rng: random.Random, team_name: str, format: str = "4v4", with_id: bool = False) -> dict:
+    """A valid PuzzleCreate document (PuzzleImport with with_id) drawn from rng."""
+    total, per_team = FORMATS[format]
+    labels = [f"{team}{i}" for team in "AB" for i in range(1, per_team + 1)]
+    squares = rng.sample(range(1, total + 1), len(labels))
+    movers = rng.sample(labels, min(3, len(labels)))
+    # Movers land on distinct squares that no player left standing occupies
+    standing = {square for label, square in zip(labels, squares) if label not in movers}
+    targets = rng.sample(sorted(set(range(1, total + 1)) - standing), len(movers))
+    puzzle = {
+        "title": f"Bench puzzle {rng.randrange(10**9)}",
+        "team_name": team_name,
+        "format": format,
+        "mode": rng.choice(["attacking", "defending"]),
+        "team_a_color": "#ff0000",
+        "team_b_color": "#0000ff",
+        "ball_carrier_label": "A1",
+        "starting_positions": [
+            {"player_label": label, "square_id": square}
+            for label, square in zip(labels, squares)
+        ],
+        "solution_positions": [
+            {"player_label": label, "square_id": square}
+            for label, square in zip(movers, targets)
+        ],
+    }
+    if with_id:
+        puzzle["id"] = str(uuid.UUID(int=rng.getrandbits(128), version=4))
+    return puzzle
+
+
+def make_submission(rng: random.Random, puzzle: dict) -> dict:
+    """A random answer to a puzzle from make_puzzle: every mover on some square."""
+    total, _ = FORMATS[puzzle["format"]]
+    return {"positions": [
+        {"player_label": pos["player_label"], "square_id": rng.randrange(1, total + 1)}
+        for pos in puzzle["solution_positions"]
+    ]}
@@ -0,0 +1,140 @@
+"""Compare per-request CPU for get_puzzle and list_puzzles with and without prebuilt JSON responses.
+
+Seeds one large team into a fresh SQLite database, then requests full
+pages of the team's listing and individual puzzles sequentially through an
+in-process ASGI client, once with FAST_JSON_RESPONSES off and once with it
+on, each in its own process. CPU time is process time, so it includes the
+query and the framework as well as serialization. Also checks that both
+modes sent the same bytes. Requires httpx.
+
+    python bench/serialization.py --puzzles 5000 --requests 500
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench.generator import FORMATS, make_puzzle
+
+
+def seed(count: int, team_name: str) -> list[str]:
+    from app.db.bulk import PuzzleImporter
+    from app.db.session import SessionLocal
+
+    rng = random.Random(0)
+    ids = []
+    db = SessionLocal()
+    try:
+        importer = PuzzleImporter(db, batch_size=1000)
+        for line_no in range(1, count + 1):
+            puzzle = make_puzzle(rng, team_name, rng.choice(list(FORMATS)), with_id=True)
+            ids.append(puzzle["id"])
+            if importer.feed(line_no, json.dumps(puzzle)):
+                importer.flush()
+        importer.flush()
+    finally:
+        db.close()
+    return ids
+
+
+async def drive(ids: list[str], team_name: str, requests: int, page_size: int) -> dict:
+    import httpx
+    from app.main import app
+
+    rng = random.Random(1)
+    scenarios = {
+        "list_puzzles": [f"/puzzles?team_name={team_name}&limit={page_size}"] * requests,
+        "get_puzzle": [f"/puzzles/{rng.choice(ids)}" for _ in range(requests)],
+    }
+
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for name, urls in scenarios.items():
+            # Warm up caches and lazy imports before measuring
+            for url in urls[:20]:
+                (await client.get(url)).raise_for_status()
+            digest = hashlib.sha256()
+            cpu = time.process_time()
+            wall = time.perf_counter()
+            for url in urls:
+                response = await client.get(url)
+                response.raise_for_status()
+                digest.update(response.content)
+            cpu = time.process_time() - cpu
+            wall = time.perf_counter() - wall
+            results[name] = {
+                "requests": len(urls),
+                "cpu_ms_per_request": round(cpu / len(urls) * 1000, 3),
+                "wall_ms_per_request": round(wall / len(urls) * 1000, 3),
+                "body_sha256": digest.hexdigest(),
+            }
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--puzzles", type=int, default=5000)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--page-size", type=int, default=200, help="list_puzzles limit")
+    parser.add_argument("--team", default="bench-serialization")
+    parser.add_argument("--mode", choices=["before", "after"], help=argparse.SUPPRESS)
+    parser.add_argument("--ids", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        # Child process: settings are read at import, so configure before importing the app
+        with open(args.ids) as f:
+            ids = json.load(f)
+        result = asyncio.run(drive(ids, args.team, args.requests, args.page_size))
+        print(json.dumps(result))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        env = dict(os.environ, DATABASE_URL=database_url, METRICS_ENABLED="false", ATTEMPT_LOG_ENABLED="false")
+        os.environ.update(env)
+
+        from app.db.engine import create_schema
+        from app.db.session import engine
+        create_schema(engine)
+        ids_path = os.path.join(tmp, "ids.json")
+        with open(ids_path, "w") as f:
+            json.dump(seed(args.puzzles, args.team), f)
+
+        results = {}
+        for mode in ("before", "after"):
+            output = subprocess.run(
+                [
+                    sys.executable, __file__,
+                    "--mode", mode,
+                    "--ids", ids_path,
+                    "--team", args.team,
+                    "--requests", str(args.requests),
+                    "--page-size", str(args.page_size),
+                ],
+                env=dict(env, FAST_JSON_RESPONSES="true" if mode == "after" else "false"),
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+            results[mode] = json.loads(output.strip().splitlines()[-1])
+
+    for name in results["before"]:
+        before, after = results["before"][name], results["after"][name]
+        results.setdefault("cpu_speedup", {})[name] = round(before["cpu_ms_per_request"] / after["cpu_ms_per_request"], 2)
+        results.setdefault("identical_bodies", {})[name] = before["body_sha256"] == after["body_sha256"]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""Compare validate_puzzle throughput with sync and async database handlers.
+
+Seeds puzzles into DATABASE_URL, then runs the same concurrent validation
+load against the app once with DB_ASYNC off and once with it on, each in its
+own process, through an in-process ASGI client (requires httpx).
+
+    DATABASE_URL=postgresql+psycopg://... python bench/sync_vs_async.py \\
+        --puzzles 200 --requests 5000 --concurrency 100 --no-cache
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench.generator import make_puzzle, make_submission
+
+
+def seed(count: int, team_name: str) -> list[str]:
+    from app.db.bulk import PuzzleImporter
+    from app.db.session import SessionLocal
+
+    rng = random.Random(0)
+    db = SessionLocal()
+    try:
+        importer = PuzzleImporter(db)
+        for line_no in range(1, count + 1):
+            if importer.feed(line_no, json.dumps(make_puzzle(rng, team_name))):
+                importer.flush()
+        importer.flush()
+    finally:
+        db.close()
+
+    from app.db.bulk import iter_export
+    db = SessionLocal()
+    try:
+        return [json.loads(line) for line in iter_export(db, team_name)]
+    finally:
+        db.close()
+
+
+async def drive(documents: list[dict], requests: int, concurrency: int) -> dict:
+    import httpx
+    from app.main import app
+
+    rng = random.Random(1)
+    payloads = []
+    for _ in range(requests):
+        doc = rng.choice(documents)
+        payloads.append((doc["id"], make_submission(rng, doc)))
+
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one(puzzle_id, body):
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.post(f"/puzzles/{puzzle_id}/validate", json=body)
+                latencies.append(time.perf_counter() - start)
+                response.raise_for_status()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(puzzle_id, body) for puzzle_id, body in payloads))
+        elapsed = time.perf_counter() - started
+
+    from app.db import session
+    if session.async_engine is not None:
+        await session.async_engine.dispose()
+
+    quantiles = statistics.quantiles(latencies, n=100)
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 3),
+        "requests_per_second": round(requests / elapsed, 1),
+        "p50_ms": round(quantiles[49] * 1000, 2),
+        "p95_ms": round(quantiles[94] * 1000, 2),
+        "p99_ms": round(quantiles[98] * 1000, 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--puzzles", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--no-cache", action="store_true", help="Disable the solution cache so every request hits the database")
+    parser.add_argument("--team", default="bench-sync-vs-async")
+    parser.add_argument("--mode", choices=["sync", "async"], help=argparse.SUPPRESS)
+    parser.add_argument("--documents", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        # Child process: settings are read at import, so configure before importing the app
+        with open(args.documents) as f:
+            documents = json.load(f)
+        result = asyncio.run(drive(documents, args.requests, args.concurrency))
+        print(json.dumps(result))
+        return
+
+    documents = seed(args.puzzles, args.team)
+    documents_path = os.path.abspath(f".bench-{os.getpid()}.json")
+    with open(documents_path, "w") as f:
+        json.dump(documents, f)
+
+    results = {}
+    try:
+        for mode in ("sync", "async"):
+            env = dict(os.environ, DB_ASYNC="true" if mode == "async" else "false")
+            if args.no_cache:
+                env["SOLUTION_CACHE_SIZE"] = "0"
+            output = subprocess.run(
+                [
+                    sys.executable, __file__,
+                    "--mode", mode,
+                    "--documents", documents_path,
+                    "--requests", str(args.requests),
+                    "--concurrency", str(args.concurrency),
+                ],
+                env=env,
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+            results[mode] = json.loads(output.strip().splitlines()[-1])
+    finally:
+        os.remove(documents_path)
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -35,9 +35,18 @@ export default function Solve({ onSelectPuzzle }: SolveProps) {
     window.history.pushState({}, "", newUrl);
     
     try {
-      const res = await fetch(`${API_URL}/puzzles?team_name=${encodeURIComponent(teamName)}`);
-      const data = await res.json();
-      setPuzzles(data);
+      // GET /puzzles returns one page at a time; follow X-Next-Cursor to the end
+      const all: any[] = [];
+      let cursor: string | null = null;
+      do {
+        const params = new URLSearchParams({ team_name: teamName, limit: "200" });
+        if (cursor) params.set("cursor", cursor);
+        const res = await fetch(`${API_URL}/puzzles?${params}`);
+        if (!res.ok) throw new Error(`Failed to load puzzles: ${res.status}`);
+        all.push(...(await res.json()));
+        cursor = res.headers.get("X-Next-Cursor");
+      } while (cursor);
+      setPuzzles(all);
     } catch (error) {
       console.error("Error fetching puzzles:", error);
       setPuzzles([]);
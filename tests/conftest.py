@@ -0,0 +1,73 @@
+import os
+
+# Settings are read at import, so configure them before importing the app.
+# Attempts are written from a background thread, which would show up in
+# query counts, so the log is off unless a test turns it on.
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("ATTEMPT_LOG_ENABLED", "false")
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.similarity import formation_index
+from app.core.solutions import solution_cache
+from app.core.teams import team_index
+from app.db import session
+from app.db.engine import create_schema
+
+pytest_plugins = ["app.pytest_plugin"]
+
+
+def puzzle_payload(**overrides) -> dict:
+    """A valid 4v4 PuzzleCreate document."""
+    payload = {
+        "title": "Switch the play",
+        "description": "Find the free player on the far side",
+        "team_name": "Eagles U12",
+        "hint": "Look wide",
+        "solution_answer": "A2 runs into the space",
+        "format": "4v4",
+        "mode": "attacking",
+        "team_a_color": "#ff0000",
+        "team_b_color": "#0000ff",
+        "ball_carrier_label": "A1",
+        "starting_positions": [
+            {"player_label": "A1", "square_id": 46},
+            {"player_label": "A2", "square_id": 36},
+            {"player_label": "A3", "square_id": 38},
+            {"player_label": "A4", "square_id": 52},
+            {"player_label": "B1", "square_id": 24},
+            {"player_label": "B2", "square_id": 26},
+            {"player_label": "B3", "square_id": 31},
+            {"player_label": "B4", "square_id": 10},
+        ],
+        "solution_positions": [
+            {"player_label": "A2", "square_id": 29},
+            {"player_label": "B2", "square_id": 33},
+        ],
+        "locked_positions": [],
+    }
+    payload.update(overrides)
+    return payload
+
+
+@pytest.fixture
+def client():
+    """A TestClient on a fresh in-memory SQLite database."""
+    session.configure_database("sqlite://")
+    create_schema(session.engine)
+    solution_cache.clear()
+    formation_index.clear()
+    team_index.clear()
+
+    from app.main import app
+
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def puzzle_id(client) -> str:
+    response = client.post("/puzzles", json=puzzle_payload())
+    assert response.status_code == 200, response.text
+    return response.json()["id"]
@@ -0,0 +1,38 @@
+import uuid
+from datetime import datetime
+
+from sqlalchemy import select
+
+from app.db import session
+from app.db.attempts import AttemptLog
+from app.db.models import Attempt
+from tests.conftest import puzzle_payload
+
+
+def attempt_row(puzzle_id: str) -> dict:
+    return {
+        "id": uuid.uuid4(),
+        "puzzle_id": uuid.UUID(puzzle_id),
+        "user_id": None,
+        "team_name": "Eagles U12",
+        "format": "4v4",
+        "squares_packed": b"",
+        "distances_packed": b"",
+        "correct": False,
+        "created_at": datetime.utcnow(),
+    }
+
+
+def test_attempts_outlive_deleted_puzzles(client, puzzle_id):
+    deleted_id = client.post("/puzzles", json=puzzle_payload(team_name="Falcons")).json()["id"]
+    assert client.delete(f"/puzzles/{deleted_id}").status_code == 200
+
+    # Another worker may still score the deleted puzzle from its solution cache
+    log = AttemptLog(session.SessionLocal, batch_size=10)
+    log.record(attempt_row(puzzle_id))
+    log.record(attempt_row(deleted_id))
+    assert log.flush() == 2
+
+    assert log.stats()["written"] == 2
+    with session.SessionLocal() as db:
+        assert set(db.scalars(select(Attempt.puzzle_id))) == {uuid.UUID(puzzle_id), uuid.UUID(deleted_id)}
@@ -0,0 +1,57 @@
+import json
+
+from tests.conftest import puzzle_payload
+
+
+def mirror(positions: list[dict], cols: int = 7) -> list[dict]:
+    """Reflect 1-indexed squares left to right within their row."""
+    return [
+        {**pos, "square_id": pos["square_id"] + cols - 1 - 2 * ((pos["square_id"] - 1) % cols)}
+        for pos in positions
+    ]
+
+
+def test_duplicate_is_rejected(client, puzzle_id):
+    response = client.post("/puzzles", json=puzzle_payload(title="Again"))
+    assert response.status_code == 409
+    assert puzzle_id in response.json()["detail"]
+
+
+def test_mirror_image_is_rejected(client, puzzle_id):
+    original = puzzle_payload()
+    mirrored = puzzle_payload(
+        title="Switch the play, other side",
+        starting_positions=mirror(original["starting_positions"]),
+        solution_positions=mirror(original["solution_positions"]),
+    )
+    assert mirror(mirrored["starting_positions"]) == original["starting_positions"]
+
+    response = client.post("/puzzles", json=mirrored)
+    assert response.status_code == 409
+    assert puzzle_id in response.json()["detail"]
+
+
+def test_other_team_may_reuse_a_scenario(client, puzzle_id):
+    response = client.post("/puzzles", json=puzzle_payload(team_name="Falcons"))
+    assert response.status_code == 200
+
+
+def test_import_rejects_duplicates(client, puzzle_id):
+    original = puzzle_payload()
+    lines = [
+        puzzle_payload(title="Again"),
+        puzzle_payload(
+            title="Mirrored",
+            starting_positions=mirror(original["starting_positions"]),
+            solution_positions=mirror(original["solution_positions"]),
+        ),
+        puzzle_payload(team_name="Falcons"),
+        puzzle_payload(team_name="Falcons", title="Falcons again"),
+    ]
+    body = "\n".join(json.dumps(line) for line in lines)
+
+    report = client.post("/puzzles/import", content=body).json()
+    assert report["imported"] == 1
+    assert [error["line"] for error in report["errors"]] == [1, 2, 4]
+    assert puzzle_id in report["errors"][0]["detail"]
+    assert puzzle_id in report["errors"][1]["detail"]
@@ -0,0 +1,35 @@
+import random
+from collections import Counter
+
+from app.core.generator import FORMAT, generate_puzzle, to_square, to_xy
+from app.core.grid import get_grid
+from app.db.bulk import build_puzzle_rows
+
+
+def test_squares_round_trip_through_grid_coordinates():
+    grid = get_grid(FORMAT)
+    for square in range(1, grid.total + 1):
+        assert to_xy(grid, square) == grid.square_to_coords(square)
+        assert to_square(grid, *to_xy(grid, square)) == square
+
+
+def test_generated_squares_are_on_the_grid():
+    grid = get_grid(FORMAT)
+    rng = random.Random(7)
+    used = Counter()
+    generated = 0
+    while generated < 1000:
+        puzzle = generate_puzzle(rng, "Academy")
+        if puzzle is None:
+            continue
+        try:
+            build_puzzle_rows(puzzle)
+        except ValueError:
+            # Placement rules are checked when building rows, not when generating
+            continue
+        generated += 1
+        for pos in [*puzzle.starting_positions, *puzzle.solution_positions, *puzzle.locked_positions]:
+            used[pos.square_id] += 1
+
+    assert min(used) == 1
+    assert max(used) == grid.total
@@ -0,0 +1,60 @@
+import uuid
+from datetime import datetime
+
+from sqlalchemy import update
+
+from app.db import session
+from app.db.models import Puzzle
+from tests.conftest import puzzle_payload
+
+
+def create_puzzles(client, count: int, team_name: str = "Eagles U12") -> list[str]:
+    """count distinct puzzles, moving A2 to a different square in each."""
+    return [
+        client.post("/puzzles", json=puzzle_payload(
+            title=f"Puzzle {n}",
+            team_name=team_name,
+            solution_positions=[{"player_label": "A2", "square_id": n}],
+        )).json()["id"]
+        for n in range(1, count + 1)
+    ]
+
+
+def walk(client, **params) -> list[str]:
+    """Every id from GET /puzzles, following X-Next-Cursor to the end."""
+    ids = []
+    cursor = None
+    while True:
+        response = client.get("/puzzles", params={**params, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200, response.text
+        ids += [puzzle["id"] for puzzle in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            return ids
+
+
+def test_pages_cover_equal_timestamps_once(client):
+    ids = create_puzzles(client, 7)
+    other_team = create_puzzles(client, 2, team_name="Falcons")
+    # Most of the library shares one created_at, so only the id orders it
+    shared = datetime(2024, 1, 1)
+    with session.SessionLocal() as db:
+        db.execute(update(Puzzle).where(Puzzle.id.in_([uuid.UUID(i) for i in ids[:5]])).values(created_at=shared))
+        db.commit()
+
+    walked = walk(client, team_name="eagles u12", limit=2)
+    assert len(walked) == len(set(walked)) == len(ids)
+    # The two newer puzzles come first; page boundaries then fall inside the
+    # shared timestamp, where rows are ordered by id
+    assert set(walked[:2]) == set(ids[5:])
+    assert walked[2:] == sorted(ids[:5], key=uuid.UUID, reverse=True)
+
+    everything = walk(client, limit=3)
+    assert sorted(everything) == sorted(ids + other_team)
+
+
+def test_malformed_cursor_is_rejected(client):
+    for cursor in ("not-a-cursor", "bm8tc2VwYXJhdG9y", "MjAyNC0wMS0wMXxub3QtYS11dWlk"):
+        response = client.get("/puzzles", params={"cursor": cursor})
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Invalid cursor"
@@ -0,0 +1,32 @@
+"""Statements run per request, so N+1 regressions fail loudly."""
+
+
+def test_get_puzzle_is_one_query(client, puzzle_id, query_budget):
+    with query_budget(1):
+        response = client.get(f"/puzzles/{puzzle_id}")
+    assert response.status_code == 200
+    assert len(response.json()["teams"]["A"]["players"]) == 4
+
+
+def test_get_solution_is_one_query(client, puzzle_id, query_budget):
+    with query_budget(1):
+        response = client.get(f"/puzzles/{puzzle_id}/solution")
+    assert response.status_code == 200
+    assert len(response.json()) == 2
+
+
+def test_validate_loads_the_solution_once(client, puzzle_id, query_budget):
+    submission = {"positions": [
+        {"player_label": "A2", "square_id": 29},
+        {"player_label": "B2", "square_id": 33},
+    ]}
+
+    with query_budget(1):
+        response = client.post(f"/puzzles/{puzzle_id}/validate", json=submission)
+    assert response.status_code == 200
+    assert response.json()["correct"] is True
+
+    # Scored from the solution cache
+    with query_budget(0):
+        response = client.post(f"/puzzles/{puzzle_id}/validate", json=submission)
+    assert response.json()["correct"] is True
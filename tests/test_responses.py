@@ -0,0 +1,23 @@
+from app.schemas.puzzle import PuzzleDetailOut, PuzzleOut
+from tests.conftest import puzzle_payload
+
+
+def test_puzzle_detail_matches_its_response_model(client, puzzle_id):
+    payload = client.get(f"/puzzles/{puzzle_id}").json()
+    assert PuzzleDetailOut.model_validate(payload).model_dump(mode="json") == payload
+
+
+def test_player_without_a_start_square(client):
+    starting_positions = puzzle_payload()["starting_positions"][:-1]
+    response = client.post("/puzzles", json=puzzle_payload(starting_positions=starting_positions))
+    assert response.status_code == 200
+
+    payload = client.get(f"/puzzles/{response.json()['id']}").json()
+    players = {player["label"]: player for player in payload["teams"]["B"]["players"]}
+    assert players["B4"]["start_square"] is None
+    assert PuzzleDetailOut.model_validate(payload).model_dump(mode="json") == payload
+
+
+def test_puzzle_list_matches_its_response_model(client, puzzle_id):
+    payload = client.get("/puzzles", params={"team_name": "Eagles U12"}).json()
+    assert [PuzzleOut.model_validate(puzzle).model_dump(mode="json") for puzzle in payload] == payload
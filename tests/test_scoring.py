@@ -0,0 +1,129 @@
+import itertools
+import random
+import uuid
+
+import pytest
+
+from app.api.validation import get_solution, score_submission, score_submissions, submission_error
+from app.core.grid import get_grid
+from app.db import session
+from app.schemas.puzzle import PuzzleValidationRequest
+from tests.conftest import puzzle_payload
+
+
+def formation(format: str) -> dict:
+    """Start and solution positions for every player of a format, on distinct squares."""
+    grid = get_grid(format)
+    labels = [f"{team}{i}" for team in "AB" for i in range(1, grid.players_per_team + 1)]
+    squares = random.Random(format).sample(range(1, grid.total + 1), 2 * len(labels))
+    return {
+        "format": format,
+        "starting_positions": [
+            {"player_label": label, "square_id": square}
+            for label, square in zip(labels, squares)
+        ],
+        "solution_positions": [
+            {"player_label": label, "square_id": square}
+            for label, square in zip(labels[::2], squares[len(labels):])
+        ],
+    }
+
+
+def submissions(solution, grid, rng: random.Random) -> list[PuzzleValidationRequest]:
+    """Correct, partly correct, incomplete and random submissions for a solution."""
+    correct = dict(solution.squares)
+    cases = [correct]
+    for label in correct:
+        cases.append({**correct, label: correct[label] % grid.total + 1})
+        cases.append({other: square for other, square in correct.items() if other != label})
+    for _ in range(200):
+        cases.append({
+            label: rng.choice([square, rng.randint(1, grid.total)])
+            for label, square in correct.items()
+            if rng.random() > 0.05
+        })
+    return [
+        PuzzleValidationRequest(positions=[
+            {"player_label": label, "square_id": square} for label, square in case.items()
+        ])
+        for case in cases
+    ]
+
+
+@pytest.mark.parametrize("format", ["4v4", "7v7", "11v11"])
+def test_batch_and_single_exact_scoring_agree(client, format):
+    response = client.post("/puzzles", json=puzzle_payload(**formation(format)))
+    assert response.status_code == 200, response.text
+
+    with session.SessionLocal() as db:
+        solution = get_solution(db, uuid.UUID(response.json()["id"]))
+    batch = [
+        submission
+        for submission in submissions(solution, get_grid(format), random.Random(1))
+        if submission_error(solution, submission) is None
+    ]
+
+    assert score_submissions(solution, batch) == [score_submission(solution, submission) for submission in batch]
+
+
+def test_swapped_teammates_score_as_correct(client):
+    solution_positions = [
+        {"player_label": "A2", "square_id": 29},
+        {"player_label": "A3", "square_id": 30},
+        {"player_label": "B2", "square_id": 33},
+    ]
+    swapped = [
+        {"player_label": "A2", "square_id": 30},
+        {"player_label": "A3", "square_id": 29},
+        {"player_label": "B2", "square_id": 33},
+    ]
+    exact_id = client.post("/puzzles", json=puzzle_payload(
+        team_name="Falcons", solution_positions=solution_positions,
+    )).json()["id"]
+    assignment_id = client.post("/puzzles", json=puzzle_payload(
+        scoring="assignment", solution_positions=solution_positions,
+    )).json()["id"]
+
+    result = client.post(f"/puzzles/{assignment_id}/validate", json={"positions": swapped}).json()
+    assert result["correct"] is True
+    assert all(player["distance"] == 0 for player in result["player_feedback"])
+
+    # By label, both players are a square off
+    result = client.post(f"/puzzles/{exact_id}/validate", json={"positions": swapped}).json()
+    assert result["correct"] is False
+    assert {player["player_label"]: player["distance"] for player in result["player_feedback"]} == {"A2": 1, "A3": 1, "B2": 0}
+
+
+def test_partial_assignment_matches_the_optimal_matching(client):
+    response = client.post("/puzzles", json=puzzle_payload(scoring="assignment", **formation("11v11")))
+    assert response.status_code == 200, response.text
+    with session.SessionLocal() as db:
+        solution = get_solution(db, uuid.UUID(response.json()["id"]))
+    grid = get_grid("11v11")
+    teams = [[label for label in solution.squares if label.startswith(team)] for team in "AB"]
+
+    rng = random.Random(2)
+    for _ in range(50):
+        # Some players on their own square, some on a teammate's, the rest anywhere
+        submitted = {}
+        for labels in teams:
+            targets = [solution.squares[label] for label in labels]
+            rng.shuffle(targets)
+            for label, target in zip(labels, targets):
+                submitted[label] = rng.choice([solution.squares[label], target, rng.randint(1, grid.total)])
+        result = score_submission(solution, PuzzleValidationRequest(positions=[
+            {"player_label": label, "square_id": square} for label, square in submitted.items()
+        ]))
+        distances = {player.player_label: player.distance for player in result["player_feedback"]}
+
+        for labels in teams:
+            # Per-player distances of every optimal way to share the team's
+            # solution squares out among its players
+            matchings = [
+                [grid.manhattan_distance(submitted[player], solution.squares[target]) for player, target in zip(labels, order)]
+                for order in itertools.permutations(labels)
+            ]
+            best = min(map(sum, matchings))
+            optimal = [matching for matching in matchings if sum(matching) == best]
+            assert [distances[label] for label in labels] in optimal
+        assert result["correct"] == all(distance == 0 for distance in distances.values())
@@ -0,0 +1,60 @@
+from tests.conftest import puzzle_payload
+
+
+def create(client, n: int, **fields) -> str:
+    """A puzzle with the default text replaced by fields, A2 moving to square n."""
+    response = client.post("/puzzles", json=puzzle_payload(
+        **{"title": f"Puzzle {n}", "description": "Play it out", "hint": "Be patient", **fields},
+        solution_positions=[{"player_label": "A2", "square_id": n}],
+    ))
+    assert response.status_code == 200, response.text
+    return response.json()["id"]
+
+
+def search(client, q: str, **params) -> list[dict]:
+    response = client.get("/puzzles/search", params={"q": q, **params})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_title_outranks_description_outranks_hint(client):
+    in_hint = create(client, 1, hint="Create an overload out wide")
+    in_title = create(client, 2, title="Overload the wing")
+    in_description = create(client, 3, description="Two attackers overload one defender")
+    create(client, 4)
+
+    results = search(client, "overloads")
+    assert [result["id"] for result in results] == [in_title, in_description, in_hint]
+    assert results[0]["rank"] > results[1]["rank"] > results[2]["rank"]
+    assert [result["id"] for result in search(client, '"overload the"')] == [in_title]
+
+
+def test_cursor_pages_match_one_page(client):
+    # Equal ranks for the identical ones, so the id breaks ties across pages
+    for n in range(1, 6):
+        create(client, n, title="Press high")
+    create(client, 6, description="Press high after a turnover")
+    create(client, 7, hint="Press")
+
+    one_page = [result["id"] for result in search(client, "press", limit=50)]
+    assert len(one_page) == 7
+
+    walked = []
+    cursor = None
+    while True:
+        response = client.get("/puzzles/search", params={"q": "press", "limit": 2, **({"cursor": cursor} if cursor else {})})
+        walked += [result["id"] for result in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+    assert walked == one_page
+
+
+def test_deleted_puzzle_leaves_the_index(client):
+    kept = create(client, 1, title="Switch the play quickly")
+    deleted = create(client, 2, title="Switch the play slowly")
+    assert {result["id"] for result in search(client, "switch")} == {kept, deleted}
+
+    assert client.delete(f"/puzzles/{deleted}").status_code == 200
+    assert [result["id"] for result in search(client, "switch")] == [kept]
+    assert search(client, "slowly") == []
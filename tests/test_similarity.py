@@ -0,0 +1,37 @@
+import threading
+import time
+
+from app.core.similarity import formation_index
+from tests.conftest import puzzle_payload
+
+
+def test_stale_index_answers_while_it_rebuilds(client, puzzle_id, monkeypatch):
+    other_id = client.post("/puzzles", json=puzzle_payload(team_name="Falcons")).json()["id"]
+    assert [row["id"] for row in client.get(f"/puzzles/{puzzle_id}/similar").json()] == [other_id]
+
+    import app.api.similarity as similarity
+    loading = threading.Event()
+    release = threading.Event()
+    load_formations = similarity.load_formations
+
+    def slow_load():
+        loading.set()
+        release.wait(5)
+        yield from load_formations()
+
+    monkeypatch.setattr(similarity, "load_formations", slow_load)
+    formation_index.expire()
+    # Served from the old index while the rebuild waits on the database
+    assert [row["id"] for row in client.get(f"/puzzles/{puzzle_id}/similar").json()] == [other_id]
+    assert loading.wait(5)
+    # Created during the rebuild, so it is replayed onto the new index
+    third_id = client.post("/puzzles", json=puzzle_payload(team_name="Hawks")).json()["id"]
+    release.set()
+
+    for _ in range(500):
+        if not formation_index.stats()["rebuilding"]:
+            break
+        time.sleep(0.01)
+    assert not formation_index.stale()
+    similar = {row["id"] for row in client.get(f"/puzzles/{puzzle_id}/similar").json()}
+    assert similar == {other_id, third_id}
@@ -0,0 +1,75 @@
+import uuid
+
+from app.api import validation
+from app.core.config import settings
+from app.db import session
+from app.db.attempts import AttemptLog
+from app.db.stats import puzzle_stats, rebuild_stats
+from tests.conftest import puzzle_payload
+
+SOLUTION = [
+    {"player_label": "A2", "square_id": 29},
+    {"player_label": "B2", "square_id": 33},
+]
+WRONG = [
+    {"player_label": "A2", "square_id": 30},
+    {"player_label": "B2", "square_id": 33},
+]
+
+
+def current_stats(client, puzzle_ids: list[str]) -> tuple[list[dict], dict]:
+    with session.SessionLocal() as db:
+        puzzles = [puzzle_stats(db, uuid.UUID(puzzle_id)) for puzzle_id in puzzle_ids]
+    return puzzles, client.get("/teams/Eagles U12/stats").json()
+
+
+def test_incremental_stats_match_a_rebuild(client, puzzle_id, monkeypatch):
+    other_id = client.post("/puzzles", json=puzzle_payload(
+        title="Cover the run",
+        solution_positions=[{"player_label": "A3", "square_id": 30}],
+    )).json()["id"]
+    log = AttemptLog(session.SessionLocal, batch_size=1000, flush_interval=3600)
+    monkeypatch.setattr(settings, "ATTEMPT_LOG_ENABLED", True)
+    monkeypatch.setattr(validation, "attempt_log", log)
+
+    users = [str(uuid.uuid4()) for _ in range(3)]
+    # (puzzle, user, positions): users retry after a miss, solve more than
+    # once, or never solve; one attempt is anonymous
+    attempts = [
+        (puzzle_id, users[0], WRONG),
+        (puzzle_id, users[0], SOLUTION),
+        (puzzle_id, users[1], SOLUTION),
+        (puzzle_id, None, WRONG),
+        (other_id, users[0], [{"player_label": "A3", "square_id": 30}]),
+        (puzzle_id, users[1], SOLUTION),
+        (puzzle_id, users[2], WRONG),
+        (other_id, users[2], [{"player_label": "A3", "square_id": 31}]),
+        (other_id, users[2], [{"player_label": "A3", "square_id": 30}]),
+        (puzzle_id, users[2], WRONG),
+    ]
+    try:
+        # Two flushes, so the second batch adds onto existing counters
+        for n, (target, user_id, positions) in enumerate(attempts, start=1):
+            response = client.post(f"/puzzles/{target}/validate", json={"positions": positions, "user_id": user_id})
+            assert response.status_code == 200, response.text
+            if n == len(attempts) // 2:
+                log.flush()
+        log.flush()
+    finally:
+        log.close()
+    assert log.stats()["written"] == len(attempts)
+
+    puzzles, team = current_stats(client, [puzzle_id, other_id])
+    assert (puzzles[0]["attempts"], puzzles[0]["correct_attempts"], puzzles[0]["users"], puzzles[0]["solvers"]) == (7, 3, 3, 2)
+    assert puzzles[0]["average_attempts_to_solve"] == 1.5
+    assert (team["attempts"], team["correct_attempts"], team["users"], team["solves"]) == (10, 5, 3, 4)
+
+    # Deleting a puzzle takes it off the team's puzzle count; its attempts
+    # still count towards the team
+    assert client.delete(f"/puzzles/{other_id}").status_code == 200
+    assert client.get("/teams", params={"prefix": "eagles"}).json() == [{"name": "Eagles U12", "puzzles": 1}]
+    assert current_stats(client, [puzzle_id, other_id]) == (puzzles, team)
+
+    with session.SessionLocal() as db:
+        assert sum(rebuild_stats(db)) == len(attempts)
+    assert current_stats(client, [puzzle_id, other_id]) == (puzzles, team)
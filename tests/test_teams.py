@@ -0,0 +1,41 @@
+import threading
+import time
+
+from app.core.teams import TeamIndex
+
+
+def test_fresh_index_answers_without_the_rebuild_lock():
+    index = TeamIndex(ttl=60)
+    index.refresh(lambda: [("eaglesu12", "Eagles U12", 2)])
+
+    with index._rebuild_lock:
+        index.refresh(lambda: [])
+        assert index.complete("eag", 10) == [("Eagles U12", 2)]
+
+
+def test_stale_index_answers_while_it_rebuilds():
+    index = TeamIndex(ttl=60)
+    index.refresh(lambda: [("eaglesu12", "Eagles U12", 2)])
+    loading = threading.Event()
+    release = threading.Event()
+
+    def slow_load():
+        loading.set()
+        release.wait(5)
+        yield ("eaglesu12", "Eagles U12", 3)
+        yield ("hawks", "Hawks", 1)
+
+    index.expire()
+    index.refresh(slow_load)
+    assert loading.wait(5)
+    assert index.complete("", 10) == [("Eagles U12", 2)]
+    # Created during the rebuild, so it is replayed onto the new list
+    index.add("falcons", "Falcons")
+    release.set()
+
+    for _ in range(500):
+        if not index.stats()["rebuilding"]:
+            break
+        time.sleep(0.01)
+    assert not index.stale()
+    assert index.complete("", 10) == [("Eagles U12", 3), ("Falcons", 1), ("Hawks", 1)]